@@ -0,0 +1,193 @@
+#!/usr/bin/python3
+
+##################################################################################
+# Min-depth pyramid over a bathymetry grid, for seafloor collision checks
+#
+# Level 0 holds the shallowest depth of each block of grid cells (a cell is the
+# square between four GEBCO points, cellSize cells per block); every level above
+# holds the minimum of 2x2 blocks of the level below. Bilinear depths never lie
+# above the shallowest corner of their cell, so a block deeper than X has no
+# seafloor shallower than X anywhere inside it.
+#
+# anyShallower answers "is there seafloor shallower than X in this lat/lon box"
+# by descending the pyramid from the smallest blocks covering the box, in
+# O(log n). contact uses it to skip deep water & otherwise checks the exact
+# (interpolated) floor along the whole glide segment, not just its end point.
+#
+# Usage:
+#   floorIndex = indexFor(bathyreader)
+#   floor = floorIndex.contact(lat0, lon0, depth0, lat1, lon1, depth1)
+##################################################################################
+
+# Standard imports
+import weakref
+import numpy as np
+
+# Indexes already built by this process, per bathymetry reader
+_indexes = weakref.WeakKeyDictionary()
+
+##################################################################################
+# This class stores the min-depth pyramid of a bathymetry reader
+# (bathymetryReader or tiledBathymetryReader)
+##################################################################################
+class minDepthIndex:
+
+    # ---------------------------------------------------------
+    # Constructor with bathymetry reader
+    # Builds the pyramid from the reader's block minimum depths
+    # ---------------------------------------------------------
+    def __init__(self, bathyreader):
+        self.bathyreader = bathyreader
+        self.latAxis = bathyreader.latAxis
+        self.lonAxis = bathyreader.lonAxis
+        self.latStep = (self.latAxis.hi-self.latAxis.lo)/(self.latAxis.last+1)
+        self.lonStep = (self.lonAxis.hi-self.lonAxis.lo)/(self.lonAxis.last+1)
+
+        blockMin, self.cellSize = bathyreader.blockMinDepths()
+
+        # 2x2 min pooling up to a single block (odd edges padded with +inf)
+        self.levels = [np.asarray(blockMin, dtype=float)]
+        while self.levels[-1].size > 1:
+            level = self.levels[-1]
+            padded = np.full((level.shape[0] + level.shape[0]%2, level.shape[1] + level.shape[1]%2), np.inf)
+            padded[:level.shape[0], :level.shape[1]] = level
+            self.levels.append(np.minimum(np.minimum(padded[0::2,0::2], padded[0::2,1::2]), np.minimum(padded[1::2,0::2], padded[1::2,1::2])))
+
+    # ---------------------------------------------------------
+    # Range of level 0 blocks overlapping a lat/lon box
+    # returns None if the box leaves the grid
+    # ---------------------------------------------------------
+    def blockRange(self, latMin, latMax, lonMin, lonMax):
+        y0 = self.latAxis.locate(latMin)
+        y1 = self.latAxis.locate(latMax)
+        x0 = self.lonAxis.locate(lonMin)
+        x1 = self.lonAxis.locate(lonMax)
+        if y0 is None or y1 is None or x0 is None or x1 is None:
+            return None
+
+        size = self.cellSize
+        return y0[0]//size, y1[0]//size, x0[0]//size, x1[0]//size
+
+    # ---------------------------------------------------------
+    # Is there seafloor shallower than depth (or as shallow)
+    # anywhere in the lat/lon box? True if the box leaves the grid
+    # ---------------------------------------------------------
+    def anyShallower(self, latMin, latMax, lonMin, lonMax, depth):
+        blocks = self.blockRange(latMin, latMax, lonMin, lonMax)
+        if blocks is None:
+            return True
+        y0, y1, x0, x1 = blocks
+
+        # lowest level where the box spans at most 2x2 blocks, usually level 0 for one glide step
+        k = 0
+        while (y1 >> k) - (y0 >> k) > 1 or (x1 >> k) - (x0 >> k) > 1:
+            k += 1
+
+        # depth first descent from those blocks, pruning blocks deeper than depth
+        stack = [(k, i, j) for i in range(y0 >> k, (y1 >> k)+1) for j in range(x0 >> k, (x1 >> k)+1)]
+        while stack:
+            k, i, j = stack.pop()
+            if self.levels[k][i,j] > depth:
+                continue
+
+            # block entirely inside the box: its shallowest point is in the box
+            if k == 0 or (i << k >= y0 and ((i+1) << k)-1 <= y1 and j << k >= x0 and ((j+1) << k)-1 <= x1):
+                return True
+
+            # children overlapping the box
+            child = self.levels[k-1]
+            for ci in range(max(2*i, y0 >> (k-1)), min(2*i+2, (y1 >> (k-1))+1, child.shape[0])):
+                for cj in range(max(2*j, x0 >> (k-1)), min(2*j+2, (x1 >> (k-1))+1, child.shape[1])):
+                    stack.append((k-1, ci, cj))
+
+        return False
+
+    # ---------------------------------------------------------
+    # Exact floor depth along segments, sampled at least twice per
+    # grid cell crossed & always at the end point
+    # returns the (segments, samples) floor depths & glider depths
+    # ---------------------------------------------------------
+    def segmentFloors(self, lat0, lon0, depth0, lat1, lon1, depth1):
+        steps = np.maximum(np.abs(lat1-lat0)/self.latStep, np.abs(lon1-lon0)/self.lonStep)
+        n = np.maximum(np.ceil(2*steps), 1)
+
+        # fractions k/n along each segment, padded with the end point
+        f = np.minimum(np.arange(1, int(np.max(n))+1), n[:,None])/n[:,None]
+        lats = np.where(f == 1, lat1[:,None], lat0[:,None] + f*(lat1-lat0)[:,None])
+        lons = np.where(f == 1, lon1[:,None], lon0[:,None] + f*(lon1-lon0)[:,None])
+        depths = np.where(f == 1, depth1[:,None], depth0[:,None] + f*(depth1-depth0)[:,None])
+
+        return self.bathyreader.getDepths(lats, lons), depths
+
+    # ---------------------------------------------------------
+    # Does the glide segment from (lat0, lon0, depth0) to
+    # (lat1, lon1, depth1) touch the seafloor?
+    # returns the floor depth at the end point, None if not
+    # ---------------------------------------------------------
+    def contact(self, lat0, lon0, depth0, lat1, lon1, depth1):
+        if not self.anyShallower(min(lat0, lat1), max(lat0, lat1), min(lon0, lon1), max(lon0, lon1), max(depth0, depth1)):
+            return None
+
+        floors, depths = self.segmentFloors(*[np.array([x], dtype=float) for x in (lat0, lon0, depth0, lat1, lon1, depth1)])
+        if not np.any(floors - depths <= 0):
+            return None
+
+        return floors[0,-1]
+
+    # ---------------------------------------------------------
+    # Fraction of the glide segment at which it first reaches the
+    # seafloor, root-found by bisection to tolerance (fraction);
+    # None if the segment does not touch the floor
+    # The fraction returned is at or just past the crossing
+    # ---------------------------------------------------------
+    def contactFraction(self, lat0, lon0, depth0, lat1, lon1, depth1, tolerance=1e-6):
+        if self.contact(lat0, lon0, depth0, lat1, lon1, depth1) is None:
+            return None
+
+        def clearance(f):
+            return self.bathyreader.getDepth(lat0 + f*(lat1-lat0), lon0 + f*(lon1-lon0))[0] - (depth0 + f*(depth1-depth0))
+
+        # already on the floor: nothing to cut
+        if clearance(0.0) <= 0:
+            return 1.0
+
+        # first sampled point past the floor brackets the crossing
+        floors, depths = self.segmentFloors(*[np.array([x], dtype=float) for x in (lat0, lon0, depth0, lat1, lon1, depth1)])
+        n = floors.shape[1]
+        k = int(np.argmax(floors[0] - depths[0] <= 0))
+        lo, hi = k/n, (k+1)/n
+
+        while hi - lo > tolerance:
+            mid = (lo + hi)/2
+            if clearance(mid) <= 0:
+                hi = mid
+            else:
+                lo = mid
+
+        return hi
+
+    # ---------------------------------------------------------
+    # contact for arrays of segments
+    # returns a hit mask & the floor depths at the end points
+    # (NaN where the floor is not checked)
+    # ---------------------------------------------------------
+    def contactMany(self, lat0, lon0, depth0, lat1, lon1, depth1):
+        check = np.array([self.anyShallower(min(a0, a1), max(a0, a1), min(o0, o1), max(o0, o1), max(d0, d1))
+                          for a0, o0, d0, a1, o1, d1 in zip(lat0, lon0, depth0, lat1, lon1, depth1)], dtype=bool)
+
+        hit = np.zeros(len(check), dtype=bool)
+        floor = np.full(len(check), np.nan)
+        if check.any():
+            floors, depths = self.segmentFloors(lat0[check], lon0[check], depth0[check], lat1[check], lon1[check], depth1[check])
+            hit[check] = np.any(floors - depths <= 0, axis=1)
+            floor[check] = floors[:,-1]
+
+        return hit, floor
+
+# ---------------------------------------------------------
+# Min-depth index of a bathymetry reader, built once per reader
+# ---------------------------------------------------------
+def indexFor(bathyreader):
+    if bathyreader not in _indexes:
+        _indexes[bathyreader] = minDepthIndex(bathyreader)
+    return _indexes[bathyreader]
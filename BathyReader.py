@@ -5,10 +5,13 @@
 
 
 # Standard imports
+import os
 from netCDF4 import Dataset
-from scipy.interpolate import RegularGridInterpolator
 import numpy as np
 
+# Local imports
+from OceanInterp import makeAxis
+
 ##################################################################################
 # This class enables reading bathymetry (ocean depth) data from a bathymetry file.
 #
@@ -16,6 +19,10 @@ import numpy as np
 #   https://www.gebco.net/data_and_products/gridded_bathymetry_data
 #
 # The supplied file can be the entire worldwide DB (huge!) or a subset.
+#
+# GEBCO grids are uniform in lat & lon, so lookups are a direct bilinear
+# interpolation: the cell is found by index arithmetic (OceanInterp axes),
+# with a scalar path (getDepth) & a vectorized path (getDepths).
 ##################################################################################
 class bathymetryReader:
 
@@ -31,27 +38,92 @@ class bathymetryReader:
         lonGrid = dataset.variables['lon'][:] # lon grid
         elevationGrid = dataset.variables['elevation'][:] # elevation grid
 
-        # Create interpolator on elevation
-        self.elevInterp = RegularGridInterpolator((latGrid,lonGrid), elevationGrid)
+        self.setGrids(latGrid, lonGrid, elevationGrid)
+
+    # ---------------------------------------------------------
+    # Alternate constructor from grids already in memory
+    # (e.g. an elevation buffer in shared memory); no file is read
+    # and a contiguous float32 elevation array is not copied
+    # ---------------------------------------------------------
+    @classmethod
+    def fromGrids(cls, latGrid, lonGrid, elevationGrid):
+        reader = cls.__new__(cls)
+        reader.setGrids(latGrid, lonGrid, elevationGrid)
+        return reader
+
+    # ---------------------------------------------------------
+    # Store the grids: lat/lon axes & a plain contiguous
+    # float32 elevation array (GEBCO int16 values are exact)
+    # ---------------------------------------------------------
+    def setGrids(self, latGrid, lonGrid, elevationGrid):
+
+        self.latAxis = makeAxis(latGrid)
+        self.lonAxis = makeAxis(lonGrid)
+        self.elevation = np.ascontiguousarray(np.ma.getdata(elevationGrid), dtype=np.float32)
+
+    # ---------------------------------------------------------
+    # Return the shallowest depth of each grid cell (the highest
+    # of its four corners), one cell per block (see BathyIndex)
+    # ---------------------------------------------------------
+    def blockMinDepths(self):
+        elevation = self.elevation
+        highest = np.maximum(np.maximum(elevation[:-1,:-1], elevation[:-1,1:]), np.maximum(elevation[1:,:-1], elevation[1:,1:]))
+
+        return -highest, 1
 
     # ---------------------------------------------------------
     # Return the depth for the specified location
     # ---------------------------------------------------------
     def getDepth(self, lat, lon):
 
-        # Interpolate elevation
-        #elevation = self.elevInterp([lat, lon])
-        
-        #to debug
-        try:
-            elevation = self.elevInterp([lat, lon])
-        except:
-            print(lat)
-            print(lon)
-            raise Exception("Out of range")
-        
+        # Locate the grid cell
+        y = self.latAxis.locate(lat)
+        x = self.lonAxis.locate(lon)
+        if y is None or x is None:
+            raise Exception("Out of range: lat=%s lon=%s" % (lat, lon))
+        (iy, fy), (ix, fx) = y, x
+
+        # Bilinear interpolation of elevation
+        elevation = self.elevation
+        elevation = ((1-fy)*((1-fx)*float(elevation[iy,ix]) + fx*float(elevation[iy,ix+1]))
+                     + fy*((1-fx)*float(elevation[iy+1,ix]) + fx*float(elevation[iy+1,ix+1])))
+
+        # Depth is negative elevation
+        return np.array([-elevation])
+
+    # ---------------------------------------------------------
+    # Return the depths for arrays of locations
+    # ---------------------------------------------------------
+    def getDepths(self, lats, lons):
+
+        # Locate the grid cells
+        y = self.latAxis.locateMany(np.asarray(lats, dtype=float).ravel())
+        x = self.lonAxis.locateMany(np.asarray(lons, dtype=float).ravel())
+        if y is None or x is None:
+            lats, lons = np.asarray(lats, dtype=float).ravel(), np.asarray(lons, dtype=float).ravel()
+            n = np.flatnonzero(self.latAxis.outside(lats) | self.lonAxis.outside(lons))[0]
+            raise Exception("Out of range: point %d lat=%s lon=%s" % (n, lats[n], lons[n]))
+        (iy, fy), (ix, fx) = y, x
+
+        # Bilinear interpolation of elevation
+        elevation = self.elevation
+        elevation = ((1-fy)*((1-fx)*elevation[iy,ix] + fx*elevation[iy,ix+1])
+                     + fy*((1-fx)*elevation[iy+1,ix] + fx*elevation[iy+1,ix+1]))
+
         # Depth is negative elevation
-        return -elevation
+        return -elevation.reshape(np.shape(lats))
+
+
+# ---------------------------------------------------------
+# Open a bathymetry source: a GEBCO NetCDF file (read whole)
+# or a tile directory from BathyTiles.buildTiles (tiles read on demand)
+# ---------------------------------------------------------
+def openBathymetry(bathyFile):
+    if os.path.isdir(bathyFile):
+        from BathyTiles import tiledBathymetryReader
+        return tiledBathymetryReader(bathyFile)
+
+    return bathymetryReader(bathyFile)
 
 
 # In[ ]:
\ No newline at end of file
@@ -0,0 +1,217 @@
+#!/usr/bin/python3
+
+##################################################################################
+# Tiled, memory-mapped bathymetry for global or basin-scale GEBCO grids
+#
+# buildTiles converts a GEBCO NetCDF file into fixed-size int16 tiles on disk,
+# reading the elevation variable one tile at a time (the full grid is never
+# held in memory). Tiles overlap by one row & column, so the four corners of
+# every grid cell lie in a single tile.
+#
+# tiledBathymetryReader has the bathymetryReader interface (getDepth &
+# getDepths). Tiles are memory-mapped & decoded to float32 only when a lookup
+# touches them, & kept in an LRU cache holding at most cacheBytes of tiles.
+#
+# Usage:
+#   python BathyTiles.py GEBCO_2023.nc [tileDirectory] [--tile 1024]
+#   bathyreader = tiledBathymetryReader('GEBCO_2023.nc.tiles', cacheBytes=256*2**20)
+##################################################################################
+
+# Standard imports
+import os
+import json
+import argparse
+from collections import OrderedDict
+import numpy as np
+from netCDF4 import Dataset
+
+# Local imports
+from OceanInterp import makeAxis
+
+# Tile directory files
+TILE_HEADER = 'tiles.json'
+TILE_AXES = 'axes.npz'
+
+# Default tile edge (grid points) & cache budget (bytes)
+TILE_SIZE = 1024
+CACHE_BYTES = 256 * 2**20
+
+# ---------------------------------------------------------
+# Default tile directory for a GEBCO file
+# ---------------------------------------------------------
+def tileDirectory(gebcoFile):
+    return gebcoFile + '.tiles'
+
+# ---------------------------------------------------------
+# File name of tile (row, column)
+# ---------------------------------------------------------
+def tileName(row, col):
+    return 'tile_%d_%d.i16' % (row, col)
+
+# ---------------------------------------------------------
+# Convert a GEBCO NetCDF file into tiles of tileSize x tileSize
+# cells; returns the tile directory
+# ---------------------------------------------------------
+def buildTiles(gebcoFile, tileDir=None, tileSize=TILE_SIZE):
+    if tileDir is None:
+        tileDir = tileDirectory(gebcoFile)
+    os.makedirs(tileDir, exist_ok=True)
+
+    dataset = Dataset(gebcoFile, 'r')
+    latGrid = np.asarray(dataset.variables['lat'][:], dtype=float)
+    lonGrid = np.asarray(dataset.variables['lon'][:], dtype=float)
+    elevation = dataset.variables['elevation']
+    nRows = -(-(len(latGrid)-1) // tileSize)
+    nCols = -(-(len(lonGrid)-1) // tileSize)
+
+    # One tile at a time, with the shared row & column of the next tile
+    # (& the shallowest depth of each tile, for BathyIndex)
+    tileMinDepth = np.empty((nRows, nCols))
+    for row in range(nRows):
+        for col in range(nCols):
+            tile = np.ma.getdata(elevation[row*tileSize:(row+1)*tileSize+1, col*tileSize:(col+1)*tileSize+1])
+            np.ascontiguousarray(tile, dtype=np.int16).tofile(os.path.join(tileDir, tileName(row, col)))
+            tileMinDepth[row, col] = -np.max(tile)
+    dataset.close()
+
+    np.savez(os.path.join(tileDir, TILE_AXES), lat=latGrid, lon=lonGrid, tileMinDepth=tileMinDepth)
+
+    # Header last: a directory without it is an incomplete conversion
+    stat = os.stat(gebcoFile)
+    header = {'source': os.path.basename(gebcoFile), 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+              'tileSize': tileSize, 'shape': [len(latGrid), len(lonGrid)], 'tiles': [nRows, nCols], 'dtype': 'int16'}
+    with open(os.path.join(tileDir, TILE_HEADER), 'w') as file:
+        json.dump(header, file)
+
+    return tileDir
+
+##################################################################################
+# This class reads bathymetry (ocean depth) from a tile directory
+# Only the tiles a mission touches are loaded, within the cache byte budget
+##################################################################################
+class tiledBathymetryReader:
+
+    # ---------------------------------------------------------
+    # Constructor with tile directory & cache budget (bytes)
+    # ---------------------------------------------------------
+    def __init__(self, tileDir, cacheBytes=CACHE_BYTES):
+        self.tileDir = tileDir
+        self.cacheBytes = cacheBytes
+
+        with open(os.path.join(tileDir, TILE_HEADER), 'r') as file:
+            self.header = json.load(file)
+        self.tileSize = self.header['tileSize']
+        self.nRows, self.nCols = self.header['tiles']
+        self.shape = self.header['shape']
+
+        axes = np.load(os.path.join(tileDir, TILE_AXES))
+        self.latAxis = makeAxis(axes['lat'])
+        self.lonAxis = makeAxis(axes['lon'])
+        self.tileMinDepth = axes['tileMinDepth']
+
+        # LRU cache: (row, col) -> float32 tile, most recently used last
+        self.tiles = OrderedDict()
+        self.cachedBytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ---------------------------------------------------------
+    # Return tile (row, column) as float32, loading it if needed
+    # & evicting least recently used tiles beyond the budget
+    # ---------------------------------------------------------
+    def getTile(self, row, col):
+        key = (row, col)
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+        self.misses += 1
+        rows = min(self.tileSize, self.shape[0]-1-row*self.tileSize) + 1
+        cols = min(self.tileSize, self.shape[1]-1-col*self.tileSize) + 1
+        mapped = np.memmap(os.path.join(self.tileDir, tileName(row, col)), dtype=self.header['dtype'], mode='r', shape=(rows, cols))
+        tile = np.array(mapped, dtype=np.float32)
+        del mapped
+
+        self.tiles[key] = tile
+        self.cachedBytes += tile.nbytes
+        while self.cachedBytes > self.cacheBytes and len(self.tiles) > 1:
+            self.cachedBytes -= self.tiles.popitem(last=False)[1].nbytes
+
+        return tile
+
+    # ---------------------------------------------------------
+    # Return the shallowest depth of each tile, one tile per
+    # block (see BathyIndex); no tile is loaded
+    # ---------------------------------------------------------
+    def blockMinDepths(self):
+        return self.tileMinDepth, self.tileSize
+
+    # ---------------------------------------------------------
+    # Return the depth for the specified location
+    # ---------------------------------------------------------
+    def getDepth(self, lat, lon):
+
+        # Locate the grid cell
+        y = self.latAxis.locate(lat)
+        x = self.lonAxis.locate(lon)
+        if y is None or x is None:
+            raise Exception("Out of range: lat=%s lon=%s" % (lat, lon))
+        (iy, fy), (ix, fx) = y, x
+
+        # Cell within its tile
+        row, col = iy // self.tileSize, ix // self.tileSize
+        elevation = self.getTile(row, col)
+        iy -= row*self.tileSize
+        ix -= col*self.tileSize
+
+        # Bilinear interpolation of elevation
+        elevation = ((1-fy)*((1-fx)*float(elevation[iy,ix]) + fx*float(elevation[iy,ix+1]))
+                     + fy*((1-fx)*float(elevation[iy+1,ix]) + fx*float(elevation[iy+1,ix+1])))
+
+        # Depth is negative elevation
+        return np.array([-elevation])
+
+    # ---------------------------------------------------------
+    # Return the depths for arrays of locations
+    # ---------------------------------------------------------
+    def getDepths(self, lats, lons):
+
+        # Locate the grid cells
+        y = self.latAxis.locateMany(np.asarray(lats, dtype=float).ravel())
+        x = self.lonAxis.locateMany(np.asarray(lons, dtype=float).ravel())
+        if y is None or x is None:
+            lats, lons = np.asarray(lats, dtype=float).ravel(), np.asarray(lons, dtype=float).ravel()
+            n = np.flatnonzero(self.latAxis.outside(lats) | self.lonAxis.outside(lons))[0]
+            raise Exception("Out of range: point %d lat=%s lon=%s" % (n, lats[n], lons[n]))
+        (iy, fy), (ix, fx) = y, x
+
+        # Interpolate tile by tile
+        rows, cols = iy // self.tileSize, ix // self.tileSize
+        keys = rows*self.nCols + cols
+        depths = np.empty(len(iy))
+        for key in np.unique(keys):
+            group = (keys == key)
+            row, col = divmod(int(key), self.nCols)
+            elevation = self.getTile(row, col)
+            gy = iy[group] - row*self.tileSize
+            gx = ix[group] - col*self.tileSize
+            gfy, gfx = fy[group], fx[group]
+            depths[group] = -((1-gfy)*((1-gfx)*elevation[gy,gx] + gfx*elevation[gy,gx+1])
+                              + gfy*((1-gfx)*elevation[gy+1,gx] + gfx*elevation[gy+1,gx+1]))
+
+        return depths.reshape(np.shape(lats))
+
+# ------------------------------------------------------------
+# App Main Entry Point
+# ------------------------------------------------------------
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert a GEBCO NetCDF file into memory-mapped bathymetry tiles')
+    parser.add_argument('gebcoFile', help='GEBCO NetCDF file')
+    parser.add_argument('tileDir', nargs='?', default=None, help='tile directory (default: <gebcoFile>.tiles)')
+    parser.add_argument('--tile', type=int, default=TILE_SIZE, help='tile edge in grid points')
+    args = parser.parse_args()
+
+    tileDir = buildTiles(args.gebcoFile, args.tileDir, args.tile)
+    print('tiles written to %s' % tileDir)
@@ -0,0 +1,251 @@
+#!/usr/bin/python3
+
+##################################################################################
+# What-if branching from a mission snapshot
+#
+# Runs a mission (gliderFleet) up to a surfacing, then forks branches from that
+# point, each continuing the mission with modified parameters, e.g.
+#   [{'maxDepth': 500}, {'maxDepth': 800, 'loiterTime': 10}, {'endLat': 33.0, 'endLon': -118.2}]
+# instead of re-simulating the whole mission from launch for every branch.
+# Per-glider fleet parameters can be changed: maxDepth, pumpRate, loiterTime,
+# and the target endLat/endLon (the heading after the next loiter is steered
+# towards it).
+#
+# Branches run in worker processes forked from the paused mission (fork start
+# method), so the loaded ocean frames, bathymetry & the trajectory recorded up
+# to the fork are shared copy-on-write rather than reloaded or copied. Without
+# fork (or with workers = 1) they run one after the other in this process,
+# resetting the snapshot in between.
+#
+# The result is a tree: the root holds the trajectory prefix & the state at
+# the fork, each child the trajectory after the fork & its trip summary. An
+# unmodified 'baseline' branch is always run first, for comparison.
+#
+# Usage:
+#   python Branching.py gliderConfig.dat --at 12 --branch maxDepth=500 \
+#                       --branch maxDepth=800,loiterTime=10 --workers 4
+##################################################################################
+
+# Standard imports
+import copy
+import argparse
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+# Local imports
+from GliderFleet import gliderFleet
+from TrajectoryRecorder import trajectoryRecorder
+from Checkpoint import REBUILT
+from SweepRunner import scenarioConfig, missionTimes, parseNumber
+
+# Fleet parameters a branch may change (per glider arrays)
+BRANCH_KEYS = {'maxDepth', 'pumpRate', 'loiterTime', 'endLat', 'endLon'}
+
+# Attributes replaced in every branch rather than reset from the snapshot
+RECORDERS = {'track', 'dacs'}
+
+# Mission paused at the fork, inherited by forked workers: (fleet, endTime, snapshot, cursor)
+_trunk = None
+
+##################################################################################
+# This class is one node of a branch tree: the overrides applied at the fork,
+# the trajectory it recorded & the trip summary (one per glider) at its end
+##################################################################################
+class branchNode:
+
+    # ---------------------------------------------------------
+    # Constructor with name, overrides {key: value}, surfacing the
+    # branch forks at, summaries, arrival flags & elapsed hours
+    # per glider, & the recorded track (structured array)
+    # ---------------------------------------------------------
+    def __init__(self, name, overrides, surfacing, summaries, arrived, hours, track):
+        self.name = name
+        self.overrides = overrides
+        self.surfacing = surfacing
+        self.summaries = summaries
+        self.arrived = arrived
+        self.hours = hours
+        self.track = track
+        self.children = []
+
+    # ---------------------------------------------------------
+    # Hours from launch to arrival (None if not arrived) & total
+    # energy used (kWh) of glider i
+    # ---------------------------------------------------------
+    def arrivalHours(self, i=0):
+        return self.hours[i] if self.arrived[i] else None
+
+    def energy(self, i=0):
+        return self.summaries[i]['totalEnergy']
+
+    def child(self, name):
+        for node in self.children:
+            if node.name == name:
+                return node
+        raise KeyError(name)
+
+    # ---------------------------------------------------------
+    # Comparison of the branches of glider i against the baseline:
+    # one row per branch (name, arrival hours, energy, differences)
+    # ---------------------------------------------------------
+    def compare(self, i=0):
+        baseline = self.child('baseline')
+        rows = []
+        for node in self.children:
+            arrival = node.arrivalHours(i)
+            baseArrival = baseline.arrivalHours(i)
+            rows.append({
+                'name': node.name,
+                'arrivalHours': arrival,
+                'energy': node.energy(i), #kWh
+                'arrivalChange': arrival - baseArrival if arrival is not None and baseArrival is not None else None, #hours
+                'energyChange': node.energy(i) - baseline.energy(i), #kWh
+                'distanceToEndpoint': node.summaries[i]['distanceToEndpoint'], #meters
+            })
+        return rows
+
+    # ---------------------------------------------------------
+    # Printable tree of glider i: the fork, then one line per branch
+    # ---------------------------------------------------------
+    def format(self, i=0):
+        lines = ['%s: forked at surfacing %d, %.1f h, %.3f kWh used' % (self.name, self.surfacing, self.hours[i], self.energy(i))]
+        for row in self.compare(i):
+            arrival = 'not arrived (%.0f m to go)' % row['distanceToEndpoint'] if row['arrivalHours'] is None else 'arrives %.1f h' % row['arrivalHours']
+            change = '' if row['arrivalChange'] is None else ' (%+.1f h)' % row['arrivalChange']
+            lines.append('  +- %-30s %s%s, %.3f kWh (%+.3f)' % (row['name'], arrival, change, row['energy'], row['energyChange']))
+        return '\n'.join(lines)
+
+# ---------------------------------------------------------
+# Advance the fleet until glider i has surfaced the given number
+# of times (or is done); the fleet is paused at that surfacing
+# ---------------------------------------------------------
+def runToSurfacing(fleet, endTime, surfacing, i=0):
+    while fleet.surfaceNum[i] < surfacing and not fleet.done[i]:
+        fleet.step(endTime)
+    return fleet
+
+# ---------------------------------------------------------
+# Name of a branch from its overrides
+# ---------------------------------------------------------
+def branchName(overrides):
+    return ','.join('%s=%s' % (key, value) for key, value in overrides.items()) or 'baseline'
+
+# ---------------------------------------------------------
+# Copy of the fleet state a branch changes (everything but the
+# readers & tables & the recorders), with the ocean cursor
+# ---------------------------------------------------------
+def _snapshot(fleet):
+    state = {name: value for name, value in vars(fleet).items() if name not in REBUILT and name not in RECORDERS}
+    return copy.deepcopy(state), fleet.oceanInfo.cursor()
+
+def _reset(fleet, snapshot, cursor):
+    vars(fleet).update(copy.deepcopy(snapshot))
+    fleet.oceanInfo.seek(cursor)
+
+# ---------------------------------------------------------
+# Run one branch from the paused fleet: fresh recorders (the
+# trajectory after the fork only), overrides, then to the end
+# ---------------------------------------------------------
+def _runBranch(fleet, endTime, surfacing, overrides):
+    for key in overrides:
+        if key not in BRANCH_KEYS:
+            raise Exception('Cannot branch on %s (use one of %s)' % (key, ', '.join(sorted(BRANCH_KEYS))))
+
+    track, dacs = fleet.track, fleet.dacs
+    fleet.track = trajectoryRecorder(track.columns, width=fleet.n, every=track.every)
+    fleet.dacs = trajectoryRecorder(dacs.columns)
+    fleet.record = True
+    fleet.modes = None
+    fleet.checkpointFile = None # branches never overwrite the mission's checkpoint
+
+    for key, value in overrides.items():
+        getattr(fleet, key)[:] = value
+    fleet._recordStep()
+
+    while not fleet.done.all():
+        fleet.step(endTime)
+
+    node = _node(fleet, branchName(overrides), overrides, surfacing)
+    fleet.track, fleet.dacs = track, dacs
+    return node
+
+# ---------------------------------------------------------
+# Tree node of the fleet's current state & recorded track
+# ---------------------------------------------------------
+def _node(fleet, name, overrides, surfacing):
+    summaries = [fleet.summary(i) for i in range(fleet.n)]
+    arrived = np.array([summary['distanceToEndpoint'] < fleet.proximityToTarget for summary in summaries])
+    return branchNode(name, overrides, surfacing, summaries, arrived, (fleet.date - fleet.timeStart)/60/60, fleet.track.toArray())
+
+# ---------------------------------------------------------
+# Worker entry point: reset the inherited trunk & run a branch
+# ---------------------------------------------------------
+def _forkWorker(surfacing, overrides):
+    fleet, endTime, snapshot, cursor = _trunk
+    _reset(fleet, snapshot, cursor)
+    return _runBranch(fleet, endTime, surfacing, overrides)
+
+# ---------------------------------------------------------
+# Fork branches from a paused fleet (see runToSurfacing), one per
+# overrides dict, & return the tree (the fleet is left as it was)
+# workers: processes (default: cpu count), 1 runs in this process
+# ---------------------------------------------------------
+def forkBranches(fleet, endTime, branches, workers=None):
+    global _trunk
+
+    surfacing = int(fleet.surfaceNum[0])
+    branches = [{}] + [dict(overrides) for overrides in branches if overrides]
+    root = _node(fleet, 'trunk', {}, surfacing)
+
+    snapshot, cursor = _snapshot(fleet)
+    fork = 'fork' in multiprocessing.get_all_start_methods()
+    if workers == 1 or not fork:
+        for overrides in branches:
+            root.children.append(_runBranch(fleet, endTime, surfacing, overrides))
+            _reset(fleet, snapshot, cursor)
+        return root
+
+    # flush the recorders so forked workers inherit no unwritten rows
+    fleet.track.flush()
+    fleet.dacs.flush()
+    _trunk = (fleet, endTime, snapshot, cursor)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as executor:
+            root.children = list(executor.map(_forkWorker, [surfacing] * len(branches), branches))
+    finally:
+        _trunk = None
+
+    return root
+
+# ---------------------------------------------------------
+# Parse 'key=v,key=v' branch arguments (numbers)
+# ---------------------------------------------------------
+def parseBranch(branchArg):
+    overrides = {}
+    for item in branchArg.split(','):
+        key, value = item.split('=', 1)
+        overrides[key] = parseNumber(value)
+    return overrides
+
+# ------------------------------------------------------------
+# App Main Entry Point
+# ------------------------------------------------------------
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fork what-if branches of a glider mission at a surfacing')
+    parser.add_argument('config', help='glider config file')
+    parser.add_argument('--at', type=int, required=True, help='surfacing to fork at')
+    parser.add_argument('--branch', action='append', default=[], help='key=value,... (repeatable)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: cpu count)')
+    args = parser.parse_args()
+
+    configRead = scenarioConfig(args.config, {})
+    startTime, endTime = missionTimes(configRead)
+    fleet = gliderFleet(configRead, [[configRead.getFloat('Location/Time', 'startLat'), configRead.getFloat('Location/Time', 'startLon')]],
+                        [[configRead.getFloat('Location/Time', 'endLat'), configRead.getFloat('Location/Time', 'endLon')]], [startTime])
+
+    print('running to surfacing %d...' % args.at)
+    runToSurfacing(fleet, endTime, args.at)
+    print('running %d branches...' % (len(args.branch) + 1))
+    root = forkBranches(fleet, endTime, [parseBranch(arg) for arg in args.branch], args.workers)
+    print(root.format())
@@ -1,9 +1,32 @@
 #library imports
-from scipy import interpolate
+import numpy as np
 import csv
 
+#pumping energy table: pressure (psi), flow rate & energy per row, after a header (relative to the working directory)
+FLOW_RATE_FILE = "glidersim_v3/flowRateData.csv"
+
+#flow rate table of a config (optional flowRateFile key, FLOW_RATE_FILE by default)
+def flowRateSettings(configRead):
+    return configRead.getString('General', 'flowRateFile') if configRead.hasKey('General', 'flowRateFile') else FLOW_RATE_FILE
+
+#pumping energy per pressure, linear between the table rows (numpy, so the engine needs no scipy)
+#pressures outside the table raise ValueError, like scipy interp1d
+class energyTable:
+
+    def __init__(self, pressures, energies):
+        order = np.argsort(pressures)
+        self.pressures = np.asarray(pressures, dtype=float)[order]
+        self.energies = np.asarray(energies, dtype=float)[order]
+
+    def __call__(self, pressure):
+        pressure = np.asarray(pressure, dtype=float)
+        if np.any(pressure < self.pressures[0]) or np.any(pressure > self.pressures[-1]):
+            raise ValueError('pressure outside the energy table (%s to %s)' % (self.pressures[0], self.pressures[-1]))
+
+        return np.interp(pressure, self.pressures, self.energies)
+
 class buoyancyEngine:
-    def __init__(self, startingOil, totDisplacement, buoyancyMin, buoyancyMax, pumpingPeriod, totBatteryPower, pumpRate):
+    def __init__(self, startingOil, totDisplacement, buoyancyMin, buoyancyMax, pumpingPeriod, totBatteryPower, pumpRate, flowRateFile=FLOW_RATE_FILE):
         self.totDisplacement = totDisplacement #in cc's
         self.minOil = buoyancyMin #in cc's
         self.maxOil = buoyancyMax #in cc's
@@ -19,7 +42,7 @@ class buoyancyEngine:
         
         pressures = []
         energies = []
-        with open("glidersim_v3/flowRateData.csv", "r") as file:
+        with open(flowRateFile, "r") as file:
             csvreader = csv.reader(file)
     
             csvreader.__next__() #gets past header
@@ -28,7 +51,7 @@ class buoyancyEngine:
                 pressures.append(float(row[0]))
                 energies.append(float(row[2]))
         
-        self.energyUsed = interpolate.interp1d(pressures, energies) #interpolates energy usage per pressure
+        self.energyUsed = energyTable(pressures, energies) #interpolates energy usage per pressure
 
 
     def inflateBalloon(self, depth): #ascend maneuver (up from depth limit) --- 0%->100%
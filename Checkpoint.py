@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+
+##################################################################################
+# Checkpoint & resume of glider / fleet missions
+#
+# A checkpoint is a pickle of the simulation state: every attribute of the
+# glider (or fleet), nested objects such as the buoyancy engine, the recorded
+# trajectory (trajectoryRecorder.checkpoint) & the ocean frame cursor
+# (oceanData.cursor). Readers, indexes & tables (ocean data, bathymetry, polar,
+# pumping energy table) are not saved: they are rebuilt from the config by the
+# constructor, & the state is then restored into the new object, so a resumed
+# run continues bit-for-bit.
+#
+# Checkpoints are written atomically (temporary file, fsync, rename), so a run
+# killed while writing one leaves the previous checkpoint intact.
+#
+# Config ([General], optional; no checkpoints without checkpointFile):
+#   checkpointFile = mission.ckpt   # checkpoint path
+#   checkpointHours = 24            # simulated hours between checkpoints (default 24)
+#
+# Resume: python GlidePath.py --resume
+##################################################################################
+
+# Standard imports
+import os
+import pickle
+
+# Attributes rebuilt from the config when resuming (never saved)
+REBUILT = {'oceanInfo', 'bathyreader', 'floorIndex', 'polar', 'energyUsed'}
+
+# Default simulated hours between checkpoints
+CHECKPOINT_HOURS = 24
+
+# ---------------------------------------------------------
+# Checkpoint settings from the config: (checkpointFile, hours)
+# checkpointFile is None when checkpoints are not configured
+# ---------------------------------------------------------
+def checkpointSettings(configRead):
+    checkpointFile = configRead.getString('General', 'checkpointFile') if configRead.hasKey('General', 'checkpointFile') else None
+    hours = configRead.getFloat('General', 'checkpointHours') if configRead.hasKey('General', 'checkpointHours') else CHECKPOINT_HOURS
+
+    return checkpointFile, hours
+
+# ---------------------------------------------------------
+# State of an object: its attributes, except the rebuilt ones;
+# recorders save their own state & nested objects are captured
+# ---------------------------------------------------------
+def captureState(obj):
+    state = {}
+    for name, value in vars(obj).items():
+        if name in REBUILT:
+            continue
+        if hasattr(value, 'checkpoint'):
+            state[name] = value.checkpoint()
+        elif hasattr(value, '__dict__'):
+            state[name] = captureState(value)
+        else:
+            state[name] = value
+    return state
+
+# ---------------------------------------------------------
+# Restore a captured state into an object built from the same config
+# ---------------------------------------------------------
+def restoreState(obj, state):
+    for name, value in state.items():
+        current = getattr(obj, name, None)
+        if hasattr(current, 'restore'):
+            current.restore(value)
+        elif hasattr(current, '__dict__'):
+            restoreState(current, value)
+        else:
+            setattr(obj, name, value)
+
+# ---------------------------------------------------------
+# Write a state to fileName atomically
+# ---------------------------------------------------------
+def saveCheckpoint(fileName, state):
+    tmpFile = '%s.%d.tmp' % (fileName, os.getpid())
+    with open(tmpFile, 'wb') as file:
+        pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmpFile, fileName)
+
+# ---------------------------------------------------------
+# Read the state saved in fileName, None if there is none
+# ---------------------------------------------------------
+def loadCheckpoint(fileName):
+    if not os.path.exists(fileName):
+        return None
+    with open(fileName, 'rb') as file:
+        return pickle.load(file)
@@ -144,4 +144,35 @@ class configReader_v2:
             # Return error if unable to convert value to integer
             except: 
                 print('ERROR: unable to convert string %s to integer value'%str)
-                return None
\ No newline at end of file
+                return None
+
+    # --------------------------------------------------------------
+    # Set value associated with specified section & key
+    # (overrides the file value for this reader only)
+    # --------------------------------------------------------------
+    def setValue(self,section,key,value):
+
+        if not self.config.has_section(section):
+            self.config.add_section(section)
+
+        self.config[section][key] = str(value)
+
+    # --------------------------------------------------------------
+    # Find the section that holds the specified key
+    # --------------------------------------------------------------
+    def findSection(self,key):
+
+        for section in self.config.sections():
+            if key in self.config[section]:
+                return section
+
+        print('ERROR: key %s not found in any section'%key)
+        return None
+
+    # --------------------------------------------------------------
+    # Check if the specified section & key exist (no ERROR printed,
+    # for optional keys)
+    # --------------------------------------------------------------
+    def hasKey(self,section,key):
+
+        return self.config.has_section(section) and key in self.config[section]
@@ -1,28 +1,35 @@
 #libary imports
+#(plotting & kml libraries are imported where they are used, so importing this module
+#to run missions (runMission) stays light - see benchmarks/ImportTimeBudget.py)
+import argparse
 import seawater as sw
 import numpy as np
 from datetime import datetime, timezone, timedelta
 import csv
-import simplekml
-from scipy import interpolate
-import matplotlib.pyplot as plt
 
 #class imports
 from OceanData import oceanData  #reads NETCDFs for currents
 from NavUtils import bearing, projectPositionXY, distance  #contains mathematic functions including conversioin XY <-> lat/lon
 import BathyReader  #interpolates depth from gebco
+from BathyIndex import indexFor  #skips floor checks in deep water
 #CHECK THIS - CHANGED FOR HOVER??
-from BuoyancyEngine import buoyancyEngine #operated mechanism that changes teh glider's buoyancy
+from BuoyancyEngine import buoyancyEngine, flowRateSettings #operated mechanism that changes teh glider's buoyancy
 from ConfigReader_v2 import configReader_v2  #reads config file
 #MAKE ENERGY DIAGRAM
 #from EnergyGrapher import grapher  #graphs energy used over time
-from PhiSpeeds import speedCalc
-from glidePathGraph import plotter
+from PhiSpeeds import polarFor
+from StepControl import stepSettings, stepLimit, eventStep, eventDepth, NO_EVENT, SURFACE  #event-driven step lengths
+from Integrators import integratorSettings, integrate  #euler, midpoint, rk4 or rk45 glide steps
+from TrajectoryRecorder import trajectoryRecorder, recordEvery  #columnar history of the run
+from TrajectoryWriter import outputSettings, openWriter  #streams the history to csv / netcdf while running
+from Checkpoint import checkpointSettings, captureState, restoreState, saveCheckpoint, loadCheckpoint  #periodic state snapshots & resume
+from Instrumentation import instrumentSettings, instrumented  #opt-in hot-path timers, cProfile & tracemalloc
 
 
 class glider:
     
-    def __init__(self, startPoint, endPoint, startDate):
+    #configRead: loaded config (configReader_v2); oceanInfo & bathyreader may be supplied to share already loaded data
+    def __init__(self, configRead, startPoint, endPoint, startDate, oceanInfo=None, bathyreader=None):
                 
         self.speed = 0
         maxPitchDegrees = configRead.getInt('Glider', 'maxPitchAngle') 
@@ -34,10 +41,15 @@ class glider:
         self.bearing = bearing(startPoint[0], startPoint[1], endPoint[0], endPoint[1]) #great circle bearing in degrees from North
         self.proximityToTarget = configRead.getInt('General', 'proximityToTarget')
 
-        HYCOMFileDirectory = configRead.getString('General', 'HYCOMFileDirectory') #folder that has netcdf files
-        self.oceanInfo = oceanData(HYCOMFileDirectory)
+        if oceanInfo is None:
+            HYCOMFileDirectory = configRead.getString('General', 'HYCOMFileDirectory') #folder that has netcdf files
+            oceanInfo = oceanData(HYCOMFileDirectory)
+        self.oceanInfo = oceanInfo
         
-        self.bathyreader = BathyReader.bathymetryReader(configRead.getString('General', 'gebcoFile')) #download from link above
+        if bathyreader is None:
+            bathyreader = BathyReader.openBathymetry(configRead.getString('General', 'gebcoFile')) #download from link above
+        self.bathyreader = bathyreader
+        self.floorIndex = indexFor(self.bathyreader)
 
         self.depth = 0 #meters from ocean surface
         self.maxDepth = configRead.getInt('Glider', 'maxDepth')
@@ -48,6 +60,8 @@ class glider:
         self.interval = configRead.getInt('General', 'interval') #size of timestep used in this simulation (in this case, 60 seconds)
         self.loiterTime = configRead.getInt('General', 'loiterTime') #number of minutes glider spends at surface without trying to move
         self.UTCOffset = configRead.getInt('Location/Time', 'UTCOffset')
+        self.adaptive, self.maxInterval, self.stepTolerance = stepSettings(configRead, self.interval) #adaptive glide steps (optional, off by default)
+        self.integrator, self.tolerance = integratorSettings(configRead) #integration method (optional, euler by default)
         
         startingOil = configRead.getInt('Glider', 'startingOil')
         totDisplacement = configRead.getInt('General', 'totDisplacement')
@@ -62,7 +76,7 @@ class glider:
         self.gliderVolume = configRead.getInt('General', 'gliderVolume')
         self.neutralState = self.rhoR * (self.gliderVolume/(10^6))
         
-        self.buoyancyengine = buoyancyEngine(startingOil, totDisplacement, buoyancyMin, buoyancyMax, pumpingPeriod, totBatteryPower, pumpRate)
+        self.buoyancyengine = buoyancyEngine(startingOil, totDisplacement, buoyancyMin, buoyancyMax, pumpingPeriod, totBatteryPower, pumpRate, flowRateSettings(configRead))
         
         self.hotelLoad = configRead.getInt('General', 'hotelLoad') #in Watts
         self.hotelLoadUsed = 0
@@ -71,25 +85,15 @@ class glider:
         clB =  configRead.getFloat('Glider', 'clB')
         cdA = configRead.getFloat('Glider', 'cdA')
         cdB = configRead.getFloat('Glider', 'cdB')
-        phis, vxs, vzs = speedCalc(clA, clB, cdA, cdB)
-    
-        self.xVelPartInterp = interpolate.interp1d(phis, vxs)
-        self.zVelPartInterp = interpolate.interp1d(phis, vzs)
+        self.polar = polarFor(clA, clB, cdA, cdB) #pitch -> speed factors, shared by identical gliders
         self.phiCurr = 0
         
-        self.salPrev = [0]
-        self.tempPrev = [0]
-        self.northPrev = [0]
-        self.eastPrev = [0]
+        self.salPrev = 0
+        self.tempPrev = 0
+        self.northPrev = 0
+        self.eastPrev = 0
         
         #initializing values and arrays
-        self.times = [0] #in minutes
-        self.lats = [self.lat] #where the glider actually is underwater
-        self.lons = [self.lon]
-        self.depths = [0] #distance (meters) from ocean surface
-        self.energies = [self.buoyancyengine.batteryPower]
-        self.buoyancyStates = [self.buoyancyengine.oilInBalloon]
-        self.pitchAngles = [self.phiCurr]
         self.betweenSurfaceTimes = []
 
         self.surfaceNum = 0 #number of times glider surfaces - equal to number of dives
@@ -103,16 +107,11 @@ class glider:
         self.destDist = 0
         self.tripTime = 0
         
-        self.speeds = []
-        self.bearings = [] #great circle bearing
-
         self.totalDistX = 0 #total distance (meters) traveled
         self.totalDistY = 0
 
         self.lat_nocurrents = self.lat #tracks where the glider would surface if there were no currents
         self.lon_nocurrents = self.lon
-        self.noCurrLats = []
-        self.noCurrLons = []
         self.dac_north = [] #depth_averaged northing currents
         self.dac_east = []
 
@@ -123,6 +122,28 @@ class glider:
         
         self.done = False
         
+        #history: times (minutes), where the glider actually is underwater, depth (meters from ocean surface), energy,
+        #speed, great circle bearing, buoyancy state, pitch & where it would be without currents
+        #(every recordEvery-th step & every change of mode)
+        #& depth-averaged currents per surfacing; both streamed to outputFile when configured
+        trackColumns = ['times', 'lats', 'lons', 'depths', 'energies', 'speeds', 'bearings',
+                        'buoyancyStates', 'pitchAngles', 'noCurrLats', 'noCurrLons']
+        dacColumns = ['times', 'lats', 'lons', 'dac_east', 'dac_north']
+        outputFile, outputFormat, flushRows = outputSettings(configRead)
+        trackWriter = dacWriter = None
+        if outputFile is not None:
+            trackWriter = openWriter(outputFile + '_track', trackColumns, None, outputFormat)
+            dacWriter = openWriter(outputFile + '_dac', dacColumns, None, outputFormat)
+        self.track = trajectoryRecorder(trackColumns, every=recordEvery(configRead), writer=trackWriter, flushRows=flushRows)
+        self.dacs = trajectoryRecorder(dacColumns, writer=dacWriter, flushRows=1) #surfacings are rare: written as they happen
+        self.modes = None
+        self.recordStep()
+        
+        #checkpoints every checkpointHours simulated hours (when configured)
+        self.checkpointFile, checkpointHours = checkpointSettings(configRead)
+        self.checkpointInterval = timedelta(hours=checkpointHours)
+        self.nextCheckpoint = startDate + self.checkpointInterval
+        
     def update(self, endTime):
         
         timeStep = self.interval
@@ -137,31 +158,21 @@ class glider:
         #loitering (beginning, end, or in between cycles)
         elif self.loitering: #loiters at beginning, end, and whenever it surfaces
             
-            for n in range(self.loiterTime):
+            #drift with the surface currents for loiterTime minutes
+            northing1, easting1 = self.drift(self.loiterTime * 60)
             
-                #find currents from HYCOM
-                easting1, northing1 = self.oceanInfo.currents(self.date.replace(tzinfo=timezone(timedelta(hours=self.UTCOffset))).timestamp(), self.depth, self.lat, self.lon) #meters/second
-                
-                #CHECK CURRENTS
-                if abs(easting1[0]) > 10 or abs(northing1[0]) > 10:
-                    easting1 = self.eastPrev
-                    northing1 = self.northPrev
-                else:
-                    self.eastingPrev = easting1
-                    self.northingPrev = northing1
-                
-                #update position
-                self.lat, self.lon = projectPositionXY(self.lat, self.lon, northing1[0] * 60, easting1[0] * 60)
-                
-                #calculate total distance traveled (m)
-                self.totalDistX += abs(easting1[0]) * 60
-                self.totalDistY += abs(northing1[0]) * 60
-                
-                self.lat_nocurrents = self.lat
-                self.lon_nocurrents = self.lon
+            #update position
+            self.lat, self.lon = projectPositionXY(self.lat, self.lon, northing1, easting1)
+            
+            #calculate total distance traveled (m)
+            self.totalDistX += abs(easting1)
+            self.totalDistY += abs(northing1)
+            
+            self.lat_nocurrents = self.lat
+            self.lon_nocurrents = self.lon
 
-                #update glider heading when it surfaces
-                self.bearing = bearing(self.lat, self.lon, self.endPoint[0], self.endPoint[1])
+            #update glider heading when it surfaces
+            self.bearing = bearing(self.lat, self.lon, self.endPoint[0], self.endPoint[1])
             
             self.loitering = False
             self.starting = True
@@ -198,21 +209,52 @@ class glider:
             if (turned):
                 timeStep = self.buoyancyengine.pumpingPeriod
             
-            salinity, temp = self.oceanInfo.salAndTemp(self.date.replace(tzinfo=timezone(timedelta(hours=self.UTCOffset))).timestamp(), self.depth, self.lat, self.lon)
+            #currents, salinity, temperature and density (precomputed EOS-80 field) from one ocean query
+            easting, northing, salinity, temp, densCurr = self.oceanInfo.sampleWithDensity(self.date.replace(tzinfo=timezone(timedelta(hours=self.UTCOffset))).timestamp(), self.depth, self.lat, self.lon)
             
-            if(abs(salinity[0]) > 35 or abs(salinity[0]) < 33 or abs(temp[0]) > 20 or abs(temp[0]) < 3):
+            if(abs(salinity) > 35 or abs(salinity) < 33 or abs(temp) > 20 or abs(temp) < 3):
                 salinity = self.salPrev
                 temp = self.tempPrev
+                densCurr = sw.dens(salinity, temp, self.depth*1.45038*0.689476)
             else:
                 self.salPrev = salinity
                 self.tempPrev = temp
             
-            densCurr = sw.dens(salinity[0], temp[0], self.depth*1.45038*0.689476)
             33.2, 34.5
             if abs(densCurr - 1015) <= 1:
-                print(temp[0])
+                print(temp)
             
-            vertical_velocity = self.velocity(timeStep, densCurr)
+            latStart, lonStart, depthStart = self.lat, self.lon, self.depth
+            vertical_velocity, eastingV, northingV, easting, northing = self.glideVelocity(densCurr, easting, northing)
+            event = NO_EVENT
+            if self.adaptive and not turned:
+                #steady glide: step straight to the next surface / depth limit crossing (capped at maxInterval),
+                #corrected with the velocity at the end of the step & shortened where it changes too much
+                k1 = np.array([[northingV + northing], [eastingV + easting], [vertical_velocity], [northingV], [eastingV]])
+                still = vertical_velocity == 0 and eastingV == 0 and northingV == 0
+                y = np.array([[0], [0], [self.depth], [0], [0]], dtype=float)
+                maxInterval = stepLimit(self.maxInterval, self.oceanInfo.framesLeft(self.date.replace(tzinfo=timezone(timedelta(hours=self.UTCOffset))).timestamp()))
+                timeStep, event, velocity = eventStep(self.glideRates(still), y, k1, self.maxDepth, self.interval, maxInterval, self.stepTolerance)
+                timeStep, event = float(timeStep[0]), int(event[0])
+                if self.integrator == 'euler':
+                    #move at the average velocity over the step
+                    northingV, eastingV = velocity[3,0], velocity[4,0]
+                    vertical_velocity, northing, easting = velocity[2,0], velocity[0,0] - northingV, velocity[1,0] - eastingV
+                
+                #cut the step where it first reaches the seafloor
+                latEnd, lonEnd = projectPositionXY(self.lat, self.lon, (northingV + northing) * timeStep, (eastingV + easting) * timeStep)
+                fraction = self.floorIndex.contactFraction(self.lat, self.lon, self.depth, latEnd, lonEnd, self.depth + vertical_velocity * timeStep)
+                if fraction is not None and fraction < 1:
+                    timeStep *= fraction
+                    event = NO_EVENT
+            
+            if self.integrator == 'euler':
+                self.move(timeStep, vertical_velocity, eastingV, northingV, easting, northing)
+            else:
+                self.integrateMove(timeStep, vertical_velocity, eastingV, northingV, easting, northing)
+            
+            if self.adaptive:
+                self.depth = float(eventDepth(self.depth, event, self.maxDepth))
             
             
             #check if glider has hit depth limit --> should start ascending
@@ -225,13 +267,18 @@ class glider:
                 #update number of times glider surfaces (to be printed to console after simulation ends)
                 self.surfaceNum += 1
 
-                #interpolate back in time to when the glider actually reached the surface (could be above the surface - could interpolate back to lat and lon too?)
-                time1 = np.interp(0, [self.depth - vertical_velocity*timeStep, self.depth], [self.date.timestamp(), (self.date + timedelta(seconds=timeStep)).timestamp()])
-                self.date = datetime.fromtimestamp(time1)
-                self.depth = 0
-                #self.speed = 0
+                if event == SURFACE:
+                    #adaptive step ended exactly on the surface
+                    self.date += timedelta(seconds=timeStep)
+                    timeStep = 0
+                else:
+                    #interpolate back in time to when the glider actually reached the surface (could be above the surface - could interpolate back to lat and lon too?)
+                    time1 = np.interp(0, [self.depth - vertical_velocity*timeStep, self.depth], [self.date.timestamp(), (self.date + timedelta(seconds=timeStep)).timestamp()])
+                    self.date = datetime.fromtimestamp(time1)
+                    self.depth = 0
+                    #self.speed = 0
                     
-                timeStep = time1 - self.date.timestamp()
+                    timeStep = time1 - self.date.timestamp()
 
                 #update location for kml file
                 self.reachSurfaceLat.append(self.lat)
@@ -247,6 +294,8 @@ class glider:
                 diveTime = int((self.date - self.timeStartIteration).total_seconds())
                 self.dac_north.append(difference * np.cos(angle) / diveTime)
                 self.dac_east.append(difference * np.sin(angle) / diveTime)
+                self.dacs.record(True, times=(self.date.timestamp() - self.timeStart.timestamp())/60, lats=self.lat, lons=self.lon,
+                                 dac_east=self.dac_east[-1], dac_north=self.dac_north[-1])
                 
                 self.betweenSurfaceTimes.append(diveTime/60)
                 
@@ -264,13 +313,14 @@ class glider:
                 
                 self.timeStartIteration = self.date #reset for next iteration
                 
-            #check if glider hits ocean floor --> bounce off
-            oceanFloor = self.bathyreader.getDepth(self.lat, self.lon)
-            if (oceanFloor[0] - self.depth <= 0):
+            #check if glider hits ocean floor anywhere along this step --> bounce off
+            #(floor only interpolated when the min-depth index finds seafloor within reach)
+            oceanFloor = self.floorIndex.contact(latStart, lonStart, depthStart, self.lat, self.lon, self.depth)
+            if oceanFloor is not None:
                 
                 if not self.onFloor:
                     print('Bounced off ocean floor')
-                    self.depth = oceanFloor[0]
+                    self.depth = min(self.depth, oceanFloor)
                     self.onFloor = True
                     
                     '''#linear interpolation of time from depth
@@ -291,38 +341,65 @@ class glider:
         self.date += timedelta(seconds=timeStep)
         
         #updating important quantities
-        self.times.append((((self.date).timestamp() - self.timeStart.timestamp())/60)) #in minutes
-        self.lons.append(self.lon)
-        self.lats.append(self.lat) 
-        self.depths.append(self.depth)
-        self.energies.append(self.buoyancyengine.batteryPower)      
-        self.speeds.append(self.speed)
-        self.bearings.append(self.bearing)
-        self.buoyancyStates.append(self.buoyancyengine.oilInBalloon)
-        self.pitchAngles.append(self.phiCurr)
-        self.noCurrLats.append(self.lat_nocurrents)
-        self.noCurrLons.append(self.lon_nocurrents)
-        
-        
-    def velocity(self, timeStep, densCurr):
-            
-        halfDens = self.buoyancyengine.totDisplacement/2
-                
-        dV = self.buoyancyengine.oilInBalloon - halfDens
-        #negative if moving toward surface (negative depth)
-        Fbuo = 9.8 * (self.rhoR*self.gliderVolume*(10**-6) - densCurr*(self.gliderVolume+dV)*(10**-6))
-        Fmax = 9.8 * (self.rhoR*self.gliderVolume*(10**-6) - densCurr*(self.gliderVolume+(self.buoyancyengine.minOil-halfDens))*(10**-6))
+        self.recordStep()
         
-        self.phiCurr = (self.maxPitchRadians/Fmax)*Fbuo
-                
-        factor = 1
-        if (Fbuo < 0): #diving is positive depth direction
-            factor = -1
-                
-        #separate total glider velocity into vertical speed (up/down) and lateral speed (x and y axes)
-        multiplier = np.sqrt(2*abs(Fbuo/densCurr))
-        vertical_velocity = factor * multiplier * self.zVelPartInterp(abs(self.phiCurr)) #m/s
-        lateral_velocity = multiplier * self.xVelPartInterp(abs(self.phiCurr))
+        #write what is left of the history
+        if self.done:
+            self.track.close()
+            self.dacs.close()
+        
+        #save the state every checkpointInterval of simulated time
+        elif self.checkpointFile is not None and self.date >= self.nextCheckpoint:
+            while self.nextCheckpoint <= self.date:
+                self.nextCheckpoint += self.checkpointInterval
+            self.saveCheckpoint()
+        
+    #write the full simulation state to the checkpoint file (Checkpoint.py)
+    def saveCheckpoint(self):
+        
+        state = captureState(self)
+        state['oceanCursor'] = self.oceanInfo.cursor()
+        saveCheckpoint(self.checkpointFile, state)
+        
+    #continue from a checkpoint state (glider built from the same config)
+    def restoreCheckpoint(self, state):
+        
+        state = dict(state)
+        self.oceanInfo.seek(state.pop('oceanCursor'))
+        restoreState(self, state)
+        
+    #trip summary (the values printed at the end of a run, as gliderFleet.summary)
+    def summary(self):
+        
+        hotUse = self.hotelLoadUsed
+        propUse = self.buoyancyengine.propulsionPowerUsed
+        return {
+            'tripTime': self.tripTime, #minutes
+            'distance': self.destDist, #meters
+            'timesSurfaced': self.surfaceNum,
+            'hotelEnergy': hotUse, #kWh
+            'propulsionEnergy': propUse, #kWh
+            'totalEnergy': hotUse + propUse, #kWh
+            'averageDiveTime': np.average(self.betweenSurfaceTimes) if self.betweenSurfaceTimes else np.nan, #minutes
+            'distanceToEndpoint': distance(self.lat, self.lon, self.endPoint[0], self.endPoint[1]), #meters
+        }
+        
+    #record the current state in the track (always kept when the glider changed mode)
+    def recordStep(self):
+        
+        modes = (self.diving, self.loitering, self.onFloor, self.done, self.surfaceNum)
+        event = modes != self.modes
+        self.modes = modes
+        
+        self.track.record(event, times=((self.date).timestamp() - self.timeStart.timestamp())/60, #in minutes
+                          lats=self.lat, lons=self.lon, depths=self.depth, energies=self.buoyancyengine.batteryPower,
+                          speeds=self.speed, bearings=self.bearing, buoyancyStates=self.buoyancyengine.oilInBalloon,
+                          pitchAngles=self.phiCurr, noCurrLats=self.lat_nocurrents, noCurrLons=self.lon_nocurrents)
+        
+    #glider velocity (vertical, thru-water northing & easting) & checked ocean currents for the current state
+    def glideVelocity(self, densCurr, easting, northing):
+        
+        self.phiCurr, Fbuo, vertical_velocity, lateral_velocity = self.buoyancyVelocity(densCurr)
         
         #if on surface, should not go up more
         if self.depth <= 0 and Fbuo < 0:
@@ -348,11 +425,10 @@ class glider:
             self.diving = True'''
                     
                 
-        #split lateral velocity into northing and easting (thru-water speed) and add ocean currents
-        easting, northing = self.oceanInfo.currents(self.date.replace(tzinfo=timezone(timedelta(hours=self.UTCOffset))).timestamp(), self.depth, self.lat, self.lon) #meters/second
+        #split lateral velocity into northing and easting (thru-water speed) and add ocean currents (meters/second, sampled by update)
         
         #CHECK CURRENTS
-        if abs(easting[0]) > 10 or abs(northing[0]) > 10:
+        if abs(easting) > 10 or abs(northing) > 10:
             easting = self.eastPrev
             northing = self.northPrev
         else:
@@ -361,187 +437,359 @@ class glider:
                 
         eastingV = lateral_velocity * np.sin(self.bearing * np.pi / 180)
         northingV = lateral_velocity * np.cos(self.bearing * np.pi / 180)
+        
+        return vertical_velocity, eastingV, northingV, easting, northing
+        
+    #pitch, buoyancy force & glide velocity (vertical, lateral) in water of density densCurr
+    def buoyancyVelocity(self, densCurr):
+            
+        halfDens = self.buoyancyengine.totDisplacement/2
+                
+        dV = self.buoyancyengine.oilInBalloon - halfDens
+        #negative if moving toward surface (negative depth)
+        Fbuo = 9.8 * (self.rhoR*self.gliderVolume*(10**-6) - densCurr*(self.gliderVolume+dV)*(10**-6))
+        Fmax = 9.8 * (self.rhoR*self.gliderVolume*(10**-6) - densCurr*(self.gliderVolume+(self.buoyancyengine.minOil-halfDens))*(10**-6))
+        
+        phiCurr = (self.maxPitchRadians/Fmax)*Fbuo
+                
+        factor = 1
+        if (Fbuo < 0): #diving is positive depth direction
+            factor = -1
+                
+        #separate total glider velocity into vertical speed (up/down) and lateral speed (x and y axes)
+        multiplier = np.sqrt(2*abs(Fbuo/densCurr))
+        xVelPart, zVelPart = self.polar.lookup(abs(phiCurr))
+        vertical_velocity = factor * multiplier * zVelPart #m/s
+        lateral_velocity = multiplier * xVelPart
+        
+        return phiCurr, Fbuo, vertical_velocity, lateral_velocity
+        
+    #advance the glider timeStep seconds at constant velocity
+    def move(self, timeStep, vertical_velocity, eastingV, northingV, easting, northing):
 
         #update location & depth
         self.depth += vertical_velocity * timeStep
-        self.lat, self.lon = projectPositionXY(self.lat, self.lon, (northingV + northing[0]) * timeStep, (eastingV + easting[0]) * timeStep) 
+        self.lat, self.lon = projectPositionXY(self.lat, self.lon, (northingV + northing) * timeStep, (eastingV + easting) * timeStep) 
 
         #calculate total distance traveled (m)
-        self.totalDistX += abs(eastingV + easting[0]) * timeStep
-        self.totalDistY += abs(northingV + northing[0]) * timeStep
+        self.totalDistX += abs(eastingV + easting) * timeStep
+        self.totalDistY += abs(northingV + northing) * timeStep
         
-        self.destDist += np.sqrt((abs(eastingV + easting[0]) * timeStep)**2 + (abs(northingV + northing[0]) * timeStep)**2)
+        self.destDist += np.sqrt((abs(eastingV + easting) * timeStep)**2 + (abs(northingV + northing) * timeStep)**2)
         self.tripTime += (timeStep)/60
 
         #calculate hypothetical location of glider if ocean currents didn't exist
         self.lat_nocurrents, self.lon_nocurrents = projectPositionXY(self.lat_nocurrents, self.lon_nocurrents, northingV * timeStep, eastingV * timeStep)
         
-        return vertical_velocity
+    #advance the glider timeStep seconds with the configured integrator (Integrators.py),
+    #starting from the velocity computed by glideVelocity & sampling the ocean once per further stage
+    def integrateMove(self, timeStep, vertical_velocity, eastingV, northingV, easting, northing):
+        
+        still = vertical_velocity == 0 and eastingV == 0 and northingV == 0 #held at the surface or on the floor
+        k1 = np.array([[northingV + northing], [eastingV + easting], [vertical_velocity], [northingV], [eastingV]])
+        y = integrate(self.integrator, self.glideRates(still), np.array([[0], [0], [self.depth], [0], [0]], dtype=float), [timeStep], k1, self.tolerance)[:,0]
+        north, east, depth, northV, eastV = y.tolist()
+        
+        #update location & depth
+        self.depth = depth
+        self.lat, self.lon = projectPositionXY(self.lat, self.lon, north, east)
+        
+        #calculate total distance traveled (m)
+        self.totalDistX += abs(east)
+        self.totalDistY += abs(north)
+        
+        self.destDist += np.sqrt(east**2 + north**2)
+        self.tripTime += (timeStep)/60
+        
+        #calculate hypothetical location of glider if ocean currents didn't exist
+        self.lat_nocurrents, self.lon_nocurrents = projectPositionXY(self.lat_nocurrents, self.lon_nocurrents, northV, eastV)
+        
+    #rates(select, offset, y) of the integrated state from the current position & time (Integrators.py, StepControl.py)
+    def glideRates(self, still):
+        
+        latStart, lonStart = self.lat, self.lon
+        timeStart = self.date.replace(tzinfo=timezone(timedelta(hours=self.UTCOffset))).timestamp()
+        
+        def rates(select, offset, y):
+            lat, lon = projectPositionXY(latStart, lonStart, y[0,0], y[1,0])
+            return self.stageRates(timeStart + offset[0], y[2,0], lat, lon, still)[:,None]
+        
+        return rates
+        
+    #northing & easting displacement (m) of surface drift with the currents for duration seconds,
+    #in error controlled rk45 steps (currents sampled at the loiter start time, along the drift path)
+    def drift(self, duration):
+        
+        latStart, lonStart = self.lat, self.lon
+        t = self.date.replace(tzinfo=timezone(timedelta(hours=self.UTCOffset))).timestamp()
+        
+        def rates(select, offset, y):
+            lat, lon = projectPositionXY(latStart, lonStart, y[0,0], y[1,0])
+            
+            #find currents from HYCOM
+            easting1, northing1, _, _ = self.oceanInfo.sample(t, self.depth, lat, lon) #meters/second
+            
+            #CHECK CURRENTS
+            if abs(easting1) > 10 or abs(northing1) > 10:
+                easting1 = self.eastPrev
+                northing1 = self.northPrev
+            
+            return np.array([[northing1], [easting1]])
+        
+        y = np.zeros((2, 1))
+        north, east = integrate('rk45', rates, y, [duration], rates(None, np.zeros(1), y), self.tolerance)[:,0]
+        
+        return north, east
+        
+    #rate of the integrated state (north, east, depth, thru-water north & east) at ocean time t, with one ocean query
+    def stageRates(self, t, depth, lat, lon, still):
+        
+        easting, northing, salinity, temp, densCurr = self.oceanInfo.sampleWithDensity(t, max(depth, 0), lat, lon)
+        if(abs(salinity) > 35 or abs(salinity) < 33 or abs(temp) > 20 or abs(temp) < 3):
+            densCurr = sw.dens(self.salPrev, self.tempPrev, depth*1.45038*0.689476)
+        
+        vertical_velocity, lateral_velocity = self.buoyancyVelocity(densCurr)[2:]
+        if still:
+            vertical_velocity = lateral_velocity = 0
+        
+        #CHECK CURRENTS
+        if abs(easting) > 10 or abs(northing) > 10:
+            easting = self.eastPrev
+            northing = self.northPrev
+        
+        eastingV = lateral_velocity * np.sin(self.bearing * np.pi / 180)
+        northingV = lateral_velocity * np.cos(self.bearing * np.pi / 180)
+        
+        return np.array([northingV + northing, eastingV + easting, vertical_velocity, northingV, eastingV])
         
         
 
 ######################################################
-#START OF PROGRAM
+#MISSION API
 ######################################################
-print('running gliders...')
-
-configRead = configReader_v2()
-configRead.loadFile('SoCalData+Sim/gliderConfig.dat')
-
-#setting start and end times of simulation
-startYear = configRead.getInt('Location/Time', 'startYear')
-startMonth = configRead.getInt('Location/Time', 'startMonth')
-startDay = configRead.getInt('Location/Time', 'startDate')
-startHour = configRead.getInt('Location/Time', 'startHour')
-
-startTime = datetime(startYear, startMonth, startDay, startHour, 0, 0)
-
-endYear = configRead.getInt('Location/Time', 'endYear')
-endMonth = configRead.getInt('Location/Time', 'endMonth')
-endDay = configRead.getInt('Location/Time', 'endDay')
-endHour = configRead.getInt('Location/Time', 'endHour')
 
-endTime = datetime(endYear, endMonth, endDay, endHour, 0, 0)
-
-#setting up lat/lon box of travel
-minLat = configRead.getFloat('Location/Time', 'minLat')
-maxLat = configRead.getFloat('Location/Time', 'maxLat')
-minLon = configRead.getFloat('Location/Time', 'minLon')
-maxLon = configRead.getFloat('Location/Time', 'maxLon')
-
-#setting start positions of glider 1
-startLat = configRead.getFloat('Location/Time', 'startLat')
-startLon = configRead.getFloat('Location/Time', 'startLon')
-endLat = configRead.getFloat('Location/Time', 'endLat')
-endLon = configRead.getFloat('Location/Time', 'endLon')
+#result of a mission run: the trip summary (glider.summary), the glider itself
+#(surfacing records & checkpoint settings), its recorded track & depth-averaged currents
+class missionResult:
+    
+    def __init__(self, glider1, resumed=False, instrumentation=None):
+        
+        self.glider = glider1
+        self.summary = glider1.summary()
+        self.track = glider1.track
+        self.dacs = glider1.dacs
+        self.resumed = resumed #continued from a checkpoint
+        self.instrumentation = instrumentation #Instrumentation.instrumented stats when instrumented, else None
+        
+    #printable summary, as the command line prints it
+    def format(self):
+        
+        s = self.summary
+        lines = ['#################################',
+                 '  Time of trip to destination: %.2f minutes' % (s['tripTime']),
+                 '  Distance of trip to destination: %.2f meters' % (s['distance']),
+                 '  Times surfaced: %i' % (s['timesSurfaced']),
+                 '  Energy used: %.2f kWh from hotel load + %.2f kWh from propulsion = %.2f kWh total' % (s['hotelEnergy'], s['propulsionEnergy'], s['totalEnergy']),
+                 '  Average time of each dive: %.2f minutes' % (s['averageDiveTime']),
+                 '  Distance to endpoint: %.2f meters' % (s['distanceToEndpoint']),
+                 '#################################']
+        return '\n'.join(lines)
+
+#config file path or already loaded config -> loaded config
+def loadConfig(config):
+    
+    if isinstance(config, configReader_v2):
+        return config
+    
+    configRead = configReader_v2()
+    if not configRead.loadFile(config):
+        raise Exception('Config file %s not found' % config)
+    return configRead
+
+#run the mission of a config (file path or configReader_v2) with one glider, from its start
+#(or, resume = True, from its last checkpoint) until it reaches the endpoint or the end time
+#oceanInfo & bathyreader may be supplied to share already loaded data between missions
+def runMission(config, resume=False, oceanInfo=None, bathyreader=None):
+    
+    configRead = loadConfig(config)
+    
+    #setting start and end times of simulation
+    startYear = configRead.getInt('Location/Time', 'startYear')
+    startMonth = configRead.getInt('Location/Time', 'startMonth')
+    startDay = configRead.getInt('Location/Time', 'startDate')
+    startHour = configRead.getInt('Location/Time', 'startHour')
+    
+    startTime = datetime(startYear, startMonth, startDay, startHour, 0, 0)
+    
+    endYear = configRead.getInt('Location/Time', 'endYear')
+    endMonth = configRead.getInt('Location/Time', 'endMonth')
+    endDay = configRead.getInt('Location/Time', 'endDay')
+    endHour = configRead.getInt('Location/Time', 'endHour')
+    
+    endTime = datetime(endYear, endMonth, endDay, endHour, 0, 0)
+    
+    #setting start positions of glider 1
+    startLat = configRead.getFloat('Location/Time', 'startLat')
+    startLon = configRead.getFloat('Location/Time', 'startLon')
+    endLat = configRead.getFloat('Location/Time', 'endLat')
+    endLon = configRead.getFloat('Location/Time', 'endLon')
+    
+    #creating glider object
+    glider1 = glider(configRead, [startLat, startLon], [endLat, endLon], startTime, oceanInfo, bathyreader)
+    
+    #continue from the last checkpoint
+    resumed = False
+    if resume:
+        state = loadCheckpoint(glider1.checkpointFile) if glider1.checkpointFile is not None else None
+        if state is None:
+            print('No checkpoint to resume from')
+        else:
+            glider1.restoreCheckpoint(state)
+            resumed = True
+            print('resumed from %s at %s' % (glider1.checkpointFile, glider1.date))
+    
+    #time the hot paths when instrumentation is configured (Instrumentation.py)
+    with instrumented(**instrumentSettings(configRead)) as instrumentation:
+        while not glider1.done:
+            glider1.update(endTime)
+    
+    return missionResult(glider1, resumed, instrumentation)
 
-#creating glider object
-glider1 = glider([startLat, startLon], [endLat, endLon], startTime)
+#plot the track inside the lat/lon box of the SoCal data, with the start (green) & end (red) points
+def plotTrack(result):
+    
+    import matplotlib.pyplot as plt
+    
+    plt.plot(result.track.lons, result.track.lats)
+    plt.plot([-118.7, -118.7], [32.7, 33.4], linestyle='dashed')
+    plt.plot([-117.2, -117.2], [32.7, 33.4], linestyle='dashed')
+    plt.plot([-118.7, -117.2], [32.7, 32.7], linestyle='dashed')
+    plt.plot([-118.7, -117.2], [33.4, 33.4], linestyle='dashed')
+    plt.plot(-117.51995981980528, 33.166979172139825, 'gx')
+    plt.plot(-118.48001, 32.97972, 'rx')
+    plt.grid()
+    plt.show()
+
+#csv of current quantities: surfacing position & depth-averaged currents of each dive
+def writeDAC(result, fileName):
+    
+    glider1 = result.glider
+    rowsToWrite = []
+    
+    for l in range(len(glider1.dac_east)):
+        row = [glider1.reachSurfaceLat[l], glider1.reachSurfaceLon[l], glider1.dac_east[l], glider1.dac_north[l]]
+        rowsToWrite.append(row)
+    
+    with open(fileName, 'w') as file:
+        csvwriter = csv.writer(file)
+        
+        header = ['lat', 'lon', 'dac_east', 'dac_north']
+        csvwriter.writerow(header)
+        
+        csvwriter.writerows(rowsToWrite)
 
 
-#running glider object in parallel
-done = False
-while(not done):
-    glider1.update(endTime)
+######################################################
+#START OF PROGRAM
+######################################################
+if __name__ == '__main__':
+    
+    parser = argparse.ArgumentParser(description='Run a glider mission')
+    parser.add_argument('config', nargs='?', default='SoCalData+Sim/gliderConfig.dat', help='glider config file')
+    parser.add_argument('--resume', action='store_true', help='continue from the last checkpoint (checkpointFile)')
+    parser.add_argument('--no-plot', action='store_true', help='do not show the track plot')
+    parser.add_argument('--instrument', action='store_true', help='time the hot paths & print the breakdown')
+    parser.add_argument('--profile', metavar='FILE', help='also run under cProfile, writing FILE')
+    parser.add_argument('--trace-memory', action='store_true', help='also trace allocations with tracemalloc')
+    args = parser.parse_args()
+    
+    print('running gliders...')
+    
+    configRead = loadConfig(args.config)
+    if args.instrument:
+        configRead.setValue('General', 'instrument', 1)
+    if args.profile:
+        configRead.setValue('General', 'profileFile', args.profile)
+    if args.trace_memory:
+        configRead.setValue('General', 'traceMemory', 1)
+    result = runMission(configRead, resume=args.resume)
+    glider1 = result.glider
     
-    if (glider1.done):
-        plt.plot(glider1.lons, glider1.lats)
-        plt.plot([-118.7, -118.7], [32.7, 33.4], linestyle='dashed')
-        plt.plot([-117.2, -117.2], [32.7, 33.4], linestyle='dashed')
-        plt.plot([-118.7, -117.2], [32.7, 32.7], linestyle='dashed')
-        plt.plot([-118.7, -117.2], [33.4, 33.4], linestyle='dashed')
-        plt.plot(-117.51995981980528, 33.166979172139825, 'gx')
-        plt.plot(-118.48001, 32.97972, 'rx')
-        plt.grid()
-        plt.show()
+    if not args.no_plot:
+        plotTrack(result)
     
-    done = glider1.done
+    writeDAC(result, 'SoCalSimDAC_' + str(glider1.maxDepth) + '.csv')
 
+    
+    '''#plotting what would happen without currents
+    import matplotlib.pyplot as plt
+    plt.plot(glider1.track.noCurrLons, glider1.track.noCurrLats)
+    plt.plot([-118.7, -118.7], [32.7, 33.4], linestyle='dashed')
+    plt.plot([-117.2, -117.2], [32.7, 33.4], linestyle='dashed')
+    plt.plot([-118.7, -117.2], [32.7, 32.7], linestyle='dashed')
+    plt.plot([-118.7, -117.2], [33.4, 33.4], linestyle='dashed')
+    plt.plot(-117.51995981980528, 33.166979172139825, 'gx')
+    plt.plot(-118.48001, 32.97972, 'rx')
+    plt.grid()
+    plt.show()'''
 
+    '''#plotting important quantities
+    from glidePathGraph import plotter
+    plotName = configRead.getString('General', 'desiredFileTitle') + '.png'
+    plotter(glider1.track.times, glider1.track.depths, glider1.track.energies, glider1.track.buoyancyStates, glider1.track.pitchAngles, plotName)
 
-rowsToWrite = []
 
-for l in range(len(glider1.dac_east)):
-    row = [glider1.reachSurfaceLat[l], glider1.reachSurfaceLon[l], glider1.dac_east[l], glider1.dac_north[l]]
-    rowsToWrite.append(row)
-    
+    #Writing data to csv file
+    print('creating csv file...')
 
-#csv of current quantities
-fileName = 'SoCalSimDAC_' + str(glider1.maxDepth) + '.csv'
 
-with open(fileName, 'w') as file:
-    csvwriter = csv.writer(file)
-    
-    header = ['lat', 'lon', 'dac_east', 'dac_north']
-    csvwriter.writerow(header)
-    
-    csvwriter.writerows(rowsToWrite)
+    rowsToWrite = []
+    for h in range(len(glider1.track)):
+        currentRow = [glider1.track.times[h]]
 
 
-'''#plotting what would happen without currents
-plt.plot(glider1.noCurrLons, glider1.noCurrLats)
-plt.plot([-118.7, -118.7], [32.7, 33.4], linestyle='dashed')
-plt.plot([-117.2, -117.2], [32.7, 33.4], linestyle='dashed')
-plt.plot([-118.7, -117.2], [32.7, 32.7], linestyle='dashed')
-plt.plot([-118.7, -117.2], [33.4, 33.4], linestyle='dashed')
-plt.plot(-117.51995981980528, 33.166979172139825, 'gx')
-plt.plot(-118.48001, 32.97972, 'rx')
-plt.grid()
-plt.show()'''
+        currentRow.append(round(float(glider1.track.lats[h]), 5)) #lat
+        currentRow.append(round(float(glider1.track.lons[h]), 5)) #lon
+        currentRow.append(round(float(glider1.track.depths[h]), 1)) #depth
+        currentRow.append(round(float(glider1.track.energies[h]), 3)) #energy
+        #currentRow.append(round(float(glider1.dac_north[h]), 5)) #north depth averaged currents
+        #currentRow.append(round(float(glider1.dac_east[h]), 5)) #east depth averaged currents
 
-'''#plotting important quantities
-plotName = configRead.getString('General', 'desiredFileTitle') + '.png'
-plotter(glider1.times, glider1.depths, glider1.energies, glider1.buoyancyStates, glider1.pitchAngles, plotName)
+        rowsToWrite.append(currentRow)
 
+    titleCSV = configRead.getString('General', 'desiredFileTitle') + '.csv'
 
-#Writing data to csv file
-print('creating csv file...')
+    file = open(titleCSV, 'w')
+    writer = csv.writer(file)
 
+    header = ['time (s)', 'lat (deg)', 'lon (deg)', 'depth (m)', 'energies (kWh)']
 
-rowsToWrite = []
-for h in range(len(glider1.times)):
-    currentRow = [glider1.times[h]]
-    
-    
-    currentRow.append(round(float(glider1.lats[h]), 5)) #lat
-    currentRow.append(round(float(glider1.lons[h]), 5)) #lon
-    currentRow.append(round(float(glider1.depths[h]), 1)) #depth
-    currentRow.append(round(float(glider1.energies[h]), 3)) #energy
-    #currentRow.append(round(float(glider1.dac_north[h]), 5)) #north depth averaged currents
-    #currentRow.append(round(float(glider1.dac_east[h]), 5)) #east depth averaged currents
-        
-    rowsToWrite.append(currentRow)
-
-titleCSV = configRead.getString('General', 'desiredFileTitle') + '.csv'
+    writer.writerow(header)
+    writer.writerows(rowsToWrite)
 
-file = open(titleCSV, 'w')
-writer = csv.writer(file)
+    file.close()
 
-header = ['time (s)', 'lat (deg)', 'lon (deg)', 'depth (m)', 'energies (kWh)']
 
-writer.writerow(header)
-writer.writerows(rowsToWrite)
+    #making kml file to display surfacing points
+    print("creating kml file...")
 
-file.close()
+    import simplekml
 
+    kml = simplekml.Kml()
 
-#making kml file to display surfacing points
-print("creating kml file...")
+    #creating points in kml file
+    for z in range(len(glider1.reachSurfaceLat)):
 
-kml = simplekml.Kml()
+        pnt1 = kml.newpoint(coords = [(glider1.reachSurfaceLon[z], glider1.reachSurfaceLat[z])])
 
-#creating points in kml file
-for z in range(len(glider1.reachSurfaceLat)):
-    
-    pnt1 = kml.newpoint(coords = [(glider1.reachSurfaceLon[z], glider1.reachSurfaceLat[z])])
-            
-    pnt1.description = glider1.surfaceDescriptions[z]
+        pnt1.description = glider1.surfaceDescriptions[z]
 
 
-titleKML = configRead.getString('General', 'desiredFileTitle') + '.kml'
-kml.save(titleKML)'''
+    titleKML = configRead.getString('General', 'desiredFileTitle') + '.kml'
+    kml.save(titleKML)'''
 
-    
-#printing important values
-print()
-print('#################################')
-
-str1 = '  Time of trip to destination: %.2f minutes' % (glider1.tripTime) 
-print(str1)
-str2 = '  Distance of trip to destination: %.2f meters' % (glider1.destDist)
-print(str2)
-str3 = '  Times surfaced: %i' % (glider1.surfaceNum)
-print(str3)
-hotUse = glider1.hotelLoadUsed
-propUse = glider1.buoyancyengine.propulsionPowerUsed
-str4 = '  Energy used: %.2f kWh from hotel load + %.2f kWh from propulsion = %.2f kWh total' % (hotUse, propUse, hotUse + propUse)
-print(str4)
-str5 = '  Average time of each dive: %.2f minutes' % (np.average(glider1.betweenSurfaceTimes))
-print(str5)
-str6 = '  Distance to endpoint: %.2f meters' % (distance(glider1.lat, glider1.lon, glider1.endPoint[0], glider1.endPoint[1]))
-print(str6)
-    
-print('#################################')
-print()
 
-print("\n------DONE------\n")
\ No newline at end of file
+    #printing important values
+    print()
+    print(result.format())
+    print()
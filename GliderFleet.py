@@ -0,0 +1,675 @@
+#library imports
+import seawater as sw
+import numpy as np
+from datetime import timezone
+
+#class imports
+from OceanData import oceanData  #reads NETCDFs for currents
+from NavUtils import bearing, projectPositionXY, distance  #contains mathematic functions including conversioin XY <-> lat/lon
+import BathyReader  #interpolates depth from gebco
+from BathyIndex import indexFor  #skips floor checks in deep water
+from BuoyancyEngine import buoyancyEngine, flowRateSettings #operated mechanism that changes teh glider's buoyancy
+from PhiSpeeds import polarFor
+from StepControl import stepSettings, stepLimit, eventStep, eventDepth, NO_EVENT, SURFACE  #event-driven step lengths
+from Integrators import integratorSettings, integrate  #euler, midpoint, rk4 or rk45 glide steps
+from TrajectoryRecorder import trajectoryRecorder, recordEvery  #columnar history of the run
+from TrajectoryWriter import outputSettings, openWriter  #streams the history to csv / netcdf while running
+from Checkpoint import checkpointSettings, captureState, restoreState, saveCheckpoint  #periodic state snapshots & resume
+
+
+##################################################################################
+# This class advances N gliders together, one timestep per call to step().
+#
+# Glider state (position, depth, buoyancy, battery, pitch and mode flags) is
+# kept in NumPy arrays with one entry per glider, and every glider that is
+# gliding samples the ocean and bathymetry in one vectorized call.
+# The state machine is the same as glider.update/glider.velocity in
+# GlidePath.py: diving, climbing, surface loiter, floor bounce and the
+# surfacing (DAC) bookkeeping.
+#
+# Each glider keeps its own clock, since pumping, loitering and surfacing
+# change the length of its steps (as does adaptive stepping, see
+# StepControl.py). Gliders that are done stop updating. Positions are
+# integrated with the configured method (Integrators.py); every stage samples
+# the ocean once for all gliders.
+#
+# maxDepth, pumpRate and loiterTime may differ per glider; everything else
+# comes from the config file.
+#
+# Example:
+#   fleet = gliderFleet(configRead, [[33.17, -117.52]]*10, [[32.98, -118.48]]*10, [startTime]*10,
+#                       maxDepths=np.linspace(100, 1000, 10))
+#   fleet.run(endTime)
+#   print(fleet.summary(0))
+##################################################################################
+class gliderFleet:
+
+    # ---------------------------------------------------------
+    # Constructor
+    # startPoints & endPoints are [lat, lon] per glider, startDates are
+    # (naive, local) datetimes per glider
+    # oceanInfo & bathyreader may be supplied to share already loaded data
+    # ---------------------------------------------------------
+    def __init__(self, configRead, startPoints, endPoints, startDates, maxDepths=None, pumpRates=None, loiterTimes=None, oceanInfo=None, bathyreader=None, record=True):
+
+        self.n = len(startPoints)
+        n = self.n
+
+        maxPitchDegrees = configRead.getInt('Glider', 'maxPitchAngle')
+        self.maxPitchRadians = maxPitchDegrees * np.pi / 180 #converts to radians
+        self.proximityToTarget = configRead.getInt('General', 'proximityToTarget')
+
+        if oceanInfo is None:
+            oceanInfo = oceanData(configRead.getString('General', 'HYCOMFileDirectory'))
+        self.oceanInfo = oceanInfo
+        if bathyreader is None:
+            bathyreader = BathyReader.openBathymetry(configRead.getString('General', 'gebcoFile'))
+        self.bathyreader = bathyreader
+        self.floorIndex = indexFor(bathyreader)
+
+        self.interval = configRead.getInt('General', 'interval')
+        self.adaptive, self.maxInterval, self.stepTolerance = stepSettings(configRead, self.interval) #adaptive glide steps (optional, off by default)
+        self.integrator, self.tolerance = integratorSettings(configRead) #integration method (optional, euler by default)
+        self.UTCOffset = configRead.getInt('Location/Time', 'UTCOffset')
+        self.hotelLoad = configRead.getInt('General', 'hotelLoad') #in Watts
+        self.rhoR = configRead.getInt('General', 'neutralDens')
+        self.gliderVolume = configRead.getInt('General', 'gliderVolume')
+
+        #per-glider parameters (config values unless overridden)
+        self.maxDepth = self._perGlider(maxDepths, configRead.getInt('Glider', 'maxDepth'))
+        self.pumpRate = self._perGlider(pumpRates, configRead.getInt('General', 'pumpRate'))
+        self.loiterTime = self._perGlider(loiterTimes, configRead.getInt('General', 'loiterTime')).astype(int)
+
+        #buoyancy engine constants & pumping energy table (shared by all gliders)
+        engine = buoyancyEngine(configRead.getInt('Glider', 'startingOil'), configRead.getInt('General', 'totDisplacement'),
+                                configRead.getInt('Glider', 'buoyancyMin'), configRead.getInt('Glider', 'buoyancyMax'),
+                                configRead.getInt('General', 'pumpingPeriod'), configRead.getFloat('General', 'totBatteryPower'),
+                                configRead.getInt('General', 'pumpRate'), flowRateSettings(configRead))
+        self.totDisplacement = engine.totDisplacement
+        self.minOil = engine.minOil
+        self.maxOil = engine.maxOil
+        self.pumpingPeriod = engine.pumpingPeriod
+        self.energyUsed = engine.energyUsed
+        self.startingEnergy = engine.batteryPower
+
+        clA = configRead.getFloat('Glider', 'clA')
+        clB = configRead.getFloat('Glider', 'clB')
+        cdA = configRead.getFloat('Glider', 'cdA')
+        cdB = configRead.getFloat('Glider', 'cdB')
+        self.polar = polarFor(clA, clB, cdA, cdB) #pitch -> speed factors
+
+        #position & navigation
+        startPoints = np.asarray(startPoints, dtype=float)
+        endPoints = np.asarray(endPoints, dtype=float)
+        self.lat = startPoints[:, 0].copy()
+        self.lon = startPoints[:, 1].copy()
+        self.endLat = endPoints[:, 0].copy()
+        self.endLon = endPoints[:, 1].copy()
+        self.bearing = bearing(self.lat, self.lon, self.endLat, self.endLon) #great circle bearing in degrees from North
+        self.depth = np.zeros(n) #meters from ocean surface
+        self.lat_nocurrents = self.lat.copy() #tracks where the glider would surface if there were no currents
+        self.lon_nocurrents = self.lon.copy()
+
+        #clocks: local wall-clock seconds (naive datetimes read as UTC)
+        self.date = np.array([self._seconds(d) for d in startDates])
+        self.timeStart = self.date.copy()
+        self.timeStartIteration = self.date.copy()
+
+        #buoyancy engine & battery
+        self.oilInBalloon = np.full(n, float(engine.oilInBalloon)) #cc's external
+        self.batteryPower = np.full(n, float(engine.batteryPower)) #in kWh
+        self.propulsionPowerUsed = np.zeros(n)
+        self.hotelLoadUsed = np.zeros(n)
+
+        #vehicle motion
+        self.phiCurr = np.zeros(n)
+        self.speed = np.zeros(n)
+
+        #last sane ocean values
+        self.salPrev = np.zeros(n)
+        self.tempPrev = np.zeros(n)
+        self.northPrev = np.zeros(n)
+        self.eastPrev = np.zeros(n)
+
+        #mode flags
+        self.diving = np.ones(n, dtype=bool) #toggles glider's diving or ascending maneuver
+        self.loitering = np.zeros(n, dtype=bool)
+        self.starting = np.ones(n, dtype=bool)
+        self.onFloor = np.zeros(n, dtype=bool)
+        self.done = np.zeros(n, dtype=bool)
+
+        #trip totals
+        self.totalDistX = np.zeros(n) #total distance (meters) traveled
+        self.totalDistY = np.zeros(n)
+        self.destDist = np.zeros(n)
+        self.tripTime = np.zeros(n)
+        self.surfaceNum = np.zeros(n, dtype=int) #number of times glider surfaces - equal to number of dives
+
+        #surfacing records (per glider lists)
+        self.reachSurfaceLat = [[lat] for lat in self.lat] #where the glider is when it surfaces
+        self.reachSurfaceLon = [[lon] for lon in self.lon]
+        self.leaveSurfaceLat = [[lat] for lat in self.lat] #where the glider is after loitering on the surface (subject to ocean currents)
+        self.leaveSurfaceLon = [[lon] for lon in self.lon]
+        self.surfaceDescriptions = [['Remaining energy: %.2f kWh \n Position (degrees lat, degrees lon): (%.2f, %.2f) \n Time: %.2f minutes' % (self.batteryPower[i], self.lat[i], self.lon[i], 0)] for i in range(n)]
+        self.betweenSurfaceTimes = [[] for i in range(n)]
+        self.dac_north = [[] for i in range(n)] #depth_averaged northing currents
+        self.dac_east = [[] for i in range(n)]
+
+        #history, one row (all gliders) per step: times (minutes), lat, lon, depth & energy
+        #(every recordEvery-th step & every step where a glider changed mode)
+        #& depth-averaged currents per surfacing; both streamed to outputFile when configured & recording
+        self.record = record
+        trackColumns = ['times', 'lats', 'lons', 'depths', 'energies']
+        dacColumns = ['glider', 'times', 'lats', 'lons', 'dac_east', 'dac_north']
+        outputFile, outputFormat, flushRows = outputSettings(configRead)
+        trackWriter = dacWriter = None
+        if record and outputFile is not None:
+            trackWriter = openWriter(outputFile + '_track', trackColumns, n, outputFormat)
+            dacWriter = openWriter(outputFile + '_dac', dacColumns, None, outputFormat)
+        self.track = trajectoryRecorder(trackColumns, width=n, every=recordEvery(configRead), writer=trackWriter, flushRows=flushRows)
+        self.dacs = trajectoryRecorder(dacColumns, writer=dacWriter, flushRows=1) #surfacings are rare: written as they happen
+        self.modes = None
+        if record:
+            self._recordStep()
+
+        #checkpoints every checkpointHours simulated hours of the slowest glider (when configured)
+        self.checkpointFile, checkpointHours = checkpointSettings(configRead)
+        self.checkpointInterval = checkpointHours*60*60
+        self.nextCheckpoint = self.date.min() + self.checkpointInterval
+
+    # ---------------------------------------------------------
+    # Broadcast an optional per-glider parameter
+    # ---------------------------------------------------------
+    def _perGlider(self, values, default):
+        if values is None:
+            values = default
+        return np.broadcast_to(np.asarray(values, dtype=float), (self.n,)).copy()
+
+    # ---------------------------------------------------------
+    # Naive (local) datetime to wall-clock seconds
+    # ---------------------------------------------------------
+    @staticmethod
+    def _seconds(date):
+        return date.replace(tzinfo=timezone.utc).timestamp()
+
+    # ---------------------------------------------------------
+    # Ocean (HYCOM, UTC) timestamps of the selected gliders
+    # ---------------------------------------------------------
+    def _oceanTimes(self, idx):
+        return self.date[idx] - self.UTCOffset*60*60
+
+    # ---------------------------------------------------------
+    # Run every glider until it is done
+    # ---------------------------------------------------------
+    def run(self, endTime):
+        while not self.done.all():
+            self.step(endTime)
+        self.close()
+
+    # ---------------------------------------------------------
+    # Write what is left of the history to the output files
+    # ---------------------------------------------------------
+    def close(self):
+        self.track.close()
+        self.dacs.close()
+
+    # ---------------------------------------------------------
+    # Advance every glider that is not done by one update
+    # ---------------------------------------------------------
+    def step(self, endTime):
+
+        active = ~self.done
+        timeStep = np.where(active, float(self.interval), 0.0)
+
+        #out of range of NetCDFs --> end glider
+        over = active & (self.date > self._seconds(endTime))
+        if over.any():
+            print('Out of range')
+            timeStep[over] = 0
+            self.done[over] = True
+
+        loiter = np.flatnonzero(active & ~over & self.loitering)
+        glide = np.flatnonzero(active & ~over & ~self.loitering)
+
+        #loitering (beginning, end, or in between cycles)
+        if len(loiter):
+            self._loiter(loiter, timeStep)
+
+        #normal function
+        if len(glide):
+            self._glide(glide, timeStep)
+
+        #hotel load runs always
+        hotel = (self.hotelLoad*(timeStep/60/60))/1000 #converts from Watts to kWh
+        self.batteryPower -= hotel
+        self.hotelLoadUsed += hotel
+
+        #update time
+        self.date += timeStep
+
+        #updating important quantities
+        if self.record:
+            self._recordStep()
+
+        #save the state every checkpointInterval of simulated time
+        if self.checkpointFile is not None and not self.done.all() and self.date[~self.done].min() >= self.nextCheckpoint:
+            while self.nextCheckpoint <= self.date[~self.done].min():
+                self.nextCheckpoint += self.checkpointInterval
+            self.saveCheckpoint()
+
+    # ---------------------------------------------------------
+    # Write the full simulation state to the checkpoint file
+    # ---------------------------------------------------------
+    def saveCheckpoint(self):
+        state = captureState(self)
+        state['oceanCursor'] = self.oceanInfo.cursor()
+        saveCheckpoint(self.checkpointFile, state)
+
+    # ---------------------------------------------------------
+    # Continue from a checkpoint state (fleet built with the same
+    # config & arguments)
+    # ---------------------------------------------------------
+    def restoreCheckpoint(self, state):
+        state = dict(state)
+        self.oceanInfo.seek(state.pop('oceanCursor'))
+        restoreState(self, state)
+
+    # ---------------------------------------------------------
+    # Record the state of every glider in the track (always kept
+    # when a glider changed mode)
+    # ---------------------------------------------------------
+    def _recordStep(self):
+
+        modes = np.stack([self.diving, self.loitering, self.onFloor, self.done, self.surfaceNum])
+        event = self.modes is None or bool(np.any(modes != self.modes))
+        self.modes = modes
+
+        self.track.record(event, times=(self.date - self.timeStart)/60, lats=self.lat, lons=self.lon, #in minutes
+                          depths=self.depth, energies=self.batteryPower)
+
+    # ---------------------------------------------------------
+    # Surface loiter: drift with the currents for loiterTime minutes
+    # ---------------------------------------------------------
+    def _loiter(self, idx, timeStep):
+
+        #drift with the surface currents for loiterTime minutes, all gliders in error controlled rk45 steps
+        #(currents sampled at the loiter start time, one query for all gliders per stage)
+        latStart = self.lat[idx]
+        lonStart = self.lon[idx]
+        times = self._oceanTimes(idx)
+        depth = self.depth[idx]
+        loiterTime = self.loiterTime[idx]
+
+        def rates(select, offset, y):
+            lat, lon = projectPositionXY(latStart[select], lonStart[select], y[0], y[1])
+
+            #find currents from HYCOM
+            easting1, northing1, _, _ = self.oceanInfo.sampleMany(times[select], depth[select], lat, lon) #meters/second
+
+            #CHECK CURRENTS
+            bad = (np.abs(easting1) > 10) | (np.abs(northing1) > 10)
+            easting1 = np.where(bad, self.eastPrev[idx[select]], easting1)
+            northing1 = np.where(bad, self.northPrev[idx[select]], northing1)
+
+            return np.array([northing1, easting1])
+
+        y = np.zeros((2, len(idx)))
+        northing1, easting1 = integrate('rk45', rates, y, loiterTime * 60, rates(np.arange(len(idx)), np.zeros(len(idx)), y), self.tolerance)
+
+        #update position
+        lat, lon = projectPositionXY(latStart, lonStart, northing1, easting1)
+
+        #calculate total distance traveled (m)
+        self.totalDistX[idx] += np.abs(easting1)
+        self.totalDistY[idx] += np.abs(northing1)
+
+        self.lat[idx] = lat
+        self.lon[idx] = lon
+        self.lat_nocurrents[idx] = lat
+        self.lon_nocurrents[idx] = lon
+
+        #update glider heading when it surfaces
+        self.bearing[idx] = bearing(lat, lon, self.endLat[idx], self.endLon[idx])
+
+        self.loitering[idx] = False
+        self.starting[idx] = True
+        timeStep[idx] = loiterTime * 60 #converts to seconds - time updates at end of step
+        self.diving[idx] = True
+
+        for i in idx:
+            self.leaveSurfaceLat[i].append(self.lat[i])
+            self.leaveSurfaceLon[i].append(self.lon[i])
+
+        #check if glider is near target destination --> end glider
+        self._checkArrival(idx)
+
+    # ---------------------------------------------------------
+    # Dive/climb step: pump, sample ocean, move, then check
+    # depth limit, surfacing and ocean floor
+    # ---------------------------------------------------------
+    def _glide(self, idx, timeStep):
+
+        self.starting[idx[self.depth[idx] > 0]] = False
+
+        #descend (deflate) or ascend (inflate) maneuver
+        turned = self._pump(idx)
+        timeStep[idx[turned]] = self.pumpingPeriod
+
+        #currents, salinity, temperature and density (precomputed EOS-80 field) from one ocean query
+        easting, northing, salinity, temp, densCurr = self.oceanInfo.sampleManyWithDensity(self._oceanTimes(idx), self.depth[idx], self.lat[idx], self.lon[idx])
+
+        bad = (np.abs(salinity) > 35) | (np.abs(salinity) < 33) | (np.abs(temp) > 20) | (np.abs(temp) < 3)
+        salinity = np.where(bad, self.salPrev[idx], salinity)
+        temp = np.where(bad, self.tempPrev[idx], temp)
+        self.salPrev[idx] = salinity
+        self.tempPrev[idx] = temp
+        if bad.any():
+            densCurr[bad] = sw.dens(salinity[bad], temp[bad], self.depth[idx[bad]]*1.45038*0.689476)
+
+        latStart, lonStart, depthStart = self.lat[idx], self.lon[idx], self.depth[idx]
+        vertical_velocity, eastingV, northingV, easting, northing = self._glideVelocity(idx, densCurr, easting, northing)
+
+        #adaptive: steady glides step straight to the next surface / depth limit crossing, corrected with the velocity
+        #at the end of the step & shortened where it changes too much, cut where they first reach the seafloor
+        event = np.full(len(idx), NO_EVENT)
+        if self.adaptive:
+            steady = np.flatnonzero(~turned)
+            k1 = np.array([northingV + northing, eastingV + easting, vertical_velocity, northingV, eastingV])[:,steady]
+            still = (vertical_velocity == 0) & (eastingV == 0) & (northingV == 0)
+            y = np.zeros((5, len(steady)))
+            y[2] = self.depth[idx[steady]]
+            maxInterval = stepLimit(self.maxInterval, self.oceanInfo.framesLeft(self._oceanTimes(idx[steady])))
+            step, stepEvent, velocity = eventStep(self._glideRates(idx[steady], still[steady]), y, k1, self.maxDepth[idx[steady]],
+                                                  self.interval, maxInterval, self.stepTolerance)
+            timeStep[idx[steady]] = step
+            event[steady] = stepEvent
+            if self.integrator == 'euler':
+                #move at the average velocity over the step
+                northingV[steady], eastingV[steady], vertical_velocity[steady] = velocity[3], velocity[4], velocity[2]
+                northing[steady], easting[steady] = velocity[0] - velocity[3], velocity[1] - velocity[4]
+
+            dt = timeStep[idx]
+            depth = self.depth[idx]
+            latEnd, lonEnd = projectPositionXY(self.lat[idx], self.lon[idx], (northingV + northing) * dt, (eastingV + easting) * dt)
+            hit, _ = self.floorIndex.contactMany(self.lat[idx], self.lon[idx], depth, latEnd, lonEnd, depth + vertical_velocity * dt)
+            for k in np.flatnonzero(hit & steady):
+                fraction = self.floorIndex.contactFraction(self.lat[idx[k]], self.lon[idx[k]], depth[k], latEnd[k], lonEnd[k], depth[k] + vertical_velocity[k] * dt[k])
+                if fraction is not None and fraction < 1:
+                    timeStep[idx[k]] *= fraction
+                    event[k] = NO_EVENT
+
+        if self.integrator == 'euler':
+            self._move(idx, timeStep[idx], vertical_velocity, eastingV, northingV, easting, northing)
+        else:
+            self._integrateMove(idx, timeStep[idx], vertical_velocity, eastingV, northingV, easting, northing)
+        if self.adaptive:
+            self.depth[idx] = eventDepth(self.depth[idx], event, self.maxDepth[idx])
+
+        #check if glider has hit depth limit --> should start ascending
+        limit = self.depth[idx] >= self.maxDepth[idx]
+        self.diving[idx[limit]] = False
+
+        #check if glider has surfaced and is not on its way down
+        surfaced = ~limit & (self.depth[idx] <= 0) & ~self.loitering[idx] & ~self.starting[idx]
+        for i, vz, e in zip(idx[surfaced], vertical_velocity[surfaced], event[surfaced]):
+            self._surface(i, vz, timeStep, e == SURFACE)
+
+        #check if glider hits ocean floor anywhere along this step --> bounce off
+        hit, oceanFloor = self.floorIndex.contactMany(latStart, lonStart, depthStart, self.lat[idx], self.lon[idx], self.depth[idx])
+        bounce = hit & ~self.onFloor[idx]
+        if bounce.any():
+            print('Bounced off ocean floor')
+            self.depth[idx[bounce]] = np.minimum(self.depth[idx[bounce]], oceanFloor[bounce])
+            self.onFloor[idx[bounce]] = True
+        self.diving[idx[hit]] = False
+
+    # ---------------------------------------------------------
+    # Buoyancy engine: deflate while diving, inflate while climbing
+    # returns which gliders pumped oil
+    # ---------------------------------------------------------
+    def _pump(self, idx):
+
+        oil = self.oilInBalloon[idx]
+        diving = self.diving[idx]
+
+        #dive maneuver (down from surface) --- no energy used
+        deflate = diving & (oil > self.minOil)
+        oil[deflate] -= self.pumpingPeriod * self.pumpRate[idx[deflate]]
+
+        #ascend maneuver (up from depth limit)
+        inflate = ~diving & (oil < self.maxOil)
+        oil[inflate] += self.pumpingPeriod * self.pumpRate[idx[inflate]]
+        if inflate.any():
+            energyLost = (self.energyUsed(self.depth[idx[inflate]]*1.45038)*(self.pumpingPeriod/60/60))/1000
+            self.batteryPower[idx[inflate]] -= energyLost
+            self.propulsionPowerUsed[idx[inflate]] += energyLost
+
+        #corrects if goes under min (diving) or over max (climbing)
+        self.oilInBalloon[idx] = np.where(diving, np.maximum(oil, self.minOil), np.minimum(oil, self.maxOil))
+
+        return deflate | inflate
+
+    # ---------------------------------------------------------
+    # Glide velocity from buoyancy & water density
+    # returns vertical velocity (m/s, positive down), thru-water
+    # easting & northing velocity & the checked ocean currents
+    # ---------------------------------------------------------
+    def _glideVelocity(self, idx, densCurr, easting, northing):
+
+        phiCurr, Fbuo, vertical_velocity, lateral_velocity = self._buoyancyVelocity(idx, densCurr)
+
+        #if on surface, should not go up more
+        depth = self.depth[idx]
+        surface = (depth <= 0) & (Fbuo < 0)
+        depth[surface] = 0
+        self.depth[idx] = depth
+        lateral_velocity[surface] = 0
+        vertical_velocity[surface] = 0
+        phiCurr[surface] = 0
+
+        #if on sea floor, shouldn't move until buoyancy state switches sign
+        onFloor = self.onFloor[idx]
+        stuck = onFloor & (self.oilInBalloon[idx] <= self.maxOil*0.8)
+        lateral_velocity[stuck] = 0
+        vertical_velocity[stuck] = 0
+        self.onFloor[idx[onFloor & ~stuck & (depth < self.maxDepth[idx])]] = False
+
+        self.phiCurr[idx] = phiCurr
+        self.speed[idx] = np.sqrt(vertical_velocity**2 + lateral_velocity**2)
+
+        #CHECK CURRENTS
+        bad = (np.abs(easting) > 10) | (np.abs(northing) > 10)
+        easting = np.where(bad, self.eastPrev[idx], easting)
+        northing = np.where(bad, self.northPrev[idx], northing)
+
+        #split lateral velocity into northing and easting (thru-water speed) and add ocean currents
+        eastingV = lateral_velocity * np.sin(self.bearing[idx] * np.pi / 180)
+        northingV = lateral_velocity * np.cos(self.bearing[idx] * np.pi / 180)
+
+        return vertical_velocity, eastingV, northingV, easting, northing
+
+    # ---------------------------------------------------------
+    # Pitch, buoyancy force & glide velocity (vertical, lateral)
+    # of the selected gliders in water of density densCurr
+    # ---------------------------------------------------------
+    def _buoyancyVelocity(self, idx, densCurr):
+
+        halfDens = self.totDisplacement/2
+
+        dV = self.oilInBalloon[idx] - halfDens
+        #negative if moving toward surface (negative depth)
+        Fbuo = 9.8 * (self.rhoR*self.gliderVolume*(10**-6) - densCurr*(self.gliderVolume+dV)*(10**-6))
+        Fmax = 9.8 * (self.rhoR*self.gliderVolume*(10**-6) - densCurr*(self.gliderVolume+(self.minOil-halfDens))*(10**-6))
+
+        phiCurr = (self.maxPitchRadians/Fmax)*Fbuo
+
+        factor = np.where(Fbuo < 0, -1, 1) #diving is positive depth direction
+
+        #separate total glider velocity into vertical speed (up/down) and lateral speed (x and y axes)
+        multiplier = np.sqrt(2*np.abs(Fbuo/densCurr))
+        xVelPart, zVelPart = self.polar.lookupMany(np.abs(phiCurr))
+        vertical_velocity = factor * multiplier * zVelPart #m/s
+        lateral_velocity = multiplier * xVelPart
+
+        return phiCurr, Fbuo, vertical_velocity, lateral_velocity
+
+    # ---------------------------------------------------------
+    # Advance the gliders timeStep seconds at constant velocity
+    # ---------------------------------------------------------
+    def _move(self, idx, timeStep, vertical_velocity, eastingV, northingV, easting, northing):
+
+        #update location & depth
+        self.depth[idx] = self.depth[idx] + vertical_velocity * timeStep
+        self.lat[idx], self.lon[idx] = projectPositionXY(self.lat[idx], self.lon[idx], (northingV + northing) * timeStep, (eastingV + easting) * timeStep)
+
+        #calculate total distance traveled (m)
+        self.totalDistX[idx] += np.abs(eastingV + easting) * timeStep
+        self.totalDistY[idx] += np.abs(northingV + northing) * timeStep
+
+        self.destDist[idx] += np.sqrt((np.abs(eastingV + easting) * timeStep)**2 + (np.abs(northingV + northing) * timeStep)**2)
+        self.tripTime[idx] += timeStep/60
+
+        #calculate hypothetical location of glider if ocean currents didn't exist
+        self.lat_nocurrents[idx], self.lon_nocurrents[idx] = projectPositionXY(self.lat_nocurrents[idx], self.lon_nocurrents[idx], northingV * timeStep, eastingV * timeStep)
+
+    # ---------------------------------------------------------
+    # Advance the gliders timeStep seconds with the configured
+    # integrator, starting from the velocity of _glideVelocity
+    # (one ocean query for all gliders per further stage)
+    # ---------------------------------------------------------
+    def _integrateMove(self, idx, timeStep, vertical_velocity, eastingV, northingV, easting, northing):
+
+        still = (vertical_velocity == 0) & (eastingV == 0) & (northingV == 0) #held at the surface or on the floor
+        k1 = np.array([northingV + northing, eastingV + easting, vertical_velocity, northingV, eastingV])
+        y = np.zeros((5, len(idx)))
+        y[2] = self.depth[idx]
+        north, east, depth, northV, eastV = integrate(self.integrator, self._glideRates(idx, still), y, timeStep, k1, self.tolerance)
+
+        #update location & depth
+        self.depth[idx] = depth
+        self.lat[idx], self.lon[idx] = projectPositionXY(self.lat[idx], self.lon[idx], north, east)
+
+        #calculate total distance traveled (m)
+        self.totalDistX[idx] += np.abs(east)
+        self.totalDistY[idx] += np.abs(north)
+
+        self.destDist[idx] += np.sqrt(east**2 + north**2)
+        self.tripTime[idx] += timeStep/60
+
+        #calculate hypothetical location of glider if ocean currents didn't exist
+        self.lat_nocurrents[idx], self.lon_nocurrents[idx] = projectPositionXY(self.lat_nocurrents[idx], self.lon_nocurrents[idx], northV, eastV)
+
+    # ---------------------------------------------------------
+    # rates(select, offset, y) of the integrated state of the
+    # selected gliders from their current positions & times
+    # (Integrators.py, StepControl.py)
+    # ---------------------------------------------------------
+    def _glideRates(self, idx, still):
+
+        latStart, lonStart = self.lat[idx], self.lon[idx]
+        timeStart = self._oceanTimes(idx)
+
+        def rates(select, offset, y):
+            lat, lon = projectPositionXY(latStart[select], lonStart[select], y[0], y[1])
+            return self._stageRates(idx[select], timeStart[select] + offset, y[2], lat, lon, still[select])
+
+        return rates
+
+    # ---------------------------------------------------------
+    # Rate of the integrated state (north, east, depth, thru-water
+    # north & east) of the selected gliders at ocean times, from
+    # one ocean query; still gliders only drift with the currents
+    # ---------------------------------------------------------
+    def _stageRates(self, idx, times, depth, lat, lon, still):
+
+        easting, northing, salinity, temp, densCurr = self.oceanInfo.sampleManyWithDensity(times, np.maximum(depth, 0), lat, lon)
+        bad = (np.abs(salinity) > 35) | (np.abs(salinity) < 33) | (np.abs(temp) > 20) | (np.abs(temp) < 3)
+        if bad.any():
+            densCurr[bad] = sw.dens(self.salPrev[idx[bad]], self.tempPrev[idx[bad]], depth[bad]*1.45038*0.689476)
+
+        vertical_velocity, lateral_velocity = self._buoyancyVelocity(idx, densCurr)[2:]
+        vertical_velocity = np.where(still, 0, vertical_velocity)
+        lateral_velocity = np.where(still, 0, lateral_velocity)
+
+        #CHECK CURRENTS
+        bad = (np.abs(easting) > 10) | (np.abs(northing) > 10)
+        easting = np.where(bad, self.eastPrev[idx], easting)
+        northing = np.where(bad, self.northPrev[idx], northing)
+
+        eastingV = lateral_velocity * np.sin(self.bearing[idx] * np.pi / 180)
+        northingV = lateral_velocity * np.cos(self.bearing[idx] * np.pi / 180)
+
+        return np.array([northingV + northing, eastingV + easting, vertical_velocity, northingV, eastingV])
+
+    # ---------------------------------------------------------
+    # Surfacing bookkeeping for glider i (DAC, dive time, arrival)
+    # exact: the (adaptive) step ended exactly on the surface
+    # ---------------------------------------------------------
+    def _surface(self, i, vertical_velocity, timeStep, exact=False):
+
+        #update number of times glider surfaces
+        self.surfaceNum[i] += 1
+
+        #interpolate back in time to when the glider actually reached the surface
+        if exact:
+            time1 = self.date[i] + timeStep[i]
+        else:
+            time1 = np.interp(0, [self.depth[i] - vertical_velocity*timeStep[i], self.depth[i]], [self.date[i], self.date[i] + timeStep[i]])
+        self.date[i] = time1
+        self.depth[i] = 0
+
+        timeStep[i] = 0 #clock already moved to the surfacing time
+
+        #update location for kml file
+        self.reachSurfaceLat[i].append(self.lat[i])
+        self.reachSurfaceLon[i].append(self.lon[i])
+
+        currTime = (self.date[i] + timeStep[i] - self.timeStart[i])/60 #in minutes
+        description1 = 'Remaining energy: %.2f kWh \n Position (degrees lat, degrees lon): (%.2f, %.2f) \n Time: %.2f minutes' % (self.batteryPower[i], self.lat[i], self.lon[i], currTime)
+        self.surfaceDescriptions[i].append(description1)
+
+        #calculate depth-averaged current (difference between real lat/lon and lat/lon without currents since last surfacing)
+        difference = distance(self.lat[i], self.lon[i], self.lat_nocurrents[i], self.lon_nocurrents[i])
+        angle = bearing(self.lat_nocurrents[i], self.lon_nocurrents[i], self.lat[i], self.lon[i]) * np.pi / 180 #units in radians
+        diveTime = int(self.date[i] - self.timeStartIteration[i])
+        self.dac_north[i].append(difference * np.cos(angle) / diveTime)
+        self.dac_east[i].append(difference * np.sin(angle) / diveTime)
+        if self.record:
+            self.dacs.record(True, glider=i, times=(self.date[i] - self.timeStart[i])/60, lats=self.lat[i], lons=self.lon[i],
+                             dac_east=self.dac_east[i][-1], dac_north=self.dac_north[i][-1])
+
+        self.betweenSurfaceTimes[i].append(diveTime/60)
+
+        #check if glider is near target destination --> end glider
+        self._checkArrival(np.array([i]))
+
+        #Next iteration, loiter at surface
+        self.loitering[i] = True
+
+        self.timeStartIteration[i] = self.date[i] #reset for next iteration
+
+    # ---------------------------------------------------------
+    # End the selected gliders that are near their target
+    # ---------------------------------------------------------
+    def _checkArrival(self, idx):
+        arrived = distance(self.lat[idx], self.lon[idx], self.endLat[idx], self.endLon[idx]) < self.proximityToTarget
+        if arrived.any():
+            print('Reached destination!')
+            self.done[idx[arrived]] = True
+
+    # ---------------------------------------------------------
+    # Trip summary for glider i (the values GlidePath.py prints)
+    # ---------------------------------------------------------
+    def summary(self, i):
+        hotUse = self.hotelLoadUsed[i]
+        propUse = self.propulsionPowerUsed[i]
+        return {
+            'tripTime': self.tripTime[i], #minutes
+            'distance': self.destDist[i], #meters
+            'timesSurfaced': int(self.surfaceNum[i]),
+            'hotelEnergy': hotUse, #kWh
+            'propulsionEnergy': propUse, #kWh
+            'totalEnergy': hotUse + propUse, #kWh
+            'averageDiveTime': np.average(self.betweenSurfaceTimes[i]) if self.betweenSurfaceTimes[i] else np.nan, #minutes
+            'distanceToEndpoint': distance(self.lat[i], self.lon[i], self.endLat[i], self.endLon[i]), #meters
+        }
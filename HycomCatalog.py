@@ -0,0 +1,184 @@
+#!/usr/bin/python3
+
+#########################################################
+
+# this module indexes a directory of hycom type netcdf files
+# files contain a single time per file; time is specified by the 0-time (base date) & elapsed time (tau)
+# given in the file name, i.e. HYCOM_<yyyymmdd>_t<tau>.nc
+
+# the catalog is a sorted timestamp -> file index, built once per data directory
+# when two forecasts land on the same timestamp the most recent forecast run (latest base date) is kept
+# the catalog is saved next to the data & rebuilt when the directory contents change
+
+#########################################################
+# imports
+
+# standard imports
+import os
+import json
+import hashlib
+from bisect import bisect_right, bisect_left
+from datetime import datetime, timezone
+
+# name of the catalog file saved in the data directory
+CATALOG_FILE = '.hycomCatalog.json'
+
+# catalogs already loaded by this process, keyed by absolute directory path
+_catalogs = {}
+
+#########################################################
+# define function
+# this function parses a hycom filename into (base timestamp, file timestamp)
+# returns None if the filename does not follow the hycom naming convention
+
+def parseHycomName(fileName):
+    try:
+        # file base time
+        date0 = fileName.split('_')[-2] # filename string
+        baseDate = datetime(int(date0[:4]),int(date0[4:6]),int(date0[6:8])) # datetime
+        baseTimestamp = baseDate.replace(tzinfo=timezone.utc).timestamp() # timestamp with timezone adjustment
+
+        # time into model prediction
+        tau = fileName.split('_t')[-1]
+        tau = tau.split('.')[0] # hours
+
+        # netcdf file time
+        return int(baseTimestamp), int(baseTimestamp) + int(tau)*60*60 # unix timestamp
+    except (IndexError, ValueError):
+        return None
+
+#########################################################
+# define function
+# this function returns a signature of the netcdf files in a directory
+# the signature changes when files are added, removed or rewritten
+
+def directorySignature(path):
+    entries = []
+    for entry in os.scandir(path):
+        if entry.name.endswith('.nc'):
+            stat = entry.stat()
+            entries.append('%s:%d:%d'%(entry.name,stat.st_size,stat.st_mtime_ns))
+    entries.sort()
+
+    return hashlib.sha1('\n'.join(entries).encode()).hexdigest()
+
+#########################################################
+# define class
+# this class stores the sorted file times & filenames of a hycom directory
+
+class hycomCatalog:
+
+    #######################################################
+    # constructor
+    # times & files are parallel lists sorted by time
+
+    def __init__(self,path,times,files,signature):
+        self.path = path # path to netcdf files
+        self.times = times # netcdf file times, unix
+        self.files = files # netcdf filenames (no directory)
+        self.signature = signature # directory signature the catalog was built from
+
+    #######################################################
+    # define function
+    # this function builds a catalog by scanning the directory once
+
+    @classmethod
+    def build(cls,path):
+
+        # file time -> [base timestamp, filename] of preferred forecast
+        best = {}
+        for fileName in os.listdir(path):
+            if not fileName.endswith('.nc'):
+                continue
+            parsed = parseHycomName(fileName)
+            if parsed is None:
+                continue
+            baseTimestamp, timestamp = parsed
+
+            # duplicate forecast time: keep the most recent forecast run
+            if (timestamp not in best) or (baseTimestamp > best[timestamp][0]):
+                best[timestamp] = [baseTimestamp,fileName]
+
+        times = sorted(best)
+        files = [best[t][1] for t in times]
+
+        return cls(path,times,files,directorySignature(path))
+
+    #######################################################
+    # define function
+    # this function reads a saved catalog, returns None if missing, unreadable or stale
+
+    @classmethod
+    def read(cls,path):
+        try:
+            with open(os.path.join(path,CATALOG_FILE),'r') as file:
+                saved = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if saved.get('signature') != directorySignature(path):
+            return None
+
+        return cls(path,saved['times'],saved['files'],saved['signature'])
+
+    #######################################################
+    # define function
+    # this function saves the catalog next to the data (atomically)
+    # a read-only data directory is not an error, the catalog is simply rebuilt next time
+
+    def save(self):
+        catalogPath = os.path.join(self.path,CATALOG_FILE)
+        tmpPath = '%s.%d.tmp'%(catalogPath,os.getpid())
+        try:
+            with open(tmpPath,'w') as file:
+                json.dump({'signature': self.signature, 'times': self.times, 'files': self.files},file)
+            os.replace(tmpPath,catalogPath)
+        except OSError:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+
+    #######################################################
+    # define function
+    # this function returns the full path to the file at the given catalog index
+
+    def filePath(self,i):
+        return '%s/%s'%(self.path,self.files[i])
+
+    #######################################################
+    # define function
+    # this function returns the indices of the two files bracketing the timespan [t, t+dt]
+    # found by bisection on the sorted file times
+
+    def bracket(self,t,dt=0):
+        return bracketTimes(self.times,t,dt)
+
+#########################################################
+# define function
+# this function returns the indices of the two (sorted) times bracketing the timespan [t, t+dt]
+# returns None if the timespan is not covered
+
+def bracketTimes(times,t,dt=0):
+    lo = bisect_right(times,t) - 1
+    hi = max(lo+1,bisect_left(times,t+dt))
+
+    if lo < 0 or hi >= len(times):
+        return None
+
+    return lo, hi
+
+#########################################################
+# define function
+# this function returns the catalog for a directory
+# catalogs are built once per directory per process; the saved catalog is reused unless the directory changed
+
+def loadCatalog(path,refresh=False):
+    key = os.path.abspath(path)
+
+    if refresh or key not in _catalogs:
+        catalog = hycomCatalog.read(path)
+        if catalog is None:
+            catalog = hycomCatalog.build(path)
+            catalog.save()
+        _catalogs[key] = catalog
+
+    return _catalogs[key]
@@ -0,0 +1,290 @@
+#!/usr/bin/python3
+
+##################################################################################
+# Opt-in hot-path instrumentation & per-subsystem timing report
+#
+# enable() wraps the simulator's hot paths (HOT_PATHS: frame loads, density,
+# interpolation, ocean queries, bathymetry, geodesy, loiter drift, integration &
+# the step itself) with call counters & cumulative timers; disable() puts the
+# original functions back. Nothing is wrapped unless instrumentation is on, so
+# a normal run executes exactly the uninstrumented code.
+#
+# Timers nest: each keeps its calls, total (inclusive) time & self time (total
+# minus the instrumented calls made inside it). The self time of glider.update /
+# gliderFleet.step is the bookkeeping no other subsystem accounts for.
+#
+# instrumented() wraps a run: timers, optionally cProfile (pstats file) &
+# tracemalloc (peak & top allocation sites), then prints the breakdown &/or
+# dumps it as json. runMission (GlidePath.py) uses it with the config settings.
+#
+# Config ([General], optional; no instrumentation by default):
+#   instrument = 1              # time the hot paths & print the breakdown at the end of the run
+#   instrumentFile = run.json   # also dump the breakdown as json
+#   profileFile = run.prof      # also run under cProfile (top functions printed)
+#   traceMemory = 1             # also trace allocations with tracemalloc
+#
+# Usage:
+#   with instrumented(profileFile='fleet.prof') as stats:
+#       fleet.run(endTime)
+#   print(stats['timers']['OceanData.hycomModel.updateModel'])
+##################################################################################
+
+# Standard imports
+import io
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import importlib
+import functools
+import contextlib
+import tracemalloc
+
+# Instrumented functions: (subsystem, module, qualified name)
+HOT_PATHS = [
+    ('frame loads', 'OceanData', 'hycomModel.updateModel'),
+    ('density', 'OceanData', 'densityField'),
+    ('density', 'seawater.eos80', 'dens'),
+    ('interpolation', 'OceanData', 'oceanModel.interpAll'),
+    ('interpolation', 'OceanData', 'oceanModel.interpMany'),
+    ('ocean queries', 'OceanData', 'oceanData.currents'),
+    ('ocean queries', 'OceanData', 'oceanData.salAndTemp'),
+    ('ocean queries', 'OceanData', 'oceanData.rho'),
+    ('ocean queries', 'OceanData', 'oceanData.sample'),
+    ('ocean queries', 'OceanData', 'oceanData.sampleWithDensity'),
+    ('ocean queries', 'OceanData', 'oceanData.sampleMany'),
+    ('ocean queries', 'OceanData', 'oceanData.sampleManyWithDensity'),
+    ('bathymetry', 'BathyReader', 'bathymetryReader.getDepth'),
+    ('bathymetry', 'BathyReader', 'bathymetryReader.getDepths'),
+    ('bathymetry', 'BathyTiles', 'tiledBathymetryReader.getDepth'),
+    ('bathymetry', 'BathyTiles', 'tiledBathymetryReader.getDepths'),
+    ('bathymetry', 'BathyTiles', 'tiledBathymetryReader.getTile'),
+    ('bathymetry', 'BathyIndex', 'minDepthIndex.contact'),
+    ('bathymetry', 'BathyIndex', 'minDepthIndex.contactMany'),
+    ('bathymetry', 'BathyIndex', 'minDepthIndex.contactFraction'),
+    ('geodesy', 'NavUtils', 'projectPositionXY'),
+    ('geodesy', 'NavUtils', 'bearing'),
+    ('geodesy', 'NavUtils', 'distance'),
+    ('loiter', 'GlidePath', 'glider.drift'),
+    ('loiter', 'GliderFleet', 'gliderFleet._loiter'),
+    ('integration', 'Integrators', 'integrate'),
+    ('step', 'GlidePath', 'glider.update'),
+    ('step', 'GliderFleet', 'gliderFleet.step'),
+]
+
+# Functions listed in the report & profile
+TOP_FUNCTIONS = 15
+
+# Timers by name: [subsystem, calls, total seconds, self seconds]
+_timers = {}
+
+# Instrumented time of the calls in progress made inside the current one
+_children = []
+
+# Wrapped functions: (owner, attribute, original, wrapper)
+_patches = []
+
+# ---------------------------------------------------------
+# Instrumentation settings from the config, as instrumented() arguments
+# ---------------------------------------------------------
+def instrumentSettings(configRead):
+    def optional(key, read):
+        return read('General', key) if configRead.hasKey('General', key) else None
+
+    instrumentFile = optional('instrumentFile', configRead.getString)
+    profileFile = optional('profileFile', configRead.getString)
+    traceMemory = bool(optional('traceMemory', configRead.getInt))
+    enabled = bool(optional('instrument', configRead.getInt)) or instrumentFile is not None or profileFile is not None or traceMemory
+
+    return {'enabled': enabled, 'instrumentFile': instrumentFile, 'profileFile': profileFile, 'traceMemory': traceMemory}
+
+# ---------------------------------------------------------
+# Counting & timing wrapper of fn for timer name
+# ---------------------------------------------------------
+def _timed(name, subsystem, fn):
+    timer = _timers.setdefault(name, [subsystem, 0, 0.0, 0.0])
+    clock = time.perf_counter
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        _children.append(0.0)
+        start = clock()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = clock() - start
+            timer[1] += 1
+            timer[2] += elapsed
+            timer[3] += elapsed - _children.pop()
+            if _children:
+                _children[-1] += elapsed
+
+    return wrapper
+
+# ---------------------------------------------------------
+# Module of a hot path: the running script when it is that module
+# (python GlidePath.py), imported otherwise
+# ---------------------------------------------------------
+def _module(moduleName):
+    main = sys.modules.get('__main__')
+    mainFile = getattr(main, '__file__', None) or ''
+    if os.path.splitext(os.path.basename(mainFile))[0] == moduleName:
+        return main
+    return importlib.import_module(moduleName)
+
+# ---------------------------------------------------------
+# Wrap every hot path (no-op if already enabled); module level
+# functions are also replaced where other modules imported them
+# ---------------------------------------------------------
+def enable():
+    if _patches:
+        return
+
+    for subsystem, moduleName, qualname in HOT_PATHS:
+        owner = _module(moduleName)
+        *path, attribute = qualname.split('.')
+        for name in path:
+            owner = getattr(owner, name)
+        original = owner.__dict__[attribute]
+        wrapper = _timed(moduleName + '.' + qualname, subsystem, original)
+
+        setattr(owner, attribute, wrapper)
+        _patches.append((owner, attribute, original, wrapper))
+        if not path:
+            # from module import function
+            for module in list(sys.modules.values()):
+                for key, value in list(getattr(module, '__dict__', {}).items()):
+                    if value is original:
+                        setattr(module, key, wrapper)
+                        _patches.append((module, key, original, wrapper))
+
+# ---------------------------------------------------------
+# Put the original functions back (the timers are kept)
+# ---------------------------------------------------------
+def disable():
+    originals = {}
+    while _patches:
+        owner, attribute, original, wrapper = _patches.pop()
+        setattr(owner, attribute, original)
+        originals[id(wrapper)] = original
+
+    # modules imported while enabled picked up wrappers too
+    for module in list(sys.modules.values()):
+        for key, value in list(getattr(module, '__dict__', {}).items()):
+            if id(value) in originals:
+                setattr(module, key, originals[id(value)])
+
+# ---------------------------------------------------------
+# Zero the timers (in place: enabled wrappers keep counting)
+# ---------------------------------------------------------
+def reset():
+    for timer in _timers.values():
+        timer[1:] = [0, 0.0, 0.0]
+
+# ---------------------------------------------------------
+# Timers as {name: {subsystem, calls, total, self}} (seconds)
+# ---------------------------------------------------------
+def timers():
+    return {name: {'subsystem': subsystem, 'calls': calls, 'total': total, 'self': own}
+            for name, (subsystem, calls, total, own) in _timers.items() if calls}
+
+# ---------------------------------------------------------
+# Run the enclosed code instrumented; yields a dict filled at the
+# end with wall (s), timers, memory & profile (pstats file).
+# Not enabled: runs the code as it is & yields None
+# ---------------------------------------------------------
+@contextlib.contextmanager
+def instrumented(enabled=True, instrumentFile=None, profileFile=None, traceMemory=False, printReport=True):
+    if not enabled:
+        yield None
+        return
+
+    stats = {}
+    reset()
+    enable()
+    profiler = cProfile.Profile() if profileFile is not None else None
+    tracing = traceMemory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield stats
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        stats['wall'] = time.perf_counter() - start
+        disable()
+        stats['timers'] = timers()
+
+        if traceMemory:
+            current, peak = tracemalloc.get_traced_memory()
+            sites = tracemalloc.take_snapshot().statistics('lineno')[:TOP_FUNCTIONS]
+            stats['memory'] = {'current': current, 'peak': peak,
+                               'sites': [{'site': str(site.traceback), 'size': site.size, 'count': site.count} for site in sites]}
+            if tracing:
+                tracemalloc.stop()
+
+        if profiler is not None:
+            profiler.dump_stats(profileFile)
+            stats['profile'] = profileFile
+
+        if printReport:
+            print(report(stats))
+        if instrumentFile is not None:
+            dump(stats, instrumentFile)
+
+# ---------------------------------------------------------
+# Printable breakdown of instrumented() stats: self time per
+# subsystem, then every timer, memory & the profile's top functions
+# ---------------------------------------------------------
+def report(stats):
+    wall = stats['wall']
+    lines = ['#################################', '  Instrumented run: %.3f s' % wall, '']
+
+    subsystems = {}
+    for timer in stats['timers'].values():
+        subsystems[timer['subsystem']] = subsystems.get(timer['subsystem'], 0) + timer['self']
+    subsystems['uninstrumented'] = wall - sum(subsystems.values())
+    lines.append('  %-24s %10s %7s' % ('subsystem (self time)', 'seconds', 'share'))
+    for subsystem, seconds in sorted(subsystems.items(), key=lambda item: -item[1]):
+        lines.append('  %-24s %10.3f %6.1f%%' % (subsystem, seconds, 100*seconds/wall if wall else 0))
+
+    lines += ['', '  %-44s %10s %10s %10s %10s' % ('timer', 'calls', 'total (s)', 'self (s)', 'per call')]
+    for name, timer in sorted(stats['timers'].items(), key=lambda item: -item[1]['self']):
+        lines.append('  %-44s %10d %10.3f %10.3f %8.1f us' % (name, timer['calls'], timer['total'], timer['self'], 1e6*timer['total']/timer['calls']))
+
+    if 'memory' in stats:
+        memory = stats['memory']
+        lines += ['', '  Memory: peak %.1f MB traced, %.1f MB at the end; top allocation sites:' % (memory['peak']/2**20, memory['current']/2**20)]
+        for site in memory['sites'][:5]:
+            lines.append('    %10.1f kB %8d blocks  %s' % (site['size']/2**10, site['count'], site['site']))
+
+    if 'profile' in stats:
+        lines += ['', '  cProfile (%s), top functions by cumulative time:' % stats['profile']]
+        text = [line for line in _profileText(stats['profile']).splitlines() if line.strip()]
+        lines += ['    ' + line for line in text]
+
+    lines.append('#################################')
+    return '\n'.join(lines)
+
+# ---------------------------------------------------------
+# Top functions of a pstats file by cumulative time, as text
+# ---------------------------------------------------------
+def _profileText(profileFile):
+    stream = io.StringIO()
+    profile = pstats.Stats(profileFile, stream=stream)
+    profile.strip_dirs().sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    text = stream.getvalue()
+    return text[text.find('ncalls'):] if 'ncalls' in text else text
+
+# ---------------------------------------------------------
+# Write instrumented() stats to a json file
+# ---------------------------------------------------------
+def dump(stats, fileName):
+    with open(fileName, 'w') as file:
+        json.dump(stats, file, indent=2)
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+
+##################################################################################
+# Explicit Runge-Kutta integrators for the glide state
+#
+# The state of a step is (north, east, depth, northV, eastV): displacement over
+# ground & through the water (m) from the start of the step, & depth (m). Its
+# rate is the glider velocity plus the ocean currents, so every stage samples
+# the ocean once (one oceanData.sampleWithDensity / sampleManyWithDensity call per stage).
+#
+#   euler     1 stage, currents sampled at the start of the step (default)
+#   midpoint  2 stages
+#   rk4       4 stages, classic Runge-Kutta
+#   rk45      Dormand-Prince 5(4): the step is split into substeps whose length
+#             is set by the embedded error estimate (max displacement error per
+#             substep <= tolerance, m); the last stage of a substep is the first
+#             of the next (FSAL), so a substep costs 6 samples
+#
+# Surface loiter drift uses rk45 on (north, east) alone, with the currents.
+#
+# rates(select, offset, y) returns dy/dt for the columns select of the batch,
+# at offset seconds into the step; y is (dims, len(select)). Stage 1 (k1) is the
+# velocity the glider computed at the start of the step, so it is not sampled.
+#
+# Config ([General], optional):
+#   integrator = rk4             # euler, midpoint, rk4 or rk45 (default euler)
+#   integratorTolerance = 0.1    # rk45 error per substep, m (default 0.1)
+##################################################################################
+
+# Standard imports
+import numpy as np
+
+# Butcher tableaus: nodes c, coefficients a, weights b (rk45: 5th & 4th order)
+TABLEAUS = {
+    'euler': ([0], [[]], [[1]]),
+    'midpoint': ([0, 1/2], [[], [1/2]], [[0, 1]]),
+    'rk4': ([0, 1/2, 1/2, 1], [[], [1/2], [0, 1/2], [0, 0, 1]], [[1/6, 1/3, 1/3, 1/6]]),
+    'rk45': ([0, 1/5, 3/10, 4/5, 8/9, 1, 1],
+             [[], [1/5], [3/40, 9/40], [44/45, -56/15, 32/9],
+              [19372/6561, -25360/2187, 64448/6561, -212/729],
+              [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+              [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84]],
+             [[35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0],
+              [5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40]]),
+}
+METHODS = tuple(TABLEAUS)
+
+# Default rk45 tolerance (m) & shortest substep (s), below which substeps are accepted as is
+TOLERANCE = 0.1
+MIN_STEP = 1e-3
+
+# ---------------------------------------------------------
+# Integrator settings from the config: (method, tolerance)
+# ---------------------------------------------------------
+def integratorSettings(configRead):
+    method = configRead.getString('General', 'integrator').lower() if configRead.hasKey('General', 'integrator') else 'euler'
+    if method not in TABLEAUS:
+        raise Exception("Unknown integrator %s (use one of %s)" % (method, ', '.join(METHODS)))
+    tolerance = configRead.getFloat('General', 'integratorTolerance') if configRead.hasKey('General', 'integratorTolerance') else TOLERANCE
+
+    return method, tolerance
+
+# ---------------------------------------------------------
+# One Runge-Kutta step of length h for the columns select,
+# starting offset seconds into the step with rate k1
+# returns the new state for each weight row & the last stage
+# ---------------------------------------------------------
+def rungeKutta(method, rates, select, offset, y, h, k1):
+    c, a, b = TABLEAUS[method]
+
+    stages = [k1]
+    for i in range(1, len(c)):
+        stages.append(rates(select, offset + c[i]*h, y + h*sum(a[i][j]*stages[j] for j in range(i) if a[i][j])))
+
+    return [y + h*sum(w[j]*stages[j] for j in range(len(stages)) if w[j]) for w in b], stages[-1]
+
+# ---------------------------------------------------------
+# Advance the states y (dims, n) by dt (n,) seconds
+# k1 is the rate at the start of the step (dims, n)
+# ---------------------------------------------------------
+def integrate(method, rates, y, dt, k1, tolerance=TOLERANCE):
+    y = np.asarray(y, dtype=float)
+    dt = np.asarray(dt, dtype=float)
+    everyone = np.arange(y.shape[1])
+
+    if method != 'rk45':
+        return rungeKutta(method, rates, everyone, np.zeros(len(dt)), y, dt, k1)[0][0]
+
+    # error controlled substeps, one batch of (unfinished) columns at a time
+    y = y.copy()
+    k1 = np.array(k1, dtype=float)
+    remaining = dt.copy()
+    h = dt.copy()
+    while True:
+        select = everyone[remaining > 0]
+        if not len(select):
+            return y
+
+        last = h[select] >= remaining[select]
+        hs = np.where(last, remaining[select], h[select])
+        (y5, y4), k7 = rungeKutta(method, rates, select, dt[select] - remaining[select], y[:,select], hs, k1[:,select])
+
+        error = np.max(np.abs(y5 - y4), axis=0)
+        accept = (error <= tolerance) | (hs <= MIN_STEP)
+        done = select[accept]
+        y[:,done] = y5[:,accept]
+        k1[:,done] = k7[:,accept]
+        remaining[done] = np.where(last[accept], 0, remaining[done] - hs[accept])
+
+        # next substep length from the error estimate (order 5)
+        with np.errstate(divide='ignore'):
+            factor = np.clip(0.9*(tolerance/error)**0.2, 0.2, 5)
+        h[select] = np.maximum(hs*factor, MIN_STEP)
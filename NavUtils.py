@@ -8,7 +8,6 @@ import math
 import time
 import datetime
 import numpy as np
-from scipy.spatial.transform import Rotation as sstr
 
 # Approximate earth radius (meters)
 # Use the mean of polar & equatorial radii
@@ -40,9 +39,8 @@ def atand(x):
     return np.rad2deg(np.arctan(x))
 def atan2d(y, x):
     phi = np.rad2deg(np.arctan2(y, x))
-    # Normalize to [0,360]
-    if (phi < 0):
-        phi = phi + 360
+    # Normalize to [0,360] (elementwise, so arrays work too)
+    phi = phi + 360 * (phi < 0)
     return phi
 
 #########################################################################
@@ -197,6 +195,7 @@ def norm360(theta):
 def body2Inertial( vBody,
                    roll, pitch, heading,
                    isDegrees=True ):  # else radians
+    from scipy.spatial.transform import Rotation as sstr # only the rotations need scipy
     # Form rotation
     rot = sstr.from_euler('xyz',
                           [roll,pitch,heading],
@@ -213,6 +212,7 @@ def body2Inertial( vBody,
 def inertial2Body( vInertial,
                    roll, pitch, heading,
                    isDegrees=True ):
+    from scipy.spatial.transform import Rotation as sstr # only the rotations need scipy
     # Form rotation & invert
     rot = (sstr.from_euler('xyz',
                            [roll,pitch,heading],
@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+
+#########################################################
+
+# this module converts a directory of hycom type netcdf files into one consolidated ocean cube
+# the cube is a raw binary (frame, depth, lat, lon, field) float32 array, fields ordered as FIELDS
+# (the netcdf variables & the in-situ density field computed from them)
+# each frame is one contiguous chunk, so selecting a frame is a pointer move into the file
+# a small json header next to it holds the axes, frame times & the directory signature it was built from
+
+# the cube is opened with np.memmap; only the pages of the frames actually used are read from disk
+# the cube is rebuilt when the netcdf directory changes (same signature check as the catalog)
+
+# usage: python OceanCube.py <hycomDirectory>
+
+#########################################################
+# imports
+
+# standard imports
+import os
+import sys
+import json
+import numpy as np
+from netCDF4 import Dataset
+
+# class imports
+from HycomCatalog import loadCatalog
+from OceanData import VARIABLES, FIELDS, densityField
+
+# names of the cube files saved in the data directory
+CUBE_HEADER = '.hycomCube.json'
+CUBE_DATA = '.hycomCube.f32'
+
+# cube data type; hycom variables are packed int16 that decode to float32, so no precision is lost
+CUBE_DTYPE = 'float32'
+
+#########################################################
+# define function
+# this function returns the header & data file paths of the cube for a hycom directory
+
+def cubePaths(path):
+    return os.path.join(path,CUBE_HEADER), os.path.join(path,CUBE_DATA)
+
+#########################################################
+# define function
+# this function converts every netcdf file of the directory into the cube, frame by frame
+# the data file is written first & the header last, both atomically, so a partial cube is never opened
+
+def buildCube(path):
+    headerPath, dataPath = cubePaths(path)
+    catalog = loadCatalog(path,refresh=True)
+    if not catalog.times:
+        raise Exception("No hycom files in %s"%path)
+
+    # axes from the first file, shared by all files of the directory
+    dataset = Dataset(catalog.filePath(0),'r')
+    depthGrid = np.asarray(dataset.variables['depth'][:],dtype=float).tolist()
+    latGrid = np.asarray(dataset.variables['lat'][:],dtype=float).tolist()
+    lonGrid = np.asarray(dataset.variables['lon'][:],dtype=float).tolist()
+    dataset.close()
+
+    shape = (len(catalog.times),len(depthGrid),len(latGrid),len(lonGrid),len(FIELDS))
+
+    tmpData = '%s.%d.tmp'%(dataPath,os.getpid())
+    frames = np.memmap(tmpData,dtype=CUBE_DTYPE,mode='w+',shape=shape)
+    for i in range(len(catalog.times)):
+        dataset = Dataset(catalog.filePath(i),'r')
+        for v, name in enumerate(VARIABLES):
+            # masked (land / below floor) points keep their fill value, as in hycomModel
+            frames[i,...,v] = np.ma.getdata(dataset.variables[name][0])
+        frames[i,...,len(VARIABLES)] = densityField(depthGrid,frames[i,...,2],frames[i,...,3])
+        dataset.close()
+    frames.flush()
+    del frames
+    os.replace(tmpData,dataPath)
+
+    header = {'signature': catalog.signature, 'variables': FIELDS, 'dtype': CUBE_DTYPE, 'shape': list(shape),
+              'times': catalog.times, 'depth': depthGrid, 'lat': latGrid, 'lon': lonGrid}
+    tmpHeader = '%s.%d.tmp'%(headerPath,os.getpid())
+    with open(tmpHeader,'w') as file:
+        json.dump(header,file)
+    os.replace(tmpHeader,headerPath)
+
+    return header
+
+#########################################################
+# define function
+# this function reads the cube header, returns None if missing, unreadable or stale
+
+def readCubeHeader(path):
+    headerPath, dataPath = cubePaths(path)
+    try:
+        with open(headerPath,'r') as file:
+            header = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if header.get('signature') != loadCatalog(path).signature or header.get('variables') != FIELDS:
+        return None
+    if not os.path.exists(dataPath):
+        return None
+
+    return header
+
+#########################################################
+# define function
+# this function opens the cube of a hycom directory, building it first if needed
+# returns the header & the read-only memory-mapped (frame, depth, lat, lon, var) array
+
+def openCube(path,build=True):
+    header = readCubeHeader(path)
+    if header is None:
+        if not build:
+            return None
+        header = buildCube(path)
+
+    frames = np.memmap(cubePaths(path)[1],dtype=header['dtype'],mode='r',shape=tuple(header['shape']))
+
+    return header, frames
+
+# ------------------------------------------------------------
+# App Main Entry Point
+# ------------------------------------------------------------
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        header = buildCube(path)
+        print('%s: %d frames, %s, written to %s'%(path,header['shape'][0],'x'.join(str(n) for n in header['shape']),cubePaths(path)[1]))
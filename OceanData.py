@@ -16,7 +16,37 @@
 ## imports
 
 ## standard imports
-from scipy.interpolate import RegularGridInterpolator
+import numpy as np
+from seawater import eos80 #make sure this is downloaded
+
+## class imports
+from OceanInterp import quadKernel
+
+## netcdf variables read from the ocean files
+VARIABLES = ['water_u','water_v','salinity','water_temp']
+
+## order of fields in the fused (stacked) ocean grid: the netcdf variables & in-situ density
+FIELDS = VARIABLES + ['density']
+
+## fill value of masked (land / below floor) points
+FILL_VALUE = -30000
+
+#################################################################################################################
+## define function
+## this function computes the in-situ density field (EOS-80, kg/m^3) of salinity & temperature grids
+## grids are (..., depth, lat, lon); pressure is taken as the depth in m (dbar); masked points get the fill value
+
+def densityField(depthGrid,salinity,temperature):
+    
+    salinity = np.asarray(salinity,dtype=float)
+    temperature = np.asarray(temperature,dtype=float)
+    masked = (salinity <= FILL_VALUE) | (temperature <= FILL_VALUE)
+    
+    pressure = np.asarray(depthGrid,dtype=float)[:,None,None]
+    with np.errstate(invalid='ignore'):
+        density = eos80.dens(np.where(masked,0,salinity),np.where(masked,0,temperature),pressure)
+    
+    return np.where(masked,FILL_VALUE,density)
 
 #################################################################################################################
 ## define base class
@@ -35,32 +65,70 @@ class oceanModel:
         self.latGrid = [] # netcdf lat grid, deg N
         self.lonGrid = [] # netcdf lon grid, deg E
         self.varGrid = [] # desired ocean variable grid
-        self.interp = [0, 0, 0, 0]
+        self.fusedGrid = None # all variables stacked on one (time, depth, lat, lon, var) grid
+        self.kernel = None # interpolation engine for the fused grid
+        
+    #################################################################################################################
+    ## define function
+    ## this function stacks the ocean variable grids (ordered as VARIABLES) & their density field
+    ## into the fused (time, depth, lat, lon, field) grid
+    
+    def setGrids(self,timeGrid,depthGrid,latGrid,lonGrid,grids):
+        
+        ## masked (land / below floor) points keep their fill value, as in the per-variable grids
+        grids = [np.asarray(grid) for grid in grids]
+        grids.append(densityField(depthGrid,grids[2],grids[3]).astype(grids[2].dtype))
+        self.setFusedGrid(timeGrid,depthGrid,latGrid,lonGrid,np.stack(grids,axis=-1))
         
     #################################################################################################################
     ## define function
-    ## this function defines an interpolation method to get ocean currents at specified time, depth, lat & lon          
+    ## this function stores an already fused (time, depth, lat, lon, var) grid, without copying it
     
-    def interp3(self,time_,depth,lat,lon,index): #takes 0.002 seconds to run
+    def setFusedGrid(self,timeGrid,depthGrid,latGrid,lonGrid,fusedGrid):
+        
+        self.timeGrid = timeGrid
+        self.depthGrid = np.asarray(depthGrid,dtype=float)
+        self.latGrid = np.asarray(latGrid,dtype=float)
+        self.lonGrid = np.asarray(lonGrid,dtype=float)
+        
+        self.fusedGrid = fusedGrid
+        self.kernel = quadKernel(self.timeGrid,self.depthGrid,self.latGrid,self.lonGrid,self.fusedGrid)
+        
+    #################################################################################################################
+    ## define function
+    ## this function interpolates all ocean fields (ordered as FIELDS) at specified time, depth, lat & lon in one pass
+    ## the 16 corner weights are computed once & applied to every variable
+    
+    def interpAll(self,time_,depth,lat,lon):
         
         if depth < 0:
             depth = 0
 
-        ## call interpolator object function to interpolate for specified time, depth, lat & lon point
         lonUse = lon
         if(lon < 0):
             lonUse = 360+lon
         
-        try:        
-            var = self.interp[index]([time_,depth,lat,lonUse])
-        except:
-            print(time_)
-            print(depth)
-            print(lat)
-            print(lonUse)
-            raise Exception("Out of range")
-
-        return var
+        return self.kernel.sample(time_,depth,lat,lonUse)
+        
+    #################################################################################################################
+    ## define function
+    ## this function interpolates all ocean variables at arrays of times, depths, lats & lons in one vectorized pass
+    ## returns an (n points, n variables) array
+    
+    def interpMany(self,times,depths,lats,lons):
+        
+        depths = np.maximum(depths,0)
+        lonsUse = np.where(lons < 0,lons+360,lons)
+        
+        return self.kernel.sampleMany(times,depths,lats,lonsUse)
+        
+    #################################################################################################################
+    ## define function
+    ## this function defines an interpolation method to get a single ocean variable at specified time, depth, lat & lon          
+    
+    def interp3(self,time_,depth,lat,lon,index): #timings: benchmarks/RunBenchmarks.py
+        
+        return self.interpAll(time_,depth,lat,lon)[index:index+1]
 
 
 # In[101]:
@@ -90,6 +158,7 @@ sys.path.insert(1,'../..')
 
 # class import
 #from oceanModel import *
+from HycomCatalog import loadCatalog, bracketTimes
 
 #########################################################
 # define class
@@ -104,7 +173,18 @@ class hycomModel(oceanModel):
     # this constructor inherits all characteristics (self & functions) from oceanModel class
     # this constructor stores ocean file (netcdf) data
     
-    pass
+    def __init__(self):
+        super().__init__()
+        self.catalog = None # hycom directory catalog (file times & filenames)
+        self.validFrom = float('inf') # start of timespan covered by stored data, unix (empty until first update)
+        self.validUntil = float('-inf') # end of timespan covered by stored data, unix (exclusive)
+        self.frameListeners = [] # functions called as f(oldWindow, newWindow) when the stored frames expire
+        self.frames = None # all frames, (frame, depth, lat, lon, var), when wrapping an existing buffer
+        self.frameTimes = [] # times of all frames, unix
+        self.windowHalo = None # lat/lon margin kept around the glider when loading a window of the grid, km (None: whole grid)
+        self.windowDepth = None # depth cutoff of the window, m (None: all depths)
+        self.windowRegion = None # (max depth, min lat, max lat, min lon, max lon) the window is placed around
+        self.windowBounds = None # (max depth, min lat, max lat, min lon, max lon) of positions served by the stored window
 		
     #######################################################
     # define function
@@ -116,103 +196,185 @@ class hycomModel(oceanModel):
         
         return self.timeGrid[0],self.timeGrid[-1]
 	
+    #######################################################
+    # define function
+    # this function checks if a (float) time is covered by the stored ocean data
+    # the window is half-open, [validFrom, validUntil), so the frame expires exactly at the next file time
+	
+    def covers(self,t):
+        
+        return self.validFrom <= t < self.validUntil
+	
+    #######################################################
+    # define function
+    # this function registers a function to be called when the stored frames expire & new ones are loaded
+	
+    def addFrameListener(self,listener):
+        
+        self.frameListeners.append(listener)
+	
+    #######################################################
+    # define function
+    # this function enables windowed loading: only the hyperslab around the glider is read for each frame
+    # the window spans halo km around the glider's position & reaches one layer below maxDepth
+    # it is moved when the glider gets within half a halo of its edge (or below its deepest layer)
+	
+    def setWindow(self,halo,maxDepth=None):
+        
+        self.windowHalo = halo
+        self.windowDepth = maxDepth
+        self.windowRegion = None
+        self.windowBounds = None
+	
+    #######################################################
+    # define function
+    # this function checks if a position (lon in deg E, either convention) is served by the stored window
+	
+    def inWindow(self,depth,lat,lon):
+        
+        bounds = self.windowBounds
+        if bounds is None:
+            return self.windowHalo is None
+        
+        if lon < 0:
+            lon = 360+lon
+        return depth <= bounds[0] and bounds[1] <= lat <= bounds[2] and bounds[3] <= lon <= bounds[4]
+	
+    #######################################################
+    # define function
+    # this function returns the depth, lat & lon slices of the window for the full grid axes
+    # & stores the bounds of the positions it serves
+	
+    def windowSlices(self,depthGrid,latGrid,lonGrid):
+        
+        if self.windowHalo is None or self.windowRegion is None:
+            self.windowBounds = None
+            return slice(None),slice(None),slice(None)
+        
+        depthGrid, latGrid, lonGrid = [np.asarray(grid,dtype=float) for grid in (depthGrid,latGrid,lonGrid)]
+        depth, latMin, latMax, lonMin, lonMax = self.windowRegion
+        
+        # halo in degrees (1 deg lat = 111.32 km)
+        dLat = self.windowHalo/111.32
+        dLon = self.windowHalo/(111.32*np.cos(np.radians(max(abs(latMin),abs(latMax)))))
+        
+        # depth layers down to the first one below the cutoff, lat/lon cells covering the halo
+        cutoff = depth if self.windowDepth is None else max(depth,self.windowDepth)
+        z1 = min(len(depthGrid),int(np.searchsorted(depthGrid,cutoff,side='left'))+2)
+        y0 = max(0,int(np.searchsorted(latGrid,latMin-dLat,side='right'))-1)
+        y1 = min(len(latGrid),int(np.searchsorted(latGrid,latMax+dLat,side='left'))+1)
+        x0 = max(0,int(np.searchsorted(lonGrid,lonMin-dLon,side='right'))-1)
+        x1 = min(len(lonGrid),int(np.searchsorted(lonGrid,lonMax+dLon,side='left'))+1)
+        
+        # positions served: inside the window less half a halo (the full window on sides at the grid edge)
+        self.windowBounds = (depthGrid[z1-1] if z1 < len(depthGrid) else float('inf'),
+                             latGrid[y0]+dLat/2 if y0 > 0 else float('-inf'),
+                             latGrid[y1-1]-dLat/2 if y1 < len(latGrid) else float('inf'),
+                             lonGrid[x0]+dLon/2 if x0 > 0 else float('-inf'),
+                             lonGrid[x1-1]-dLon/2 if x1 < len(lonGrid) else float('inf'))
+        
+        return slice(0,z1),slice(y0,y1),slice(x0,x1)
+	
+    #######################################################
+    # define function
+    # this function wraps an existing buffer holding every frame (e.g. shared memory or a memory-mapped cube) instead of reading netcdf files
+    # frames is a (frame, depth, lat, lon, field) array, fields ordered as FIELDS; it is never copied
+	
+    def attachFrames(self,frameTimes,depthGrid,latGrid,lonGrid,frames):
+        
+        self.frameTimes = list(frameTimes)
+        self.frameDepthGrid = depthGrid
+        self.frameLatGrid = latGrid
+        self.frameLonGrid = lonGrid
+        self.frames = frames
+        self.validFrom = float('inf')
+        self.validUntil = float('-inf')
+	
+    #######################################################
+    # define function
+    # this function memory-maps the consolidated ocean cube of a hycom directory (built on first use)
+    # frame switches then select views of the mapped file instead of decoding netcdf files
+	
+    def openCube(self,path):
+        
+        from OceanCube import openCube
+        header, frames = openCube(path)
+        self.attachFrames(header['times'],header['depth'],header['lat'],header['lon'],frames)
+	
+    #######################################################
+    # define function
+    # this function returns the sorted times of every frame available to the model
+	
+    def availableTimes(self,path):
+        
+        if self.frames is not None:
+            return self.frameTimes
+        
+        if self.catalog is None or self.catalog.path != path:
+            self.catalog = loadCatalog(path)
+        return self.catalog.times
+	
     #######################################################
     # define function
     # this function reads & updates/saves applicable netcdf data to class (if necessary)
     
-    def updateModel(self,path,t,dt): #updating model takes 3.7 seconds
-        date1 = (datetime.utcfromtimestamp(int(t))).strftime('%Y%m%d')
-        add = (dt/(24*60*60))+1
-        date2 = int((datetime.utcfromtimestamp(int(t+dt))).strftime('%Y%m%d'))+int(add)
+    def updateModel(self,path,t,dt,depths=None,lats=None,lons=None): #timed by benchmarks/RunBenchmarks.py (ocean.updateModel)
         
-	# get directory list (NetCDF files list)	
-        dir = os.listdir(path)
-		
-	# build array to store netcdf file times
-        fileTimes = []
-
-        for file in dir:
-            if file.endswith('.nc'):
-		# if desired date found in filename
-                if (date1 in file) or (str(date2) in file):
-                
-                    # full path to individual netcdf file
-                    file = '%s/%s'%(path,file)
-                
-                    # file base time
-                    date0 = file.split('_')[-2] # filename string
-                  
-                    year0 = int(date0[:4])
-                    month0 = int(date0[4:6])
-                    day0 = int(date0[6:8])
-                    
-                    baseDate = datetime(year0,month0,day0) # datetime
-                    baseTimestamp = baseDate.replace(tzinfo=timezone.utc).timestamp() # timestamp with timezone adjustment
-                    
-                    # time into model prediction
-                    tau = file.split('_t')[-1] 
-                    tau = tau.split('.')[0] # hours
-
-                    # netcdf file time
-                    timestamp = baseTimestamp + int(tau)*60*60 # unix timestamp
-                    
-                    timestamps = []
-                    for line in fileTimes:
-                        timestamps.append(line[0])
-                    fileOptions = []
-                    if timestamp in timestamps:
-                        fileOptions.append([baseTimestamp,file])
-                        idx = [i for i, x in enumerate(timestamps) if x == timestamp]
-                        file1 = fileTimes[idx[0]][1]
-                        date1 = file1.split('_')[-2] # filename string
-                        year1 = int(date1[:4])
-                        month1 = int(date1[4:6])
-                        day1 = int(date1[6:8])
-                        baseDate1 = datetime(year1,month1,day1) # datetime
-                        baseTimestamp1 = baseDate1.replace(tzinfo=timezone.utc).timestamp() # timestamp with timezone adjustment
-                        fileOptions.append([baseTimestamp1,file1])
-                        fileOptions = sorted(fileOptions)
-                        fileRm = fileOptions[0][1]
-                        fileTimes.append([int(timestamp),file])
-                        fileTimes = [x for x in fileTimes if fileRm not in x]
-                            
-                    else:
-                        # append file time to all file times array
-                        fileTimes.append([int(timestamp),file])
-
-        # add desired bracketing file times to netcdf file times data
-        fileTimes.append([int(t),'flag1'])
-        fileTimes.append([int(t+dt),'flag2'])
-
-        # sort file times array by time
-        fileTimes = sorted(fileTimes)
-
-        # find indices of files containing times bracketing interpolation times
-        for i, item in enumerate(fileTimes):
-
-            if 'flag1' in fileTimes[i][1]:
-                ele1 = i
-                                        
-            if 'flag2' in fileTimes[i][1]:
-                ele2 = i
+        oldWindow = (self.validFrom,self.validUntil)
         
-        # save time bracketing files filenames       
-        bracketFiles = []
-
-        for j in range(ele1-1,ele2+2):
-            if ('flag1' not in fileTimes[:][j]) & ('flag2' not in fileTimes[:][j]):
-                bracketFiles.append(fileTimes[:][j])
-            
-        sorted(bracketFiles)
+        # place the lat/lon/depth window around the positions to serve (when windowed)
+        if self.windowHalo is not None and lats is not None:
+            depths, lats, lons = [np.asarray(x,dtype=float) for x in (depths,lats,lons)]
+            lons = np.where(lons < 0,lons+360,lons)
+            self.windowRegion = (float(np.max(depths)),float(np.min(lats)),float(np.max(lats)),float(np.min(lons)),float(np.max(lons)))
+        
+        if self.frames is not None:
+            self.viewFrames(t,dt)
+        else:
+            self.readFrames(path,t,dt)
+
+        # update validity window & notify listeners that the old frames expired
+        self.validFrom = float(self.timeGrid[0])
+        self.validUntil = float(self.timeGrid[-1])
+        for listener in self.frameListeners:
+            listener(oldWindow,(self.validFrom,self.validUntil))
+	
+    #######################################################
+    # define function
+    # this function selects the bracketing frames from the attached buffer (a view, no copy or file reads)
+    
+    def viewFrames(self,t,dt):
         
-        if len(bracketFiles) != 2:
-            tempBracket = []
-            for i, item in enumerate(bracketFiles):
-                if (i == 0) or (i == len(bracketFiles)-1):
-                    tempBracket.append(bracketFiles[i])
-                    
-            bracketFiles = tempBracket
-                    
+        bracket = bracketTimes(self.frameTimes,t,dt)
+        if bracket is None:
+            raise Exception("Out of range: t=%s (%s)" % (t,datetime.fromtimestamp(int(t),timezone.utc)))
+        lo, hi = bracket
+        zs, ys, xs = self.windowSlices(self.frameDepthGrid,self.frameLatGrid,self.frameLonGrid)
+        
+        self.setFusedGrid([self.frameTimes[lo],self.frameTimes[hi]],np.asarray(self.frameDepthGrid)[zs],np.asarray(self.frameLatGrid)[ys],
+                          np.asarray(self.frameLonGrid)[xs],self.frames[lo:hi+1:hi-lo,zs,ys,xs])
+	
+    #######################################################
+    # define function
+    # this function reads the bracketing frames from the netcdf files
+    
+    def readFrames(self,path,t,dt):
+        
+        # get directory catalog (sorted netcdf file times), built once per directory
+        if self.catalog is None or self.catalog.path != path:
+            self.catalog = loadCatalog(path)
+        
+        # find indices of files containing times bracketing interpolation times
+        bracket = self.catalog.bracket(t,dt)
+        if bracket is None:
+            # directory may have changed since the catalog was built
+            self.catalog = loadCatalog(path,refresh=True)
+            bracket = self.catalog.bracket(t,dt)
+            if bracket is None:
+                raise Exception("Out of range: t=%s (%s)" % (t,datetime.fromtimestamp(int(t),timezone.utc)))
+        
+        # save time bracketing files filenames
+        bracketFiles = [[self.catalog.times[i],self.catalog.filePath(i)] for i in bracket]
         
   	# update bracketing times in class
         self.timeGrid = []
@@ -223,44 +385,22 @@ class hycomModel(oceanModel):
 	# get data from bracketing files & update in class
         dataset = Dataset(bracketFiles[0][1],'r')
             
-        self.depthGrid = dataset.variables['depth'][:]
-        self.latGrid = dataset.variables['lat'][:]
-        self.lonGrid = dataset.variables['lon'][:]
+        # only the hyperslab of the window is read (the whole grid when not windowed)
+        zs, ys, xs = self.windowSlices(dataset.variables['depth'][:],dataset.variables['lat'][:],dataset.variables['lon'][:])
+        self.depthGrid = dataset.variables['depth'][zs]
+        self.latGrid = dataset.variables['lat'][ys]
+        self.lonGrid = dataset.variables['lon'][xs]
               
-        self.uGrid = [] 
-        self.vGrid = []
-        self.salGrid = [] 
-        self.tempGrid = []
+        grids = [[] for name in VARIABLES]
         for line in bracketFiles:
 
             dataset = Dataset(line[1],'r')
   
-            u = dataset.variables['water_u']
-            v = dataset.variables['water_v']
-            S = dataset.variables['salinity']
-            T = dataset.variables['water_temp']
-            
-            for ele in u:
-                self.uGrid.append(ele)
-                                            
-            for ele in v:
-                self.vGrid.append(ele)
-                
-            for ele in S:
-                self.salGrid.append(ele)
-                                                        
-            for ele in T:
-                self.tempGrid.append(ele)
-
-        if self.timeGrid[-1] < self.timeGrid[0]:
-            self.timeGrid = self.timeGrid[::-1]
-            self.varGrid = self.varGrid[::-1]
-    
+            for grid, name in zip(grids,VARIABLES):
+                for ele in dataset.variables[name][:,zs,ys,xs]:
+                    grid.append(ele)
 
-        grid = [self.uGrid, self.vGrid, self.salGrid, self.tempGrid]
-        
-        for i in range(0, 4):
-            self.interp[i] = RegularGridInterpolator((self.timeGrid,self.depthGrid,self.latGrid,self.lonGrid),grid[i],method='linear',bounds_error=True)
+        self.setGrids(self.timeGrid,self.depthGrid,self.latGrid,self.lonGrid,grids)
 
         
 
@@ -276,7 +416,7 @@ class hycomModel(oceanModel):
 
 # standard imports
 import sys
-from seawater import eos80 #make sure this is downloaded
+import numpy as np
 
 # add all directories to packages path
 sys.path.insert(1,'..')
@@ -293,10 +433,68 @@ class oceanData:
     # constructor
     # this constructor stores current position 
     
-    def __init__(self,path):
+    def __init__(self,path,cube=False):
         self.path = path # path to netcdf files
         self.model = hycomModel() # current model object
+        
+        # read frames from the memory-mapped ocean cube instead of the netcdf files
+        if cube:
+            self.model.openCube(path)
 
+    #########################################################
+    # define function
+    # this function enables windowed loading of the ocean frames around the glider (see hycomModel.setWindow)
+    # halo in km, maxDepth in m
+       
+    def setWindow(self,halo,maxDepth=None):
+        self.model.setWindow(halo,maxDepth)
+    
+    #########################################################
+    # define function
+    # this function returns the frame cursor (start of the stored frames & window region), for checkpoints
+       
+    def cursor(self):
+        return self.model.validFrom, self.model.windowRegion
+    
+    #########################################################
+    # define function
+    # this function reloads the frames (& window) of a saved cursor, when resuming from a checkpoint
+       
+    def seek(self, cursor):
+        validFrom, windowRegion = cursor
+        if validFrom != float('inf'):
+            self.model.windowRegion = windowRegion
+            self.model.updateModel(self.path,validFrom,1)
+    
+    #########################################################
+    # define function
+    # this function returns the seconds left from times (unix) until the stored frames expire (inf where they do not cover the time)
+    # adaptive steps end there, so their corrector samples do not load the next frame & back
+       
+    def framesLeft(self,times):
+        times = np.asarray(times,dtype=float)
+        return np.where((self.model.validFrom <= times) & (times < self.model.validUntil),self.model.validUntil-times,np.inf)
+    
+    #########################################################
+    # define function
+    # this function checks if arrays of positions are all served by the stored window
+       
+    def inWindowMany(self,depths,lats,lons):
+        if self.model.windowHalo is None:
+            return True
+        
+        lonsUse = np.where(lons < 0,lons+360,lons)
+        return self.model.inWindow(np.max(depths),np.min(lats),np.min(lonsUse)) and self.model.inWindow(np.max(depths),np.max(lats),np.max(lonsUse))
+
+    #########################################################
+    # define function
+    # this function loads new model data when the stored frames don't cover the time or the window doesn't hold the position
+    # update model data by calling updateModel in specified currentModel class (climatology or hycom)
+       
+    def _ensureFrames(self,time_,depth,lat,lon):
+        if not self.model.covers(time_) or not self.model.inWindow(depth,lat,lon):
+            self.model.updateModel(self.path,time_,1,depth,lat,lon)
+    
     #########################################################
     # define function
     # this function defines an integration method to establish next position (time, depth, lat & lon)
@@ -304,53 +502,82 @@ class oceanData:
        
     def rho(self,time_,depth,lat,lon):
         # if time step not within timespan of stored netcdf data, update model data
-        # update model data by calling updateModel in specified currentModel class (climatology or hycom)
-        timeframe = self.model.timeWindow()
-        if (time_ not in range(timeframe[0],timeframe[-1])):
-            self.model.updateModel(self.path,time_,1)
+        self._ensureFrames(time_,depth,lat,lon)
        
-        # get salinity data
-        S = self.model.interp3(time_,depth,lat,lon,2)
-
-        # get temperature data
-        T = self.model.interp3(time_,depth,lat,lon,3)
-        
-        # water density at ballast point, EOS-80; input (s,t,p)
-        rho = eos80.dens(S,T,depth)
+        # water density at ballast point, from the precomputed EOS-80 density field
+        rho = self.model.interpAll(time_,depth,lat,lon)[4]
         
         return float(rho)
     
     #######################################################
-    def currents(self, time_, depth, lat, lon): #takes 3.7 seconds, but likely bc it calls updateModel
+    def currents(self, time_, depth, lat, lon): #timed by benchmarks/RunBenchmarks.py (ocean.currents)
+        # if current files don't cover required timespan, update model data with new file
+        self._ensureFrames(time_,depth,lat,lon)
+        
+        # get data on U currents (east-west) & V currents (north-south)
+        var = self.model.interpAll(time_,depth,lat,lon)
+        return var[0:1], var[1:2] #U and V in m/s
+    
+    #######################################################
+    def salAndTemp(self, time_, depth, lat, lon): #timed by benchmarks/RunBenchmarks.py (ocean.salAndTemp)
+        
         # if current files don't cover required timespan, update model data with new file
+        self._ensureFrames(time_,depth,lat,lon)
         
-        timeframe = self.model.timeWindow()
-        if (time_ not in range(timeframe[0],timeframe[-1])):
-            print(datetime.fromtimestamp(time_))
-            self.model.updateModel(self.path,time_,1)
+        # get data on salinity & temp
+        var = self.model.interpAll(time_,depth,lat,lon)
+        return var[2:3], var[3:4]
+    
+    #######################################################
+    def sample(self, time_, depth, lat, lon):
         
-        # get data on U currents (east-west)
-        U = self.model.interp3(time_,depth,lat,lon,0)
+        # if current files don't cover required timespan, update model data with new file
+        self._ensureFrames(time_,depth,lat,lon)
         
-        # get data on V currents (north-south)
-        V = self.model.interp3(time_,depth,lat,lon,1) #try to interpolate not nan
-        return U, V #U and V in m/s
+        # get currents, salinity & temp from one interpolation
+        U, V, S, T, _ = self.model.interpAll(time_,depth,lat,lon)
+        return float(U), float(V), float(S), float(T) #U and V in m/s
     
     #######################################################
-    def salAndTemp(self, time_, depth, lat, lon):
+    def sampleWithDensity(self, time_, depth, lat, lon):
         
         # if current files don't cover required timespan, update model data with new file
-        timeframe = self.model.timeWindow()
-        if (time_ not in range(timeframe[0],timeframe[-1])):
-            print(datetime.fromtimestamp(time_))
-            self.model.updateModel(self.path,time_,1)
+        self._ensureFrames(time_,depth,lat,lon)
+        
+        # get currents, salinity, temp & density (precomputed EOS-80 field) from one interpolation
+        U, V, S, T, rho = self.model.interpAll(time_,depth,lat,lon)
+        return float(U), float(V), float(S), float(T), float(rho) #U and V in m/s
+    
+    #######################################################
+    def sampleMany(self, times, depths, lats, lons):
+        
+        # U, V, S & T arrays shaped like the inputs
+        return self.sampleManyWithDensity(times,depths,lats,lons)[:4]
+    
+    #######################################################
+    def sampleManyWithDensity(self, times, depths, lats, lons):
+        
+        # arrays (or scalars) of query points, may span several netcdf frames
+        times, depths, lats, lons = np.broadcast_arrays(*[np.asarray(x,dtype=float) for x in (times,depths,lats,lons)])
+        shape = times.shape
+        times, depths, lats, lons = times.ravel(), depths.ravel(), lats.ravel(), lons.ravel()
+        
+        # group points by the frame bracketing their time
+        frameTimes = self.model.availableTimes(self.path)
+        frames = np.searchsorted(frameTimes,times,side='right') - 1
+        if np.any(frames < 0) or np.any(times >= frameTimes[-1]):
+            raise Exception("Out of range")
         
-        # get data on salinity
-        S = self.model.interp3(time_,depth,lat,lon,2)
+        # load each frame once, starting with the stored one, & interpolate all of its points together
+        var = np.empty((len(times),len(FIELDS)))
+        for frame in sorted(set(frames.tolist()),key=lambda f: not self.model.covers(frameTimes[f])):
+            group = (frames == frame)
+            if not self.model.covers(frameTimes[frame]) or not self.inWindowMany(depths[group],lats[group],lons[group]):
+                self.model.updateModel(self.path,frameTimes[frame],1,depths[group],lats[group],lons[group])
+            var[group] = self.model.interpMany(times[group],depths[group],lats[group],lons[group])
         
-        # get data on temp
-        T = self.model.interp3(time_,depth,lat,lon,3) 
-        return S, T
+        # U, V, S, T & density arrays shaped like the inputs
+        return tuple(var[:,i].reshape(shape) for i in range(len(FIELDS)))
 
 
 # In[87]:
@@ -396,12 +623,9 @@ for j in lat:
     #depths = [0, 2, 4, 6, 8, 10, 12, 15, 20, 30, 40, 50, 60, 70, 80, 90, 100, 125, 150, 500] #20 values
     depths = np.arange(0, 500, 10)
 
-    for i in depths:
-        u, v = oceanInfo.currents(date.replace(tzinfo=timezone(timedelta(hours=-7))).timestamp(), i, j, lon)
-        easting.append(u[0])
-        northing.append(v[0])
-        magnitude.append(np.sqrt(u[0]**2+v[0]**2))
-        date += timedelta(seconds=60)
+    times = date.replace(tzinfo=timezone(timedelta(hours=-7))).timestamp() + 60*np.arange(len(depths))
+    easting, northing, S, T = oceanInfo.sampleMany(times, depths, j, lon)
+    magnitude = np.sqrt(easting**2+northing**2)
     print("--- %s seconds ---" % (datetime.now() - startTime))
 
     import matplotlib.pyplot as plt
@@ -0,0 +1,198 @@
+#!/usr/bin/python3
+
+#################################################################################################################
+
+## interpolation engine for hycom type ocean grids
+## hycom lat & lon axes are uniform, the depth axis is a short fixed table & only two time frames are stored
+## so the bracketing cell along each axis is found without a search:
+##   - lat/lon: index arithmetic from the axis start & spacing
+##   - depth: lookup table of depth bins finer than the smallest layer spacing
+##   - time: linear blend of the two stored frames
+## both a scalar fast path & a batched (array) path are provided
+
+## bracketing follows scipy RegularGridInterpolator conventions; points outside the grid raise "Out of range"
+
+#################################################################################################################
+## imports
+
+## standard imports
+import numpy as np
+
+#################################################################################################################
+## define class
+## this class locates points on a (nearly) uniform axis by index arithmetic
+## the stored grid values are used for the weights, so small deviations from the uniform spacing are exact
+
+class uniformAxis:
+
+    def __init__(self,grid):
+        self.grid = np.asarray(grid,dtype=float)
+        self.values = self.grid.tolist() # python floats for the scalar path
+        self.lo = self.values[0]
+        self.hi = self.values[-1]
+        self.last = len(self.values)-2 # last cell index
+        self.invStep = self.last/(self.hi-self.lo) if self.last > 0 else 0.0
+
+    #############################################################################################################
+    ## define function
+    ## this function returns the cell index & weight of a scalar point, None if outside the axis
+
+    def locate(self,x):
+        if not (self.lo <= x <= self.hi):
+            return None
+
+        i = min(int((x-self.lo)*self.invStep),self.last)
+
+        ## correct for rounding in the stored grid values
+        values = self.values
+        if x < values[i] and i > 0:
+            i -= 1
+        elif x > values[i+1] and i < self.last:
+            i += 1
+
+        return i, (x-values[i])/(values[i+1]-values[i])
+
+    #############################################################################################################
+    ## define function
+    ## this function returns the cell indices & weights of an array of points, None if any is outside the axis
+
+    def locateMany(self,x):
+        if np.any(x < self.lo) or np.any(x > self.hi):
+            return None
+
+        grid = self.grid
+        i = np.minimum(((x-self.lo)*self.invStep).astype(int),self.last)
+        i = np.where((x < grid[i]) & (i > 0),i-1,i)
+        i = np.where((x > grid[i+1]) & (i < self.last),i+1,i)
+
+        return i, (x-grid[i])/(grid[i+1]-grid[i])
+
+    #############################################################################################################
+    ## define function
+    ## this function flags the points of an array that are outside the axis (for error reports)
+
+    def outside(self,x):
+        return (x < self.lo) | (x > self.hi)
+
+#################################################################################################################
+## define class
+## this class locates points on a non-uniform axis (hycom depth layers) with a precomputed lookup table
+## table bins are no wider than the smallest layer, so each bin holds at most one layer boundary
+
+class tableAxis(uniformAxis):
+
+    def __init__(self,grid):
+        super().__init__(grid)
+        self.binSize = float(np.min(np.diff(self.grid)))
+        self.invBin = 1/self.binSize
+
+        ## layer index at the start of each bin
+        binStarts = self.lo + self.binSize*np.arange(int((self.hi-self.lo)*self.invBin)+1)
+        self.table = np.clip(np.searchsorted(self.grid,binStarts,side='right')-1,0,self.last)
+        self.tableValues = self.table.tolist()
+
+    def locate(self,x):
+        if not (self.lo <= x <= self.hi):
+            return None
+
+        i = self.tableValues[min(int((x-self.lo)*self.invBin),len(self.tableValues)-1)]
+
+        ## step over the layer boundary inside the bin (or rounding at a bin edge)
+        values = self.values
+        if x > values[i+1] and i < self.last:
+            i += 1
+        elif x < values[i] and i > 0:
+            i -= 1
+
+        return i, (x-values[i])/(values[i+1]-values[i])
+
+    def locateMany(self,x):
+        if np.any(x < self.lo) or np.any(x > self.hi):
+            return None
+
+        grid = self.grid
+        i = self.table[np.minimum(((x-self.lo)*self.invBin).astype(int),len(self.table)-1)]
+        i = np.where((x > grid[i+1]) & (i < self.last),i+1,i)
+        i = np.where((x < grid[i]) & (i > 0),i-1,i)
+
+        return i, (x-grid[i])/(grid[i+1]-grid[i])
+
+#################################################################################################################
+## define function
+## this function picks the axis type for a grid: uniform if the spacing is constant (to 1%), else a lookup table
+
+def makeAxis(grid):
+    grid = np.asarray(grid,dtype=float)
+    if len(grid) > 2:
+        uniform = np.linspace(grid[0],grid[-1],len(grid))
+        if np.max(np.abs(grid-uniform)) > 0.01*(uniform[1]-uniform[0]):
+            return tableAxis(grid)
+
+    return uniformAxis(grid)
+
+#################################################################################################################
+## define class
+## this class interpolates all variables of a fused (time, depth, lat, lon, var) hycom grid
+
+class quadKernel:
+
+    def __init__(self,timeGrid,depthGrid,latGrid,lonGrid,fusedGrid):
+        self.timeAxis = uniformAxis(timeGrid) # two frames: linear blend
+        self.depthAxis = makeAxis(depthGrid)
+        self.latAxis = makeAxis(latGrid)
+        self.lonAxis = makeAxis(lonGrid)
+        self.grid = fusedGrid
+        self.nVars = fusedGrid.shape[-1]
+
+        ## corner offsets of the (2,2,2,2) cell block, for the batched path
+        self.corners = np.indices((2,2,2,2)).reshape(4,16)
+
+    #############################################################################################################
+    ## define function
+    ## this function interpolates all variables at a single time, depth, lat & lon (lon in deg E, 0-360)
+
+    def sample(self,time_,depth,lat,lon):
+
+        t = self.timeAxis.locate(time_)
+        z = self.depthAxis.locate(depth)
+        y = self.latAxis.locate(lat)
+        x = self.lonAxis.locate(lon)
+        if t is None or z is None or y is None or x is None:
+            raise Exception("Out of range: t=%s depth=%s lat=%s lon=%s" % (time_,depth,lat,lon))
+
+        (it,ft), (iz,fz), (iy,fy), (ix,fx) = t, z, y, x
+
+        ## 16 corner weights, ordered like the (2,2,2,2) cell block
+        tz = ((1-ft)*(1-fz), (1-ft)*fz, ft*(1-fz), ft*fz)
+        yx = ((1-fy)*(1-fx), (1-fy)*fx, fy*(1-fx), fy*fx)
+        weights = [a*b for a in tz for b in yx]
+
+        return np.array(weights) @ self.grid[it:it+2,iz:iz+2,iy:iy+2,ix:ix+2].reshape(16,self.nVars)
+
+    #############################################################################################################
+    ## define function
+    ## this function interpolates all variables at arrays of times, depths, lats & lons (lons in deg E, 0-360)
+    ## returns an (n points, n variables) array
+
+    def sampleMany(self,times,depths,lats,lons):
+
+        t = self.timeAxis.locateMany(times)
+        z = self.depthAxis.locateMany(depths)
+        y = self.latAxis.locateMany(lats)
+        x = self.lonAxis.locateMany(lons)
+        if t is None or z is None or y is None or x is None:
+            times, depths, lats, lons = np.broadcast_arrays(times,depths,lats,lons)
+            n = np.flatnonzero(self.timeAxis.outside(times) | self.depthAxis.outside(depths) | self.latAxis.outside(lats) | self.lonAxis.outside(lons))[0]
+            raise Exception("Out of range: point %d t=%s depth=%s lat=%s lon=%s" % (n,times[n],depths[n],lats[n],lons[n]))
+
+        (it,ft), (iz,fz), (iy,fy), (ix,fx) = t, z, y, x
+
+        ## corner weights & values, ordered like the (2,2,2,2) cell block
+        tz = np.stack([(1-ft)*(1-fz), (1-ft)*fz, ft*(1-fz), ft*fz],1)
+        yx = np.stack([(1-fy)*(1-fx), (1-fy)*fx, fy*(1-fx), fy*fx],1)
+        weights = (tz[:,:,None]*yx[:,None,:]).reshape(-1,16)
+
+        dt, dz, dy, dx = self.corners
+        values = self.grid[it[:,None]+dt,iz[:,None]+dz,iy[:,None]+dy,ix[:,None]+dx]
+
+        return np.einsum('nc,ncv->nv',weights,values)
@@ -1,35 +1,80 @@
 import numpy as np
 
+#polar tables already built by this process, keyed by (clA, clB, cdA, cdB)
+_tables = {}
+
 def speedCalc(clA, clB, cdA, cdB):
-    xVelParts = []
-    zVelParts = []
 
     #in degrees
-    thetas = []
-    phis = []
-    alphas = []
-
     angles = np.linspace(1, 20, 300)
+    a = angles * np.pi / 180 #converting to radians
+
+    cl = clA + clB * a
+    cd = cdA + cdB * a**2
+
+    theta = np.arctan(cd / cl)
+    phis = (theta * 180 / np.pi) - angles
+
+    velocityPart = np.sqrt((np.cos(theta)) / (cl))
+
+    xVelParts = velocityPart * np.cos(theta)
+    zVelParts = velocityPart * np.sin(theta)
+
+    return phis.tolist(), xVelParts.tolist(), zVelParts.tolist()
+
+
+#pitch -> (horizontal, vertical) speed factor polar, resampled on a uniform pitch grid
+#so a lookup is index arithmetic & one linear blend (scalar: lookup, arrays: lookupMany)
+#queries outside the polar raise ValueError, like scipy interp1d
+class polarTable:
+
+    def __init__(self, phis, vxs, vzs, size=16384):
+        order = np.argsort(phis)
+        phis = np.asarray(phis, dtype=float)[order]
+
+        self.lo = float(phis[0])
+        self.hi = float(phis[-1])
+        self.last = size - 2 #last cell index
+        self.invStep = (size - 1) / (self.hi - self.lo)
+
+        grid = np.linspace(self.lo, self.hi, size)
+        self.vx = np.interp(grid, phis, np.asarray(vxs, dtype=float)[order])
+        self.vz = np.interp(grid, phis, np.asarray(vzs, dtype=float)[order])
+        self.slopes = np.stack([np.diff(self.vx), np.diff(self.vz)], 1)
+
+        #python floats for the scalar path
+        self.vxValues = self.vx.tolist()
+        self.vzValues = self.vz.tolist()
+        self.vxSlopes = self.slopes[:,0].tolist()
+        self.vzSlopes = self.slopes[:,1].tolist()
+
+    def lookup(self, phi):
+        if not (self.lo <= phi <= self.hi):
+            raise ValueError('pitch %s outside the polar (%s to %s)' % (phi, self.lo, self.hi))
+
+        x = (phi - self.lo) * self.invStep
+        i = min(int(x), self.last)
+        f = x - i
+
+        return self.vxValues[i] + f * self.vxSlopes[i], self.vzValues[i] + f * self.vzSlopes[i]
+
+    def lookupMany(self, phis):
+        phis = np.asarray(phis, dtype=float)
+        if np.any(phis < self.lo) or np.any(phis > self.hi):
+            raise ValueError('pitch outside the polar (%s to %s)' % (self.lo, self.hi))
+
+        x = (phis - self.lo) * self.invStep
+        i = np.minimum(x.astype(int), self.last)
+        f = x - i
+
+        return self.vx[i] + f * self.slopes[i,0], self.vz[i] + f * self.slopes[i,1]
+
+
+#polar table for a wing (lift & drag coefficients), built once per process & shared
+def polarFor(clA, clB, cdA, cdB):
+    key = (float(clA), float(clB), float(cdA), float(cdB))
+
+    if key not in _tables:
+        _tables[key] = polarTable(*speedCalc(*key))
 
-    for a1 in angles:
-        a = a1 * np.pi / 180 #converting to radians
-        alphas.append(a1)
-        
-        cl = clA + clB * a
-        cd = cdA + cdB * a**2
-
-        theta = np.arctan(cd / cl)
-        thetas.append(theta * 180 / np.pi)
-        
-        phis.append((theta * 180 / np.pi) - a1)
-        
-        velocityPart = np.sqrt((np.cos(theta)) / (cl))
-        
-        vx = velocityPart * np.cos(theta)
-        vz = velocityPart * np.sin(theta)
-        
-        xVelParts.append(vx)
-        zVelParts.append(vz)
-                        
-    return phis, xVelParts, zVelParts
-    
\ No newline at end of file
+    return _tables[key]
@@ -0,0 +1,170 @@
+#!/usr/bin/python3
+
+##################################################################################
+# Ocean (HYCOM) & bathymetry (GEBCO) grids shared across worker processes
+#
+# The parent process decodes the HYCOM frames & the GEBCO elevation grid once
+# into multiprocessing.shared_memory blocks. Workers attach to those blocks by
+# name and wrap them zero-copy: hycomModel.attachFrames for the ocean frames,
+# bathymetryReader.fromGrids for the elevation grid. Memory use and startup I/O
+# no longer grow with the number of workers.
+#
+# With a timeSpan (start, end in unix seconds, e.g. the union of the missions'
+# windows) only the frames bracketing it are decoded, plus one past the end for
+# steps running past the end time; without one every frame in the directory is.
+#
+# Usage (parent):
+#   with sharedGrids(hycomDir, gebcoFile, timeSpan) as grids:
+#       ... start workers with grids.descriptor ...
+# Usage (worker):
+#   oceanInfo = attachOcean(descriptor['ocean'])
+#   bathyreader = attachBathymetry(descriptor['bathymetry'])
+##################################################################################
+
+# Standard imports
+import numpy as np
+from netCDF4 import Dataset
+from multiprocessing import shared_memory, resource_tracker
+
+# Local imports
+from HycomCatalog import loadCatalog, bracketTimes
+from OceanData import oceanData, VARIABLES, FIELDS, densityField
+import BathyReader
+
+# Shared memory blocks attached by this process (kept open while their arrays are in use)
+_attached = []
+
+# ---------------------------------------------------------
+# Create a shared memory block holding an array of the given shape
+# ---------------------------------------------------------
+def createBlock(shape, dtype):
+    block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+# ---------------------------------------------------------
+# Catalog indices (first, last) of the frames covering timeSpan
+# (start, end unix): the bracketing frames & one more past the end,
+# clipped to the directory; every frame without a timeSpan (or if
+# the span does not overlap the frames)
+# ---------------------------------------------------------
+def framesFor(times, timeSpan=None):
+    if timeSpan is not None:
+        start, end = max(timeSpan[0], times[0]), min(timeSpan[1], times[-1])
+        bracket = bracketTimes(times, start, max(end - start, 0))
+        if bracket is not None:
+            return bracket[0], min(bracket[1] + 1, len(times) - 1)
+
+    return 0, len(times) - 1
+
+# ---------------------------------------------------------
+# Attach to an existing shared memory block by name
+# The creating process owns the block: attaching processes must not
+# register it with the resource tracker, which would unlink it when
+# the worker exits (track=False does this on Python 3.13+)
+# ---------------------------------------------------------
+def attachBlock(name, shape, dtype):
+    try:
+        block = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None if rtype == 'shared_memory' else register(name, rtype)
+        try:
+            block = shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+    _attached.append(block)
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+##################################################################################
+# This class decodes the grids into shared memory (parent process)
+# descriptor is a small picklable dict that workers use to attach
+##################################################################################
+class sharedGrids:
+
+    def __init__(self, hycomDir=None, gebcoFile=None, timeSpan=None):
+        self.blocks = []
+        self.descriptor = {}
+
+        if hycomDir is not None:
+            self.descriptor['ocean'] = self.publishOcean(hycomDir, timeSpan)
+        if gebcoFile is not None:
+            self.descriptor['bathymetry'] = self.publishBathymetry(gebcoFile)
+
+    # ---------------------------------------------------------
+    # Decode the HYCOM frames covering timeSpan (all without one) & their
+    # density fields into one (frame, depth, lat, lon, field) block
+    # ---------------------------------------------------------
+    def publishOcean(self, hycomDir, timeSpan=None):
+        catalog = loadCatalog(hycomDir)
+        first, last = framesFor(catalog.times, timeSpan)
+        times = catalog.times[first:last+1]
+
+        dataset = Dataset(catalog.filePath(first), 'r')
+        depthGrid = np.asarray(dataset.variables['depth'][:], dtype=float)
+        latGrid = np.asarray(dataset.variables['lat'][:], dtype=float)
+        lonGrid = np.asarray(dataset.variables['lon'][:], dtype=float)
+        dataset.close()
+
+        shape = (len(times), len(depthGrid), len(latGrid), len(lonGrid), len(FIELDS))
+        block, frames = createBlock(shape, np.float32)
+        self.blocks.append(block)
+
+        for i in range(len(times)):
+            dataset = Dataset(catalog.filePath(first + i), 'r')
+            for v, name in enumerate(VARIABLES):
+                # masked (land / below floor) points keep their fill value, as in hycomModel
+                frames[i, ..., v] = np.ma.getdata(dataset.variables[name][0])
+            frames[i, ..., len(VARIABLES)] = densityField(depthGrid, frames[i, ..., 2], frames[i, ..., 3])
+            dataset.close()
+
+        return {'path': hycomDir, 'name': block.name, 'shape': shape, 'dtype': 'float32',
+                'times': list(times), 'depth': depthGrid, 'lat': latGrid, 'lon': lonGrid}
+
+    # ---------------------------------------------------------
+    # Decode the GEBCO elevation grid into a (lat, lon) block
+    # ---------------------------------------------------------
+    def publishBathymetry(self, gebcoFile):
+        dataset = Dataset(gebcoFile, 'r')
+        latGrid = np.asarray(dataset.variables['lat'][:], dtype=float)
+        lonGrid = np.asarray(dataset.variables['lon'][:], dtype=float)
+
+        shape = (len(latGrid), len(lonGrid))
+        block, elevation = createBlock(shape, np.float32)
+        self.blocks.append(block)
+        elevation[:] = np.ma.getdata(dataset.variables['elevation'][:])
+        dataset.close()
+
+        return {'name': block.name, 'shape': shape, 'dtype': 'float32', 'lat': latGrid, 'lon': lonGrid}
+
+    # ---------------------------------------------------------
+    # Release the shared memory (call once every worker is done)
+    # ---------------------------------------------------------
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ---------------------------------------------------------
+# Ocean data backed by the shared frames (worker process)
+# ---------------------------------------------------------
+def attachOcean(descriptor):
+    frames = attachBlock(descriptor['name'], descriptor['shape'], descriptor['dtype'])
+
+    oceanInfo = oceanData(descriptor['path'])
+    oceanInfo.model.attachFrames(descriptor['times'], descriptor['depth'], descriptor['lat'], descriptor['lon'], frames)
+    return oceanInfo
+
+# ---------------------------------------------------------
+# Bathymetry reader backed by the shared elevation grid (worker process)
+# ---------------------------------------------------------
+def attachBathymetry(descriptor):
+    elevation = attachBlock(descriptor['name'], descriptor['shape'], descriptor['dtype'])
+
+    return BathyReader.bathymetryReader.fromGrids(descriptor['lat'], descriptor['lon'], elevation)
@@ -0,0 +1,135 @@
+#!/usr/bin/python3
+
+##################################################################################
+# Adaptive time stepping for the glide (dive/climb) state machine
+#
+# In adaptive mode a steady glide step (no pumping) runs until the next depth
+# event, capped at maxInterval: the surface while climbing, maxDepth while
+# diving. Density & currents change along a step, so the step is a Heun
+# (trapezoid) predictor-corrector: the velocity is sampled again at the end
+# of the predicted step, the event time is solved again with the average
+# vertical velocity (secant iterations, until the landing moves less than
+# LANDING_TOLERANCE) and the step moves at the average velocity, landing on
+# the event. The difference between the Euler & Heun displacements is the
+# error of the step: above stepTolerance the step is shortened (& no longer
+# lands on the event), so steps shrink where the glide speed changes fast,
+# e.g. through the thermocline near the surface. Steps also end where the
+# stored ocean frames expire.
+# Seafloor crossings are root-found along the step
+# (BathyIndex.minDepthIndex.contactFraction) & the step is cut there.
+# Outside a steady leg (no event ahead), the fixed interval is used.
+#
+# Works on scalars (glider) & arrays (gliderFleet).
+#
+# Config ([General], optional):
+#   adaptiveStep = 1      # enable adaptive stepping (default 0: fixed interval)
+#   maxInterval = 240     # longest adaptive step, s (default 4 x interval)
+#   stepTolerance = 1     # displacement error per adaptive step, m (default 1)
+##################################################################################
+
+# Standard imports
+import numpy as np
+
+# Event codes returned with a step length
+NO_EVENT = 0
+SURFACE = 1
+MAX_DEPTH = 2
+
+# Default error per adaptive step (m), shortest shortened step (s)
+STEP_TOLERANCE = 1.0
+MIN_STEP = 1.0
+
+# Adaptive steps end this long (s) before the stored ocean frames expire (the
+# expiry time itself is served by the next frames)
+FRAME_MARGIN = 1e-3
+
+# Corrector iterations per step & the event landing change (s) they stop at
+ITERATIONS = 4
+LANDING_TOLERANCE = 0.5
+
+# ---------------------------------------------------------
+# Adaptive stepping settings from the config:
+# (adaptive, maxInterval, stepTolerance)
+# ---------------------------------------------------------
+def stepSettings(configRead, interval):
+    adaptive = configRead.hasKey('General', 'adaptiveStep') and configRead.getInt('General', 'adaptiveStep') == 1
+    maxInterval = configRead.getInt('General', 'maxInterval') if configRead.hasKey('General', 'maxInterval') else 4*interval
+    stepTolerance = configRead.getFloat('General', 'stepTolerance') if configRead.hasKey('General', 'stepTolerance') else STEP_TOLERANCE
+
+    return adaptive, maxInterval, stepTolerance
+
+# ---------------------------------------------------------
+# Time to the next depth event at depth (m) with vertical
+# velocity vz (m/s, positive down): (seconds, event code),
+# inf & NO_EVENT when no event is ahead
+# ---------------------------------------------------------
+def _toEvent(depth, vz, maxDepth):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        toSurface = np.where((vz < 0) & (depth > 0), depth/-vz, np.inf)
+        toMaxDepth = np.where((vz > 0) & (depth < maxDepth), (maxDepth-depth)/vz, np.inf)
+
+    toEvent = np.minimum(toSurface, toMaxDepth)
+    event = np.where(np.isfinite(toEvent), np.where(toSurface <= toMaxDepth, SURFACE, MAX_DEPTH), NO_EVENT)
+    return toEvent, event
+
+# ---------------------------------------------------------
+# Longest adaptive step: maxInterval, cut FRAME_MARGIN before the
+# stored ocean frames expire (framesLeft, s; oceanData.framesLeft)
+# unless that is closer than MIN_STEP
+# ---------------------------------------------------------
+def stepLimit(maxInterval, framesLeft):
+    return np.where(framesLeft > MIN_STEP, np.minimum(maxInterval, framesLeft - FRAME_MARGIN), float(maxInterval))
+
+# ---------------------------------------------------------
+# Heun predictor-corrector glide steps for the columns of the
+# state y (north, east, depth, northV, eastV; see Integrators.py)
+# with rate k1 at the start of the step; rates(select, offset, y)
+# samples the rate of the columns select offset seconds into it
+# returns (step length, event code, average rate over the step);
+# the depth lands on the event when the event code is set
+# ---------------------------------------------------------
+def eventStep(rates, y, k1, maxDepth, interval, maxInterval, tolerance=STEP_TOLERANCE):
+    maxDepth = np.broadcast_to(np.asarray(maxDepth, dtype=float), y.shape[1])
+    limit = np.array(np.broadcast_to(maxInterval, y.shape[1]), dtype=float)
+    velocity = k1.copy()
+
+    #predictor: straight to the next event at the start velocity; only steady glides
+    #(an event ahead) are corrected, the others keep the fixed interval
+    toEvent, nextEvent = _toEvent(y[2], k1[2], maxDepth)
+    active = np.isfinite(toEvent)
+    step = np.where(active, np.minimum(toEvent, limit), float(interval))
+    event = np.where(active & (toEvent <= limit), nextEvent, NO_EVENT)
+
+    for iteration in range(ITERATIONS):
+        select = np.flatnonzero(active)
+        if len(select) == 0:
+            break
+
+        #rate at the end of the Euler step, trapezoid average & the error of the Euler displacement
+        h = step[select]
+        k2 = rates(select, h, y[:,select] + h*k1[:,select])
+        average = (k1[:,select] + k2)/2
+        velocity[:,select] = average
+        error = h*np.max(np.abs(k2 - k1[:,select])[:3], axis=0)/2
+
+        #too long: shorten (no longer lands on the event)
+        shrink = error > tolerance
+        factor = np.clip(0.9*np.sqrt(tolerance/error[shrink]), 0.2, 0.9)
+        limit[select[shrink]] = np.maximum(h[shrink]*factor, MIN_STEP)
+
+        #event time with the average vertical velocity (secant update)
+        toEvent, nextEvent = _toEvent(y[2,select], average[2], maxDepth[select])
+        step[select] = np.minimum(toEvent, limit[select])
+        event[select] = np.where(toEvent <= limit[select], nextEvent, NO_EVENT)
+
+        active[select[~shrink & (np.abs(step[select] - h) <= LANDING_TOLERANCE)]] = False
+        active[select[h <= MIN_STEP]] = False
+
+    return step, event, velocity
+
+# ---------------------------------------------------------
+# Depth after a step that ended on an event (snapped exactly),
+# unchanged otherwise
+# ---------------------------------------------------------
+def eventDepth(depth, event, maxDepth):
+    return np.where(event == SURFACE, 0.0, np.where(event == MAX_DEPTH, maxDepth, depth))
@@ -0,0 +1,241 @@
+#!/usr/bin/python3
+
+##################################################################################
+# Parameter sweep runner for glider missions
+#
+# Takes a base config file plus a grid of config values, e.g.
+#   {'maxDepth': [200, 500, 1000], 'pumpRate': [5, 10], 'startDate': [9, 10]}
+# and runs one mission per combination, fanned out over a process pool.
+# Keys are config file keys; the section is looked up in the base config.
+#
+# Scenarios are sent to the workers in chunks. Inside a chunk, scenarios that
+# only differ in per-glider values (maxDepth, pumpRate, loiterTime, start
+# date & start/end points) run together as one gliderFleet; other overrides
+# get a fleet of their own.
+#
+# Each run returns the summary GlidePath.py prints: trip time, distance,
+# surfacings, energy split, average dive time & final distance to endpoint.
+#
+# By default the HYCOM frames & GEBCO grid of the base config are decoded once
+# into shared memory (SharedGrids) and every worker attaches to them. Only the
+# frames covering the scenarios' mission windows (their union) are decoded.
+#
+# Usage:
+#   python SweepRunner.py gliderConfig.dat --grid maxDepth=200,500,1000 --grid pumpRate=5,10 \
+#                         --workers 4 --chunk 8 --out sweep.csv
+##################################################################################
+
+# Standard imports
+import os
+import csv
+import argparse
+import itertools
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+# Local imports
+from ConfigReader_v2 import configReader_v2
+from GliderFleet import gliderFleet
+from OceanData import oceanData
+import BathyReader
+from SharedGrids import sharedGrids, attachOcean, attachBathymetry
+
+# Config keys that gliderFleet accepts per glider (or that set per-glider start/end points & dates)
+FLEET_KEYS = {'maxDepth', 'pumpRate', 'loiterTime',
+              'startLat', 'startLon', 'endLat', 'endLon',
+              'startYear', 'startMonth', 'startDate', 'startHour'}
+
+# Summary columns, in output order
+SUMMARY_KEYS = ['tripTime', 'distance', 'timesSurfaced', 'hotelEnergy', 'propulsionEnergy',
+                'totalEnergy', 'averageDiveTime', 'distanceToEndpoint']
+
+# Ocean & bathymetry readers already opened by this process, keyed by file path
+_readers = {}
+
+# ---------------------------------------------------------
+# Expand a parameter grid {key: [values]} into a list of
+# scenarios {key: value}, one per combination
+# ---------------------------------------------------------
+def expandGrid(paramGrid):
+    keys = list(paramGrid)
+    return [dict(zip(keys, values)) for values in itertools.product(*[paramGrid[key] for key in keys])]
+
+# ---------------------------------------------------------
+# Load the base config & apply a scenario's overrides
+# ---------------------------------------------------------
+def scenarioConfig(baseConfigFile, scenario):
+    configRead = configReader_v2()
+    if not configRead.loadFile(baseConfigFile):
+        raise Exception('Config file %s not found' % baseConfigFile)
+
+    for key, value in scenario.items():
+        section = configRead.findSection(key)
+        if section is None:
+            raise Exception('Unknown config key %s' % key)
+        configRead.setValue(section, key, value)
+
+    return configRead
+
+# ---------------------------------------------------------
+# Ocean & bathymetry readers for the config, opened once per process
+# ---------------------------------------------------------
+def sharedReaders(configRead):
+    hycomDir = configRead.getString('General', 'HYCOMFileDirectory')
+    gebcoFile = configRead.getString('General', 'gebcoFile')
+
+    if hycomDir not in _readers:
+        _readers[hycomDir] = oceanData(hycomDir)
+    if gebcoFile not in _readers:
+        _readers[gebcoFile] = BathyReader.openBathymetry(gebcoFile)
+
+    return _readers[hycomDir], _readers[gebcoFile]
+
+# ---------------------------------------------------------
+# Worker initializer: attach to the grids shared by the parent
+# ---------------------------------------------------------
+def attachShared(descriptor):
+    _readers[descriptor['ocean']['path']] = attachOcean(descriptor['ocean'])
+    if 'bathymetry' in descriptor:
+        _readers[descriptor['gebcoFile']] = attachBathymetry(descriptor['bathymetry'])
+
+# ---------------------------------------------------------
+# Start & end datetimes from a config
+# ---------------------------------------------------------
+def missionTimes(configRead):
+    startTime = datetime(configRead.getInt('Location/Time', 'startYear'), configRead.getInt('Location/Time', 'startMonth'),
+                         configRead.getInt('Location/Time', 'startDate'), configRead.getInt('Location/Time', 'startHour'), 0, 0)
+    endTime = datetime(configRead.getInt('Location/Time', 'endYear'), configRead.getInt('Location/Time', 'endMonth'),
+                       configRead.getInt('Location/Time', 'endDay'), configRead.getInt('Location/Time', 'endHour'), 0, 0)
+    return startTime, endTime
+
+# ---------------------------------------------------------
+# Ocean (HYCOM, UTC) unix times of a config's mission start & end
+# ---------------------------------------------------------
+def missionSpan(configRead):
+    zone = timezone(timedelta(hours=configRead.getInt('Location/Time', 'UTCOffset')))
+    return tuple(date.replace(tzinfo=zone).timestamp() for date in missionTimes(configRead))
+
+# ---------------------------------------------------------
+# Run a group of scenarios that share every non-fleet override
+# as one fleet; returns one summary per scenario
+# ---------------------------------------------------------
+def runFleet(baseConfigFile, scenarios):
+    configs = [scenarioConfig(baseConfigFile, scenario) for scenario in scenarios]
+    configRead = configs[0]
+    oceanInfo, bathyreader = sharedReaders(configRead)
+
+    startPoints = [[c.getFloat('Location/Time', 'startLat'), c.getFloat('Location/Time', 'startLon')] for c in configs]
+    endPoints = [[c.getFloat('Location/Time', 'endLat'), c.getFloat('Location/Time', 'endLon')] for c in configs]
+    startDates = [missionTimes(c)[0] for c in configs]
+    endTime = missionTimes(configRead)[1]
+
+    fleet = gliderFleet(configRead, startPoints, endPoints, startDates,
+                        maxDepths=[c.getInt('Glider', 'maxDepth') for c in configs],
+                        pumpRates=[c.getInt('General', 'pumpRate') for c in configs],
+                        loiterTimes=[c.getInt('General', 'loiterTime') for c in configs],
+                        oceanInfo=oceanInfo, bathyreader=bathyreader, record=False)
+    fleet.run(endTime)
+
+    return [fleet.summary(i) for i in range(len(scenarios))]
+
+# ---------------------------------------------------------
+# Worker entry point: run one chunk of (index, scenario) pairs
+# ---------------------------------------------------------
+def runChunk(baseConfigFile, chunk):
+
+    # group by the overrides a fleet cannot vary per glider
+    groups = {}
+    for index, scenario in chunk:
+        shared = tuple(sorted((key, str(value)) for key, value in scenario.items() if key not in FLEET_KEYS))
+        groups.setdefault(shared, []).append((index, scenario))
+
+    results = []
+    for group in groups.values():
+        summaries = runFleet(baseConfigFile, [scenario for index, scenario in group])
+        results += [(index, summary) for (index, scenario), summary in zip(group, summaries)]
+
+    return results
+
+# ---------------------------------------------------------
+# Run every scenario of a parameter grid
+# returns a list of (scenario, summary) in grid order
+# ---------------------------------------------------------
+def runSweep(baseConfigFile, paramGrid, workers=None, chunkSize=1, shared=True):
+    scenarios = expandGrid(paramGrid)
+    indexed = list(enumerate(scenarios))
+    chunks = [indexed[i:i+chunkSize] for i in range(0, len(indexed), chunkSize)]
+
+    # decode the base config's grids once, for every worker: the frames of the missions' windows only
+    # (tiled bathymetry is read on demand by each worker instead)
+    grids = None
+    initializer, initargs = None, ()
+    if shared:
+        configRead = scenarioConfig(baseConfigFile, {})
+        gebcoFile = configRead.getString('General', 'gebcoFile')
+        spans = [missionSpan(scenarioConfig(baseConfigFile, scenario)) for scenario in scenarios] or [missionSpan(configRead)]
+        timeSpan = (min(start for start, end in spans), max(end for start, end in spans))
+        grids = sharedGrids(configRead.getString('General', 'HYCOMFileDirectory'), None if os.path.isdir(gebcoFile) else gebcoFile, timeSpan)
+        initializer, initargs = attachShared, (dict(grids.descriptor, gebcoFile=gebcoFile),)
+
+    summaries = [None] * len(scenarios)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+            for results in executor.map(runChunk, [baseConfigFile] * len(chunks), chunks):
+                for index, summary in results:
+                    summaries[index] = summary
+    finally:
+        if grids is not None:
+            grids.close()
+
+    return list(zip(scenarios, summaries))
+
+# ---------------------------------------------------------
+# Write sweep results to csv, one row per scenario
+# ---------------------------------------------------------
+def writeSweep(fileName, results):
+    keys = list(results[0][0]) if results else []
+
+    with open(fileName, 'w') as file:
+        csvwriter = csv.writer(file)
+        csvwriter.writerow(keys + SUMMARY_KEYS)
+        for scenario, summary in results:
+            csvwriter.writerow([scenario[key] for key in keys] + [summary[key] for key in SUMMARY_KEYS])
+
+# ---------------------------------------------------------
+# Parse a command-line number: int where it is a whole number
+# (so '1e2' still suits keys read with getInt), else float
+# ---------------------------------------------------------
+def parseNumber(value):
+    try:
+        return int(value)
+    except ValueError:
+        number = float(value)
+        return int(number) if number.is_integer() else number
+
+# ---------------------------------------------------------
+# Parse 'key=v1,v2,...' grid arguments (numbers where possible)
+# ---------------------------------------------------------
+def parseGrid(gridArgs):
+    paramGrid = {}
+    for arg in gridArgs:
+        key, values = arg.split('=', 1)
+        paramGrid[key] = [parseNumber(v) for v in values.split(',')]
+    return paramGrid
+
+# ------------------------------------------------------------
+# App Main Entry Point
+# ------------------------------------------------------------
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a glider mission parameter sweep')
+    parser.add_argument('config', help='base glider config file')
+    parser.add_argument('--grid', action='append', default=[], help='key=v1,v2,... (repeatable)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: cpu count)')
+    parser.add_argument('--chunk', type=int, default=1, help='scenarios per worker task')
+    parser.add_argument('--out', default='sweep.csv', help='summary csv file')
+    parser.add_argument('--no-shared', action='store_true', help='each worker reads the grids itself')
+    args = parser.parse_args()
+
+    print('running sweep...')
+    results = runSweep(args.config, parseGrid(args.grid), args.workers, args.chunk, not args.no_shared)
+    writeSweep(args.out, results)
+    print(' - %d scenarios written to %s' % (len(results), args.out))
@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+
+##################################################################################
+# Columnar trajectory recorder for glider & fleet histories
+#
+# Each quantity (time, lat, lon, depth, ...) is a preallocated float64 NumPy
+# column, grown by chunk rows when full, instead of a Python list of scalars &
+# 0-d arrays. A fleet records one value per glider per row (width = n).
+#
+# Decimation: every Nth step is kept, & every step flagged as an event (mode
+# changes: dive/climb turn, surfacing, loiter end, floor contact, end of run),
+# so the first & last rows & all turning points are always present. every = 0
+# keeps events only.
+#
+# Columns read as recorder.lats or recorder['lats'] (views of the rows kept);
+# toArray() returns the whole trajectory as a structured array.
+#
+# With a writer (TrajectoryWriter.py) the rows are streamed to a file every
+# flushRows rows & the columns only hold the rows not yet written; close()
+# writes the rest.
+#
+# Config ([General], optional):
+#   recordEvery = 10     # keep every 10th step & all events (default 1: all steps)
+#
+# Usage:
+#   track = trajectoryRecorder(['times', 'lats', 'lons'], every=10)
+#   track.record(times=0, lats=33.17, lons=-117.52)
+#   plt.plot(track.lons, track.lats)
+##################################################################################
+
+# Standard imports
+import numpy as np
+
+# Rows added each time the columns fill up
+CHUNK = 4096
+
+# ---------------------------------------------------------
+# Decimation from the config: keep every Nth step (0: events only)
+# ---------------------------------------------------------
+def recordEvery(configRead):
+    return configRead.getInt('General', 'recordEvery') if configRead.hasKey('General', 'recordEvery') else 1
+
+##################################################################################
+# This class stores the recorded steps of a trajectory, one column per quantity
+##################################################################################
+class trajectoryRecorder:
+
+    # ---------------------------------------------------------
+    # Constructor with column names, values per row (None for a
+    # single glider, n for a fleet), decimation, growth chunk &
+    # optional writer with its rows per write
+    # ---------------------------------------------------------
+    def __init__(self, columns, width=None, every=1, chunk=CHUNK, writer=None, flushRows=CHUNK):
+        self.columns = list(columns)
+        self.shape = () if width is None else (width,)
+        self.every = every
+        if writer is not None:
+            chunk = min(chunk, flushRows) # never holds more than flushRows rows
+        self.chunk = chunk
+        self.writer = writer
+        self.flushRows = flushRows
+
+        self.data = {name: np.empty((chunk,) + self.shape) for name in self.columns}
+        self.length = 0 # rows kept
+        self.steps = 0 # steps offered to record
+
+    # ---------------------------------------------------------
+    # Record one step (a value for every column); kept if it is
+    # an Nth step or an event. Returns whether it was kept
+    # ---------------------------------------------------------
+    def record(self, event=False, **values):
+        keep = event or (self.every > 0 and self.steps % self.every == 0)
+        self.steps += 1
+        if not keep:
+            return False
+
+        # full: grow every column by one chunk
+        if self.length == len(self.data[self.columns[0]]):
+            for name in self.columns:
+                grown = np.empty((self.length + self.chunk,) + self.shape)
+                grown[:self.length] = self.data[name][:self.length]
+                self.data[name] = grown
+
+        for name in self.columns:
+            self.data[name][self.length] = values[name]
+        self.length += 1
+
+        if self.writer is not None and self.length >= self.flushRows:
+            self.flush()
+
+        return True
+
+    # ---------------------------------------------------------
+    # Write the rows kept to the writer & drop them
+    # ---------------------------------------------------------
+    def flush(self):
+        if self.writer is not None and self.length:
+            self.writer.write({name: self.data[name][:self.length] for name in self.columns})
+            self.length = 0
+
+    # ---------------------------------------------------------
+    # Write the remaining rows & close the writer (no-op without one)
+    # ---------------------------------------------------------
+    def close(self):
+        if self.writer is not None:
+            self.flush()
+            self.writer.close()
+            self.writer = None
+
+    # ---------------------------------------------------------
+    # State for a checkpoint (Checkpoint.py): the rows not yet
+    # written (after a flush) & the writer's position
+    # ---------------------------------------------------------
+    def checkpoint(self):
+        self.flush()
+        return {'data': {name: self.data[name][:self.length].copy() for name in self.columns},
+                'length': self.length, 'steps': self.steps,
+                'position': self.writer.position() if self.writer is not None else None}
+
+    # ---------------------------------------------------------
+    # Restore a checkpoint state; the writer continues from the
+    # checkpointed position (rows written later are overwritten)
+    # ---------------------------------------------------------
+    def restore(self, state):
+        size = max(self.chunk, state['length'])
+        self.data = {name: np.empty((size,) + self.shape) for name in self.columns}
+        for name in self.columns:
+            self.data[name][:state['length']] = state['data'][name]
+        self.length = state['length']
+        self.steps = state['steps']
+
+        if self.writer is not None:
+            self.writer.resume(state['position'])
+
+    # ---------------------------------------------------------
+    # Number of rows kept
+    # ---------------------------------------------------------
+    def __len__(self):
+        return self.length
+
+    # ---------------------------------------------------------
+    # Column of the rows kept (a view, valid until the next record)
+    # ---------------------------------------------------------
+    def __getitem__(self, name):
+        return self.data[name][:self.length]
+
+    def __getattr__(self, name):
+        data = self.__dict__.get('data')
+        if data is None or name not in data:
+            raise AttributeError(name)
+        return data[name][:self.length]
+
+    # ---------------------------------------------------------
+    # Rows kept as a structured array (one field per column)
+    # ---------------------------------------------------------
+    def toArray(self):
+        table = np.empty(self.length, dtype=[(name, np.float64, self.shape) for name in self.columns])
+        for name in self.columns:
+            table[name] = self.data[name][:self.length]
+        return table
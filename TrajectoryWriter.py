@@ -0,0 +1,179 @@
+#!/usr/bin/python3
+
+##################################################################################
+# Streaming trajectory & DAC output
+#
+# A trajectoryRecorder given a writer flushes its rows to the file every
+# flushRows rows & keeps only the rows not yet written, so long missions run in
+# bounded memory & an interrupted run leaves everything up to the last flush.
+# Files are created at the first write; a writer resumed from a checkpoint
+# position reopens the file & continues there instead, dropping the rows
+# written after the checkpoint (Checkpoint.py).
+#
+#   csv     buffered text, one line per row (fleets: one line per glider & row,
+#           with a glider column); flushed to disk at each write
+#   netcdf  one float64 variable per column along an unlimited row dimension
+#           (fleets: row x glider), synced to disk at each write
+#
+# Config ([General], optional; no streaming output without outputFile):
+#   outputFile = SoCalSim     # writes SoCalSim_track.<csv|nc> & SoCalSim_dac.<csv|nc>
+#   outputFormat = netcdf     # csv (default) or netcdf
+#   flushRows = 1000          # trajectory rows per write (default 1000)
+##################################################################################
+
+# Standard imports
+import csv
+import numpy as np
+from netCDF4 import Dataset
+
+# Default rows per write
+FLUSH_ROWS = 1000
+
+# File extension per format
+EXTENSIONS = {'csv': '.csv', 'netcdf': '.nc'}
+
+# ---------------------------------------------------------
+# Output settings from the config: (outputFile, format, flushRows)
+# outputFile is None when no streaming output is configured
+# ---------------------------------------------------------
+def outputSettings(configRead):
+    outputFile = configRead.getString('General', 'outputFile') if configRead.hasKey('General', 'outputFile') else None
+    outputFormat = configRead.getString('General', 'outputFormat').lower() if configRead.hasKey('General', 'outputFormat') else 'csv'
+    if outputFormat not in EXTENSIONS:
+        raise Exception("Unknown output format %s (use one of %s)" % (outputFormat, ', '.join(EXTENSIONS)))
+    flushRows = configRead.getInt('General', 'flushRows') if configRead.hasKey('General', 'flushRows') else FLUSH_ROWS
+
+    return outputFile, outputFormat, flushRows
+
+##################################################################################
+# This class streams rows to a CSV file
+##################################################################################
+class csvWriter:
+
+    # ---------------------------------------------------------
+    # Constructor with file name, column names & values per row
+    # (None for a single glider, n for a fleet)
+    # ---------------------------------------------------------
+    def __init__(self, fileName, columns, width=None):
+        self.fileName = fileName
+        self.columns = list(columns)
+        self.width = width
+
+        self.file = None
+
+    # ---------------------------------------------------------
+    # Create the file (header line) or, from a checkpoint position
+    # (byte offset), reopen it & drop what follows
+    # ---------------------------------------------------------
+    def open(self, position=None):
+        if position is None:
+            self.file = open(self.fileName, 'w', newline='')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(self.columns if self.width is None else ['glider'] + self.columns)
+        else:
+            self.file = open(self.fileName, 'r+', newline='')
+            self.file.seek(position)
+            self.file.truncate()
+            self.writer = csv.writer(self.file)
+
+    def position(self):
+        return self.file.tell() if self.file is not None else None
+
+    def resume(self, position):
+        if position is not None:
+            self.open(position)
+
+    # ---------------------------------------------------------
+    # Append rows {column: values} & flush them to disk
+    # ---------------------------------------------------------
+    def write(self, table):
+        if self.file is None:
+            self.open()
+        values = np.stack([np.asarray(table[name], dtype=float) for name in self.columns], axis=-1)
+        if self.width is None:
+            self.writer.writerows(values.tolist())
+        else:
+            # (rows, gliders, columns) -> one line per glider & row
+            gliders = np.broadcast_to(np.arange(self.width, dtype=float)[None,:,None], values.shape[:2] + (1,))
+            self.writer.writerows(np.concatenate([gliders, values], axis=-1).reshape(-1, len(self.columns)+1).tolist())
+        self.file.flush()
+
+    def close(self):
+        if self.file is None:
+            self.open()
+        self.file.close()
+
+##################################################################################
+# This class streams rows to a NetCDF file (unlimited row dimension)
+##################################################################################
+class netcdfWriter:
+
+    # ---------------------------------------------------------
+    # Constructor with file name, column names & values per row
+    # (None for a single glider, n for a fleet)
+    # ---------------------------------------------------------
+    def __init__(self, fileName, columns, width=None):
+        self.fileName = fileName
+        self.columns = list(columns)
+        self.width = width
+
+        self.dataset = None
+        self.rows = 0
+
+    # ---------------------------------------------------------
+    # Create the file or, from a checkpoint position (rows),
+    # reopen it to continue there; rows past the position are
+    # dropped by rewriting the file up to it (an unlimited
+    # dimension cannot shrink)
+    # ---------------------------------------------------------
+    def open(self, position=None):
+        if position is None:
+            self.dataset = Dataset(self.fileName, 'w')
+            self.dataset.createDimension('row', None)
+            dimensions = ('row',)
+            if self.width is not None:
+                self.dataset.createDimension('glider', self.width)
+                dimensions = ('row', 'glider')
+            for name in self.columns:
+                self.dataset.createVariable(name, 'f8', dimensions)
+            self.rows = 0
+        else:
+            self.dataset = Dataset(self.fileName, 'a')
+            self.rows = position
+            if len(self.dataset.dimensions['row']) > position:
+                table = {name: np.ma.getdata(self.dataset.variables[name][:position]) for name in self.columns}
+                self.dataset.close()
+                self.open()
+                if position:
+                    self.write(table)
+
+    def position(self):
+        return self.rows if self.dataset is not None else None
+
+    def resume(self, position):
+        if position is not None:
+            self.open(position)
+
+    # ---------------------------------------------------------
+    # Append rows {column: values} & sync them to disk
+    # ---------------------------------------------------------
+    def write(self, table):
+        if self.dataset is None:
+            self.open()
+        count = len(table[self.columns[0]])
+        for name in self.columns:
+            self.dataset.variables[name][self.rows:self.rows+count] = table[name]
+        self.rows += count
+        self.dataset.sync()
+
+    def close(self):
+        if self.dataset is None:
+            self.open()
+        self.dataset.close()
+
+# ---------------------------------------------------------
+# Writer for fileName (without extension) in the given format
+# ---------------------------------------------------------
+def openWriter(fileName, columns, width=None, outputFormat='csv'):
+    writers = {'csv': csvWriter, 'netcdf': netcdfWriter}
+    return writers[outputFormat](fileName + EXTENSIONS[outputFormat], columns, width)
@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+
+#########################################################
+
+# benchmark of adaptive time stepping (StepControl.py) against the fixed-step baseline
+# runs the configured mission with one glider (GliderFleet.gliderFleet) three ways:
+#   fixed     - the configured interval
+#   reference - a fine fixed interval (accuracy reference)
+#   adaptive  - adaptiveStep = 1
+# & reports steps, wall time, depth limit overshoot, surfacing time errors (largest & mean signed, negative: early)
+# & final position error vs the reference
+# run from the directory the config paths are relative to (as GlidePath.py)
+# usage: python benchmarks/AdaptiveStepBench.py [configFile] [referenceInterval]
+
+#########################################################
+# imports
+
+# standard imports
+import os
+import sys
+import time
+import warnings
+import numpy as np
+from datetime import datetime
+
+# add repo directory to packages path
+sys.path.insert(1,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+# class imports
+from ConfigReader_v2 import configReader_v2
+from GliderFleet import gliderFleet
+from NavUtils import distance
+
+#########################################################
+# define function
+# this function runs the mission with one glider, returns the fleet, its surfacing times (s) & wall time
+
+def runMission(configRead):
+    def date(kind):
+        return datetime(configRead.getInt('Location/Time',kind+'Year'),configRead.getInt('Location/Time',kind+'Month'),
+                        configRead.getInt('Location/Time',kind+('Date' if kind == 'start' else 'Day')),configRead.getInt('Location/Time',kind+'Hour'),0,0)
+
+    start = [configRead.getFloat('Location/Time','startLat'),configRead.getFloat('Location/Time','startLon')]
+    end = [configRead.getFloat('Location/Time','endLat'),configRead.getFloat('Location/Time','endLon')]
+    fleet = gliderFleet(configRead,[start],[end],[date('start')])
+    endTime = date('end')
+
+    surfacings = []
+    wall = time.perf_counter()
+    while not fleet.done.all():
+        surfaced = fleet.surfaceNum[0]
+        fleet.step(endTime)
+        if fleet.surfaceNum[0] > surfaced:
+            surfacings.append(fleet.timeStartIteration[0])
+    wall = time.perf_counter() - wall
+
+    return fleet, np.array(surfacings), wall
+
+#########################################################
+# benchmark
+
+configFile = sys.argv[1] if len(sys.argv) > 1 else 'SoCalData+Sim/gliderConfig.dat'
+referenceInterval = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+warnings.filterwarnings('ignore')
+
+configRead = configReader_v2()
+configRead.loadFile(configFile)
+interval = configRead.getInt('General','interval')
+
+modes = [('fixed',{'interval':interval,'adaptiveStep':0}),
+         ('reference',{'interval':referenceInterval,'adaptiveStep':0}),
+         ('adaptive',{'interval':interval,'adaptiveStep':1})]
+
+results = {}
+for name, settings in modes:
+    for key, value in settings.items():
+        configRead.setValue('General',key,value)
+    results[name] = runMission(configRead)
+
+reference, referenceSurfacings, _ = results['reference']
+print('%-10s %7s %10s %6s %10s %14s %14s %14s %12s'%('mode','steps','wall (s)','dives','steps/dive','overshoot (m)','surfacing (s)','surf. bias (s)','final (m)'))
+for name, _ in modes:
+    fleet, surfacings, wall = results[name]
+    steps = fleet.track.steps - 1
+    dives = max(int(fleet.surfaceNum[0]),1)
+    overshoot = max(np.max(fleet.track.depths[:,0]) - fleet.maxDepth[0],0)
+    m = min(len(surfacings),len(referenceSurfacings))
+    surfacingError = surfacings[:m]-referenceSurfacings[:m]
+    largest = np.max(np.abs(surfacingError)) if m else np.nan
+    bias = np.mean(surfacingError) if m else np.nan
+    finalError = distance(fleet.lat[0],fleet.lon[0],reference.lat[0],reference.lon[0])
+    print('%-10s %7d %10.3f %6d %10.1f %14.3f %14.1f %14.1f %12.1f'%(name,steps,wall,int(fleet.surfaceNum[0]),steps/dives,overshoot,largest,bias,finalError))
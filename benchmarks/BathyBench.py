@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+
+#########################################################
+
+# benchmark of bathymetry lookups (BathyReader.bathymetryReader)
+# compares the uniform-grid bilinear lookup against the scipy RegularGridInterpolator used before
+# usage: python benchmarks/BathyBench.py [gebcoFile]
+
+#########################################################
+# imports
+
+# standard imports
+import os
+import sys
+import timeit
+import numpy as np
+from netCDF4 import Dataset
+from scipy.interpolate import RegularGridInterpolator
+
+# add repo directory to packages path
+sys.path.insert(1,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+# class imports
+import BathyReader
+
+#########################################################
+# benchmark
+
+path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','gebco_2023_n33.4_s32.7_w-118.7_e-117.2.nc')
+number = 5000
+nPoints = 100000
+
+reader = BathyReader.bathymetryReader(path)
+
+# previous lookup: scipy interpolator over the masked elevation array
+dataset = Dataset(path,'r')
+latGrid = dataset.variables['lat'][:]
+lonGrid = dataset.variables['lon'][:]
+interp = RegularGridInterpolator((latGrid,lonGrid),dataset.variables['elevation'][:])
+
+# random points inside the grid
+rng = np.random.default_rng(0)
+lats = rng.uniform(latGrid[0],latGrid[-1],nPoints)
+lons = rng.uniform(lonGrid[0],lonGrid[-1],nPoints)
+
+# agreement with scipy
+reference = -interp(np.column_stack([lats,lons]))
+print('max difference vs scipy:  scalar %.2e   batched %.2e'%(
+    np.max(np.abs(np.array([reader.getDepth(lat,lon)[0] for lat, lon in zip(lats[:1000],lons[:1000])])-reference[:1000])),
+    np.max(np.abs(reader.getDepths(lats,lons)-reference))))
+
+# scalar: one point per call, as glider.update does
+old = timeit.timeit(lambda: -interp([lats[0],lons[0]]),number=number)/number
+new = timeit.timeit(lambda: reader.getDepth(lats[0],lons[0]),number=number)/number
+print('scalar            scipy: %8.2f us   bilinear: %6.2f us   speedup: %5.1fx'%(old*1e6,new*1e6,old/new))
+
+# batched: per point cost over nPoints
+repeat = 20
+points = np.column_stack([lats,lons])
+old = timeit.timeit(lambda: -interp(points),number=repeat)/repeat/nPoints
+new = timeit.timeit(lambda: reader.getDepths(lats,lons),number=repeat)/repeat/nPoints
+print('batched per point scipy: %8.3f us   bilinear: %6.3f us   speedup: %5.1fx'%(old*1e6,new*1e6,old/new))
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+
+#########################################################
+
+# benchmark of what-if branching (Branching.py) against re-simulating every branch from launch
+# forks maxDepth / loiterTime branches of the configured mission at a surfacing:
+#   relaunch - every branch runs as a new mission from launch, overrides applied at the surfacing
+#   serial   - forkBranches with workers = 1 (snapshot reset in process)
+#   forked   - forkBranches in forked worker processes
+# & checks the branch summaries agree
+# run from the directory the config paths are relative to (as GlidePath.py)
+# usage: python benchmarks/BranchBench.py [configFile] [surfacing] [workers]
+
+#########################################################
+# imports
+
+# standard imports
+import os
+import sys
+import time
+import warnings
+
+# add repo directory to packages path
+sys.path.insert(1,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+# class imports
+from GliderFleet import gliderFleet
+from Branching import runToSurfacing, forkBranches, branchName
+from SweepRunner import scenarioConfig, missionTimes
+
+#########################################################
+# define function
+# this function builds the configured single glider mission
+
+def mission(configRead, oceanInfo=None, bathyreader=None):
+    startTime, endTime = missionTimes(configRead)
+    fleet = gliderFleet(configRead,[[configRead.getFloat('Location/Time','startLat'),configRead.getFloat('Location/Time','startLon')]],
+                        [[configRead.getFloat('Location/Time','endLat'),configRead.getFloat('Location/Time','endLon')]],[startTime],
+                        oceanInfo=oceanInfo,bathyreader=bathyreader)
+    return fleet, endTime
+
+#########################################################
+# benchmark
+
+configFile = sys.argv[1] if len(sys.argv) > 1 else 'SoCalData+Sim/gliderConfig.dat'
+surfacing = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+warnings.filterwarnings('ignore')
+
+configRead = scenarioConfig(configFile,{})
+branches = [{'maxDepth':depth} for depth in [150,200,300,400,600,800]] + [{'loiterTime':minutes} for minutes in [5,10]]
+
+trunk, endTime = mission(configRead)
+runToSurfacing(trunk,endTime,surfacing)
+
+# relaunch: the readers are shared, only the simulation is repeated
+wall = time.perf_counter()
+relaunched = {}
+for overrides in [{}] + branches:
+    fleet, _ = mission(configRead,trunk.oceanInfo,trunk.bathyreader)
+    runToSurfacing(fleet,endTime,surfacing)
+    for key, value in overrides.items():
+        getattr(fleet,key)[:] = value
+    fleet.run(endTime)
+    relaunched[branchName(overrides)] = fleet.summary(0)
+relaunch = time.perf_counter() - wall
+
+wall = time.perf_counter()
+serialTree = forkBranches(trunk,endTime,branches,workers=1)
+serial = time.perf_counter() - wall
+
+wall = time.perf_counter()
+forkedTree = forkBranches(trunk,endTime,branches,workers=workers)
+forked = time.perf_counter() - wall
+
+agree = all(node.summaries[0] == relaunched[node.name] for node in serialTree.children + forkedTree.children)
+print('%d branches forked at surfacing %d (%.1f h)'%(len(branches)+1,surfacing,serialTree.hours[0]))
+print('%-10s %10s %10s'%('mode','wall (s)','speedup'))
+for name, wall in [('relaunch',relaunch),('serial',serial),('forked',forked)]:
+    print('%-10s %10.3f %10.1f'%(name,wall,relaunch/wall))
+print('summaries agree with relaunch: %s'%agree)
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+
+#########################################################
+
+# benchmark of ocean frame loading: netcdf files vs the memory-mapped ocean cube
+# times a frame switch (hycomModel.updateModel) at every file time of the directory
+# usage: python benchmarks/CubeLoadBench.py [hycomDirectory]
+
+#########################################################
+# imports
+
+# standard imports
+import os
+import sys
+import time
+
+# add repo directory to packages path
+sys.path.insert(1,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+# class imports
+from OceanData import hycomModel
+from HycomCatalog import loadCatalog
+from OceanCube import buildCube
+
+#########################################################
+# benchmark
+
+path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','JuneSoCalHYCOM')
+times = loadCatalog(path).times[:-1]
+
+start = time.perf_counter()
+buildCube(path)
+print('cube ingest (%d frames): %8.1f ms, once per directory'%(len(times)+1,(time.perf_counter()-start)*1e3))
+
+# open cost: a fresh model & its first frame
+start = time.perf_counter()
+model = hycomModel()
+model.updateModel(path,times[0],1)
+netcdfOpen = time.perf_counter()-start
+
+start = time.perf_counter()
+cube = hycomModel()
+cube.openCube(path)
+cube.updateModel(path,times[0],1)
+cubeOpen = time.perf_counter()-start
+
+print('first frame      netcdf: %8.2f ms   cube: %8.3f ms   speedup: %6.0fx'%(netcdfOpen*1e3,cubeOpen*1e3,netcdfOpen/cubeOpen))
+
+# frame switches across the whole directory
+start = time.perf_counter()
+for t in times:
+    model.updateModel(path,t,1)
+netcdfSwitch = (time.perf_counter()-start)/len(times)
+
+start = time.perf_counter()
+for t in times:
+    cube.updateModel(path,t,1)
+cubeSwitch = (time.perf_counter()-start)/len(times)
+
+print('frame switch     netcdf: %8.2f ms   cube: %8.3f ms   speedup: %6.0fx'%(netcdfSwitch*1e3,cubeSwitch*1e3,netcdfSwitch/cubeSwitch))
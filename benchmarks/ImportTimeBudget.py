@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+
+#########################################################
+
+# import time budget of the simulation modules
+# imports each module in a fresh interpreter with python -X importtime (median of several runs)
+# & checks that its cumulative import time stays within budget & that it does not pull in
+# the plotting / kml / scipy libraries (imported lazily where they are used)
+# exits with status 1 when a module is over budget or imports a deferred library
+# usage: python benchmarks/ImportTimeBudget.py [runs]
+
+#########################################################
+# imports
+
+# standard imports
+import os
+import sys
+import subprocess
+import numpy as np
+
+# repo directory (modules are imported from there)
+repoDir = os.path.join(os.path.dirname(os.path.abspath(__file__)),'..')
+
+# budgets: cumulative import time per module (milliseconds)
+BUDGETS = {'GlidePath': 400, 'GliderFleet': 400, 'SweepRunner': 400, 'Branching': 400}
+
+# libraries that must not be imported by the simulation modules
+DEFERRED = ['matplotlib', 'simplekml', 'scipy', 'glidePathGraph']
+
+#########################################################
+# define function
+# this function imports module in a fresh interpreter, returns its cumulative import time (ms)
+# & the top level packages it imported
+
+def importTime(module):
+    output = subprocess.run([sys.executable,'-X','importtime','-c','import '+module],cwd=repoDir,
+                            capture_output=True,text=True,check=True).stderr
+    cumulative = None
+    packages = set()
+    for line in output.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, total, name = line.split('|')
+        if not total.strip().isdigit():
+            continue # header
+        packages.add(name.strip().split('.')[0])
+        if name.strip() == module and name.startswith(' '+module):
+            cumulative = int(total)/1000
+    return cumulative, packages
+
+#########################################################
+# define function
+# this function checks every budgeted module, printing one line each; returns whether all passed
+# (also run by benchmarks/RunBenchmarks.py)
+
+def checkBudgets(runs=5):
+    passed = True
+    print('%-14s %12s %12s  %s'%('module','import (ms)','budget (ms)','deferred libraries imported'))
+    for module, budget in BUDGETS.items():
+        times = []
+        for run in range(runs):
+            cumulative, packages = importTime(module)
+            times.append(cumulative)
+        median = np.median(times)
+        deferred = [name for name in DEFERRED if name in packages]
+        over = median > budget or deferred
+        passed = passed and not over
+        print('%-14s %12.1f %12d  %s%s'%(module,median,budget,', '.join(deferred) or '-','  OVER BUDGET' if over else ''))
+    return passed
+
+#########################################################
+# benchmark
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    sys.exit(0 if checkBudgets(runs) else 1)
@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+
+#########################################################
+
+# convergence benchmark of the glide integrators (Integrators.py)
+# runs the configured mission with one glider (GliderFleet.gliderFleet) for each integrator & interval,
+# & reports final position & depth-averaged current (DAC) errors against a fine rk45 reference, with wall time
+# run from the directory the config paths are relative to (as GlidePath.py)
+# usage: python benchmarks/IntegratorBench.py [configFile] [--intervals 240 120 60 30] [--adaptive]
+
+#########################################################
+# imports
+
+# standard imports
+import os
+import sys
+import time
+import argparse
+import warnings
+import numpy as np
+from datetime import datetime
+
+# add repo directory to packages path
+sys.path.insert(1,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+# class imports
+from ConfigReader_v2 import configReader_v2
+from GliderFleet import gliderFleet
+from Integrators import METHODS
+from NavUtils import distance
+
+#########################################################
+# define function
+# this function runs the mission with one glider, returns the fleet & wall time
+
+def runMission(configRead):
+    def date(kind):
+        return datetime(configRead.getInt('Location/Time',kind+'Year'),configRead.getInt('Location/Time',kind+'Month'),
+                        configRead.getInt('Location/Time',kind+('Date' if kind == 'start' else 'Day')),configRead.getInt('Location/Time',kind+'Hour'),0,0)
+
+    start = [configRead.getFloat('Location/Time','startLat'),configRead.getFloat('Location/Time','startLon')]
+    end = [configRead.getFloat('Location/Time','endLat'),configRead.getFloat('Location/Time','endLon')]
+    fleet = gliderFleet(configRead,[start],[end],[date('start')],record=False)
+
+    wall = time.perf_counter()
+    fleet.run(date('end'))
+
+    return fleet, time.perf_counter() - wall
+
+#########################################################
+# benchmark
+
+parser = argparse.ArgumentParser(description='Trajectory error vs wall time of the glide integrators')
+parser.add_argument('configFile',nargs='?',default='SoCalData+Sim/gliderConfig.dat')
+parser.add_argument('--intervals',type=int,nargs='+',default=[240,120,60,30],help='fixed intervals to test, s')
+parser.add_argument('--reference',type=int,default=10,help='interval of the rk45 reference run, s')
+parser.add_argument('--adaptive',action='store_true',help='test with adaptive stepping (StepControl.py)')
+args = parser.parse_args()
+warnings.filterwarnings('ignore')
+
+configRead = configReader_v2()
+configRead.loadFile(args.configFile)
+configRead.setValue('General','adaptiveStep',int(args.adaptive))
+
+def runWith(method,interval,tolerance=0.1):
+    configRead.setValue('General','integrator',method)
+    configRead.setValue('General','integratorTolerance',tolerance)
+    configRead.setValue('General','interval',interval)
+    configRead.setValue('General','maxInterval',4*interval)
+    return runMission(configRead)
+
+reference, _ = runWith('rk45',args.reference,0.001)
+referenceDAC = np.column_stack([reference.dac_east[0],reference.dac_north[0]])
+
+print('%-9s %9s %10s %12s %16s'%('method','interval','wall (s)','final (m)','DAC (mm/s)'))
+for method in METHODS:
+    for interval in args.intervals:
+        fleet, wall = runWith(method,interval)
+        dac = np.column_stack([fleet.dac_east[0],fleet.dac_north[0]])
+        m = min(len(dac),len(referenceDAC))
+        dacError = 1000*np.max(np.abs(dac[:m]-referenceDAC[:m])) if m else np.nan
+        finalError = distance(fleet.lat[0],fleet.lon[0],reference.lat[0],reference.lon[0])
+        print('%-9s %9d %10.3f %12.2f %16.3f'%(method,interval,wall,finalError,dacError))
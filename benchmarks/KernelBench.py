@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+
+#########################################################
+
+# benchmark of the hycom interpolation kernel (OceanInterp.quadKernel)
+# compares against the scipy RegularGridInterpolator path interp3 used before (one interpolator per variable)
+# usage: python benchmarks/KernelBench.py [hycomDirectory]
+
+#########################################################
+# imports
+
+# standard imports
+import os
+import sys
+import timeit
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+
+# add repo directory to packages path
+sys.path.insert(1,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+# class imports
+from OceanData import hycomModel, FIELDS
+
+#########################################################
+# benchmark
+
+path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','JuneSoCalHYCOM')
+number = 2000
+nPoints = 10000
+
+model = hycomModel()
+model.updateModel(path,1686268800,1) # 2023-06-09 00:00 UTC, first bundled frame
+grids = (model.timeGrid,model.depthGrid,model.latGrid,model.lonGrid)
+
+# previous interp3: one scipy interpolator per variable (every fused field, density included)
+interps = [RegularGridInterpolator(grids,model.fusedGrid[...,i],method='linear',bounds_error=True) for i in range(len(FIELDS))]
+
+# random points inside the stored frames
+rng = np.random.default_rng(0)
+times = rng.uniform(model.timeGrid[0],model.timeGrid[-1],nPoints)
+depths = rng.uniform(0,1000,nPoints)
+lats = rng.uniform(model.latGrid[0],model.latGrid[-1],nPoints)
+lons = rng.uniform(model.lonGrid[0],model.lonGrid[-1],nPoints)-360
+point = (times[0],depths[0],lats[0],lons[0])
+pointE = [times[0],depths[0],lats[0],lons[0]+360]
+
+# agreement with scipy
+reference = np.stack([interp(np.column_stack([times,depths,lats,lons+360])) for interp in interps],1)
+print('max difference vs scipy:  scalar %.2e   batched %.2e'%(
+    np.max(np.abs(np.array([model.interpAll(*p) for p in zip(times[:500],depths[:500],lats[:500],lons[:500])])-reference[:500])),
+    np.max(np.abs(model.interpMany(times,depths,lats,lons)-reference))))
+
+# scalar: all fields at one point
+old = timeit.timeit(lambda: [interp(pointE) for interp in interps],number=number)/number
+new = timeit.timeit(lambda: model.interpAll(*point),number=number)/number
+print('scalar all fields  scipy x%d: %8.2f us   kernel: %6.2f us   speedup: %5.1fx'%(len(FIELDS),old*1e6,new*1e6,old/new))
+
+# batched: per point cost over nPoints
+repeat = 20
+pointsE = np.column_stack([times,depths,lats,lons+360])
+old = timeit.timeit(lambda: [interp(pointsE) for interp in interps],number=repeat)/repeat/nPoints
+new = timeit.timeit(lambda: model.interpMany(times,depths,lats,lons),number=repeat)/repeat/nPoints
+print('batched per point scipy x%d: %8.3f us   kernel: %6.3f us   speedup: %5.1fx'%(len(FIELDS),old*1e6,new*1e6,old/new))
@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+
+#########################################################
+
+# benchmark of the surface loiter drift (GliderFleet.gliderFleet._loiter)
+# compares the error controlled rk45 drift against the previous per-minute euler loop
+# for gliders spread over the mission box, at several loiter lengths
+# run from the directory the config paths are relative to (as GlidePath.py)
+# usage: python benchmarks/LoiterBench.py [configFile] [nGliders]
+
+#########################################################
+# imports
+
+# standard imports
+import os
+import sys
+import time
+import warnings
+import numpy as np
+from datetime import datetime
+
+# add repo directory to packages path
+sys.path.insert(1,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+# class imports
+from ConfigReader_v2 import configReader_v2
+from GliderFleet import gliderFleet
+from NavUtils import projectPositionXY, distance
+
+#########################################################
+# define function
+# this function drifts the gliders minute by minute, as the loiter loop did before
+
+def minuteLoop(fleet, idx):
+    lat = fleet.lat[idx].copy()
+    lon = fleet.lon[idx].copy()
+    times = fleet._oceanTimes(idx)
+    for n in range(int(fleet.loiterTime[idx].max())):
+        easting1, northing1, _, _ = fleet.oceanInfo.sampleMany(times, fleet.depth[idx], lat, lon)
+        bad = (np.abs(easting1) > 10) | (np.abs(northing1) > 10)
+        easting1 = np.where(bad, fleet.eastPrev[idx], easting1)
+        northing1 = np.where(bad, fleet.northPrev[idx], northing1)
+        lat, lon = projectPositionXY(lat, lon, northing1 * 60, easting1 * 60)
+    return lat, lon
+
+#########################################################
+# benchmark
+
+configFile = sys.argv[1] if len(sys.argv) > 1 else 'SoCalData+Sim/gliderConfig.dat'
+n = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+warnings.filterwarnings('ignore')
+
+configRead = configReader_v2()
+configRead.loadFile(configFile)
+start = datetime(configRead.getInt('Location/Time','startYear'),configRead.getInt('Location/Time','startMonth'),
+                 configRead.getInt('Location/Time','startDate'),configRead.getInt('Location/Time','startHour'),0,0)
+
+# start points inside the box, away from its edges
+rng = np.random.default_rng(0)
+lats = rng.uniform(configRead.getFloat('Location/Time','minLat')+0.1,configRead.getFloat('Location/Time','maxLat')-0.1,n)
+lons = rng.uniform(configRead.getFloat('Location/Time','minLon')+0.1,configRead.getFloat('Location/Time','maxLon')-0.1,n)
+points = np.column_stack([lats,lons])
+
+print('%8s %7s %14s %14s %10s %16s'%('loiter','gliders','loop (ms)','rk45 (ms)','speedup','difference (m)'))
+for loiterTime in [10,60,240]:
+    fleet = gliderFleet(configRead,points,points,[start]*n,loiterTimes=loiterTime,record=False)
+    idx = np.arange(n)
+    minuteLoop(fleet,idx) # loads the ocean frame
+
+    wall = time.perf_counter()
+    lat, lon = minuteLoop(fleet,idx)
+    loop = time.perf_counter() - wall
+
+    wall = time.perf_counter()
+    fleet._loiter(idx,np.zeros(n))
+    drift = time.perf_counter() - wall
+
+    difference = np.max(distance(lat,lon,fleet.lat,fleet.lon))
+    print('%8d %7d %14.2f %14.2f %10.1f %16.3f'%(loiterTime,n,loop*1e3,drift*1e3,loop/drift,difference))
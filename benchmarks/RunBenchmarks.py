@@ -0,0 +1,381 @@
+#!/usr/bin/python3
+
+#########################################################
+
+# benchmark suite: times the simulator's hot paths against the bundled JuneSoCalHYCOM frames & GEBCO subset
+#   ocean.currents      oceanData.currents, per call (stored frames)
+#   ocean.salAndTemp    oceanData.salAndTemp, per call (stored frames)
+#   ocean.sampleMany    oceanData.sampleMany, per point (1000 points)
+#   ocean.updateModel   hycomModel.updateModel, per frame load (cold model)
+#   bathy.getDepth      bathymetryReader.getDepth, per call
+#   bathy.getDepths     bathymetryReader.getDepths, per point (10000 points)
+#   glider.update       GlidePath.glider.update, per step
+#   fleet.step          GliderFleet.gliderFleet.step, per glider step (100 gliders)
+#   mission             GlidePath.runMission, whole configured mission (readers included)
+#   import.GlidePath    python -X importtime, cumulative (also fails if plotting / kml / scipy get imported)
+# each benchmark runs repeat times & keeps the fastest (the least disturbed by other load, as timeit);
+# a fixed calibration workload is timed before the benchmarks & after every repeat, & the times are also kept relative
+# to its fastest run in the suite, so changes in the machine's speed (other load, frequency scaling) cancel out of the
+# comparison (the calibration runs slower for a while after memory heavy benchmarks, so not the benchmark's own)
+# results are saved as json & compared with a baseline (default benchmarks/baseline.json) on these
+# relative times, flagging benchmarks slower than baseline * (1 + threshold) (measured again first)
+# the glider, fleet & mission benchmarks run the mission of a config (default benchmarks/benchmarkConfig.dat, the one
+# the baseline was measured with; data paths are pointed at the bundled files) & are skipped without it; they also need
+# the buoyancy engine's flow rate table (the config's flowRateFile, relative to the config; the default config uses the
+# bundled benchmarks/flowRateData.csv, so the suite runs offline from any directory); a hash of the config & table is
+# saved with the results & these benchmarks are not compared with a baseline measured on another mission
+# exits with status 1 on a regression
+# usage: python benchmarks/RunBenchmarks.py [--config file] [--baseline file] [--save] [--out file]
+#                                           [--threshold 0.25] [--repeat 5] [--only name ...]
+
+#########################################################
+# imports
+
+# standard imports
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import platform
+import warnings
+import contextlib
+import subprocess
+import numpy as np
+from datetime import datetime
+
+# repo directory (bundled data & modules)
+repoDir = os.path.join(os.path.dirname(os.path.abspath(__file__)),'..')
+sys.path.insert(1,repoDir)
+
+# class imports
+from ConfigReader_v2 import configReader_v2
+from OceanData import oceanData, hycomModel
+from BuoyancyEngine import flowRateSettings
+import BathyReader
+from ImportTimeBudget import importTime, DEFERRED
+
+# bundled data
+HYCOM_DIR = os.path.join(repoDir,'JuneSoCalHYCOM')
+GEBCO_FILE = os.path.join(repoDir,'gebco_2023_n33.4_s32.7_w-118.7_e-117.2.nc')
+FIRST_FRAME = 1686268800 # 2023-06-09 00:00 UTC, first bundled frame
+
+# default mission config of the glider, fleet & mission benchmarks
+CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)),'benchmarkConfig.dat')
+
+# default baseline & regression threshold (fraction slower than the baseline)
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),'baseline.json')
+THRESHOLD = 0.25
+
+# times a benchmark over the threshold is measured again before it counts as a regression
+RETRIES = 2
+
+#########################################################
+# define function
+# this function returns random query points (times, depths, lats, lons) inside the first bundled frames
+
+def oceanPoints(model, n):
+    rng = np.random.default_rng(0)
+    times = rng.uniform(model.timeGrid[0],model.timeGrid[-1],n)
+    depths = rng.uniform(0,500,n)
+    lats = rng.uniform(model.latGrid[0]+0.05,model.latGrid[-1]-0.05,n)
+    lons = rng.uniform(model.lonGrid[0]+0.05,model.lonGrid[-1]-0.05,n)-360
+    return times, depths, lats, lons
+
+#########################################################
+# define function
+# this function times the calibration workload: scalar python arithmetic & small numpy calls,
+# the mix of the simulator's per-step code (seconds, fastest of 3)
+
+def calibrate():
+    grid = np.arange(64.0)
+    times = []
+    for run in range(3):
+        wall = time.perf_counter()
+        total = 0.0
+        for i in range(2000):
+            total += float(np.interp(i*0.03,grid,grid)) * 0.5 + (i % 7) ** 0.5
+        times.append(time.perf_counter() - wall)
+    return min(times)
+
+#########################################################
+# define function
+# this function returns the seconds per call of fn over the given argument tuples
+
+def perCall(fn, points):
+    wall = time.perf_counter()
+    for args in points:
+        fn(*args)
+    return (time.perf_counter() - wall)/len(points)
+
+#########################################################
+# define functions
+# each benchmark takes the suite context & returns seconds per unit for one repeat
+
+def benchCurrents(context):
+    ocean = context['ocean']
+    return perCall(ocean.currents,list(zip(*oceanPoints(ocean.model,2000))))
+
+def benchSalAndTemp(context):
+    ocean = context['ocean']
+    return perCall(ocean.salAndTemp,list(zip(*oceanPoints(ocean.model,2000))))
+
+def benchSampleMany(context):
+    ocean = context['ocean']
+    points = oceanPoints(ocean.model,1000)
+    return perCall(ocean.sampleMany,[points]*20)/1000
+
+def benchUpdateModel(context):
+    return perCall(lambda: hycomModel().updateModel(HYCOM_DIR,FIRST_FRAME,1),[()]*3)
+
+def benchGetDepth(context):
+    bathy = context['bathy']
+    rng = np.random.default_rng(0)
+    points = list(zip(rng.uniform(32.75,33.35,5000),rng.uniform(-118.65,-117.25,5000)))
+    return perCall(bathy.getDepth,points)
+
+def benchGetDepths(context):
+    bathy = context['bathy']
+    rng = np.random.default_rng(0)
+    points = (rng.uniform(32.75,33.35,10000),rng.uniform(-118.65,-117.25,10000))
+    return perCall(bathy.getDepths,[points]*20)/10000
+
+def benchGliderUpdate(context):
+    from GlidePath import glider
+    configRead, startTime, endTime, start, end = context['mission']
+    glider1 = glider(configRead,start,end,startTime,context['ocean'],context['bathy'])
+    for step in range(50): # loads the frames
+        glider1.update(endTime)
+    return perCall(glider1.update,[(endTime,)]*500)
+
+def benchFleetStep(context):
+    from GliderFleet import gliderFleet
+    configRead, startTime, endTime, start, end = context['mission']
+    n = 100
+    fleet = gliderFleet(configRead,[start]*n,[end]*n,[startTime]*n,maxDepths=np.linspace(100,1000,n),
+                        oceanInfo=context['ocean'],bathyreader=context['bathy'],record=False)
+    for step in range(20):
+        fleet.step(endTime)
+    return perCall(fleet.step,[(endTime,)]*100)/n
+
+def benchMission(context):
+    from GlidePath import runMission
+    return perCall(runMission,[(context['mission'][0],)])
+
+def benchImport(context):
+    cumulative, packages = importTime('GlidePath')
+    deferred = [name for name in DEFERRED if name in packages]
+    if deferred:
+        raise Exception('GlidePath imports %s' % ', '.join(deferred))
+    return cumulative/1000
+
+# name: (function, unit, needs the config)
+BENCHMARKS = {
+    'ocean.currents': (benchCurrents,'call',False),
+    'ocean.salAndTemp': (benchSalAndTemp,'call',False),
+    'ocean.sampleMany': (benchSampleMany,'point',False),
+    'ocean.updateModel': (benchUpdateModel,'load',False),
+    'bathy.getDepth': (benchGetDepth,'call',False),
+    'bathy.getDepths': (benchGetDepths,'point',False),
+    'glider.update': (benchGliderUpdate,'step',True),
+    'fleet.step': (benchFleetStep,'glider step',True),
+    'mission': (benchMission,'mission',True),
+    'import.GlidePath': (benchImport,'import',False),
+}
+
+#########################################################
+# define function
+# this function loads the config (data paths pointed at the bundled files, the flow rate table found relative to the
+# config), returns None if there is none
+
+def missionConfig(configFile):
+    configRead = configReader_v2()
+    if not os.path.exists(configFile) or not configRead.loadFile(configFile):
+        return None
+    configRead.setValue('General','HYCOMFileDirectory',HYCOM_DIR)
+    configRead.setValue('General','gebcoFile',GEBCO_FILE)
+    if configRead.hasKey('General','flowRateFile'):
+        configRead.setValue('General','flowRateFile',os.path.join(os.path.dirname(os.path.abspath(configFile)),flowRateSettings(configRead)))
+
+    def date(kind):
+        return datetime(configRead.getInt('Location/Time',kind+'Year'),configRead.getInt('Location/Time',kind+'Month'),
+                        configRead.getInt('Location/Time',kind+('Date' if kind == 'start' else 'Day')),configRead.getInt('Location/Time',kind+'Hour'),0,0)
+
+    start = [configRead.getFloat('Location/Time','startLat'),configRead.getFloat('Location/Time','startLon')]
+    end = [configRead.getFloat('Location/Time','endLat'),configRead.getFloat('Location/Time','endLon')]
+    return configRead, date('start'), date('end'), start, end
+
+#########################################################
+# define function
+# this function runs the selected benchmarks, returns {name: {'seconds' (fastest repeat),
+# 'relative' (fastest repeat / fastest calibration of the run), 'unit', 'repeat'}}
+
+def runBenchmarks(names, configFile, repeat):
+    ocean = oceanData(HYCOM_DIR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ocean.sample(FIRST_FRAME,0,33.0,-118.0) # loads the first frames
+    context = {'ocean': ocean, 'bathy': BathyReader.openBathymetry(GEBCO_FILE), 'mission': missionConfig(configFile)}
+
+    results = {}
+    calibrations = [calibrate() for run in range(repeat)]
+    for name in names:
+        fn, unit, needsConfig = BENCHMARKS[name]
+        if needsConfig and context['mission'] is None:
+            print('%-18s skipped (no config %s)'%(name,configFile))
+            continue
+        if needsConfig and not os.path.exists(flowRateSettings(context['mission'][0])):
+            print('%-18s skipped (no flow rate table %s)'%(name,flowRateSettings(context['mission'][0])))
+            continue
+        times = []
+        for run in range(repeat if name != 'mission' else max(1,repeat//2)):
+            with contextlib.redirect_stdout(io.StringIO()): # progress messages of the simulation
+                times.append(fn(context))
+            calibrations.append(calibrate())
+        results[name] = {'seconds': float(np.min(times)), 'unit': unit, 'repeat': len(times)}
+        print('%-18s %12s per %s'%(name,formatSeconds(results[name]['seconds']),unit))
+
+    for result in results.values():
+        result['relative'] = result['seconds']/min(calibrations)
+    return results
+
+#########################################################
+# define function
+# this function formats a duration with a readable unit
+
+def formatSeconds(seconds):
+    for unit, scale in [('s',1),('ms',1e-3),('us',1e-6)]:
+        if seconds >= scale:
+            return '%.3f %s'%(seconds/scale,unit)
+    return '%.1f ns'%(seconds*1e9)
+
+#########################################################
+# define function
+# this function returns the sha1 of the mission the benchmarks run: the config file & the flow rate table
+# (None if the config is missing)
+
+def missionHash(configFile):
+    mission = missionConfig(configFile)
+    if mission is None:
+        return None
+    digest = hashlib.sha1()
+    for fileName in [configFile,flowRateSettings(mission[0])]:
+        if os.path.exists(fileName):
+            with open(fileName,'rb') as file:
+                digest.update(file.read())
+    return digest.hexdigest()
+
+#########################################################
+# define function
+# this function describes the machine, code & mission a result file was measured with
+
+def machineInfo(configFile):
+    try:
+        commit = subprocess.run(['git','rev-parse','--short','HEAD'],cwd=repoDir,capture_output=True,text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'date': datetime.now().isoformat(timespec='seconds'), 'commit': commit, 'python': platform.python_version(),
+            'numpy': np.__version__, 'platform': platform.platform(), 'processor': platform.processor() or platform.machine(),
+            'cpus': os.cpu_count(), 'mission': missionHash(configFile)}
+
+#########################################################
+# define function
+# this function returns the benchmarks that cannot be compared with the baseline: the ones running the
+# mission when the baseline was measured on another mission (config or flow rate table)
+
+def incomparable(report, baseline):
+    if baseline['machine'].get('mission') == report['machine']['mission']:
+        return []
+    return [name for name in report['results'] if BENCHMARKS[name][2]]
+
+#########################################################
+# define function
+# this function returns the relative change of each benchmark against the baseline
+# (None if not in it or in skip)
+
+def changes(results, baseline, skip=()):
+    return {name: result['relative']/baseline['results'][name]['relative'] - 1 if name in baseline['results'] and name not in skip else None
+            for name, result in results.items()}
+
+#########################################################
+# define function
+# this function prints the comparison with a baseline, one line per benchmark, & returns the regressions
+
+def compare(results, baseline, threshold, skip=()):
+    regressions = []
+    print()
+    print('%-18s %12s %12s %9s'%('benchmark','baseline','now','relative change'))
+    for name, change in changes(results,baseline,skip).items():
+        if name in skip:
+            print('%-18s %12s %12s %9s'%(name,formatSeconds(baseline['results'][name]['seconds']) if name in baseline['results'] else '-',
+                                         formatSeconds(results[name]['seconds']),'other mission'))
+            continue
+        if change is None:
+            print('%-18s %12s %12s %9s'%(name,'-',formatSeconds(results[name]['seconds']),'new'))
+            continue
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        elif change < -threshold:
+            flag = '  faster'
+        print('%-18s %12s %12s %+8.1f%%%s'%(name,formatSeconds(baseline['results'][name]['seconds']),formatSeconds(results[name]['seconds']),change*100,flag))
+    return regressions
+
+#########################################################
+# benchmark suite
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the simulator benchmark suite & compare with a baseline')
+    parser.add_argument('--config',default=CONFIG,help='glider config (glider, fleet & mission benchmarks)')
+    parser.add_argument('--baseline',default=BASELINE,help='baseline json to compare with')
+    parser.add_argument('--save',action='store_true',help='store the results as the new baseline')
+    parser.add_argument('--out',default=None,help='also write the results to this json file')
+    parser.add_argument('--threshold',type=float,default=THRESHOLD,help='flag benchmarks slower than baseline * (1 + threshold)')
+    parser.add_argument('--repeat',type=int,default=5,help='repeats per benchmark (fastest kept)')
+    parser.add_argument('--only',nargs='+',default=list(BENCHMARKS),choices=list(BENCHMARKS),help='benchmarks to run')
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    report = {'machine': machineInfo(args.config), 'results': runBenchmarks(args.only,args.config,args.repeat)}
+
+    baseline = None
+    skip = []
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        skip = incomparable(report,baseline)
+
+        # re-measure benchmarks over the threshold (a slow moment of the machine is not a regression),
+        # keeping their fastest result
+        for retry in range(RETRIES):
+            slower = [name for name, change in changes(report['results'],baseline,skip).items() if change is not None and change > args.threshold]
+            if not slower:
+                break
+            print('re-running %s...'%', '.join(slower))
+            for name, result in runBenchmarks(slower,args.config,args.repeat).items():
+                if result['relative'] < report['results'][name]['relative']:
+                    report['results'][name] = result
+
+    if args.out:
+        with open(args.out,'w') as file:
+            json.dump(report,file,indent=2)
+
+    regressions = []
+    if args.save:
+        with open(args.baseline,'w') as file:
+            json.dump(report,file,indent=2)
+        print('baseline saved to %s'%args.baseline)
+    elif baseline is not None:
+        if baseline['machine'].get('processor') != report['machine']['processor'] or baseline['machine'].get('cpus') != report['machine']['cpus']:
+            print('note: baseline measured on another machine (%s, %s cpus)'%(baseline['machine'].get('processor'),baseline['machine'].get('cpus')))
+        if skip:
+            print('note: baseline measured on another mission (config or flow rate table), %s not compared'%', '.join(skip))
+        regressions = compare(report['results'],baseline,args.threshold,skip)
+        if regressions:
+            print('%d regression(s) beyond %.0f%%: %s'%(len(regressions),args.threshold*100,', '.join(regressions)))
+    else:
+        print('no baseline at %s (run with --save to record one)'%args.baseline)
+
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,37 @@
+#!/usr/bin/python3
+
+#########################################################
+
+# micro-benchmark of the time-window check done on every oceanData query
+# compares the old range() membership test against hycomModel.covers
+# usage: python benchmarks/TimeWindowBench.py [hycomDirectory]
+
+#########################################################
+# imports
+
+# standard imports
+import os
+import sys
+import timeit
+
+# add repo directory to packages path
+sys.path.insert(1,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+# class imports
+from OceanData import hycomModel
+
+#########################################################
+# benchmark
+
+path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','JuneSoCalHYCOM')
+number = 2000
+
+model = hycomModel()
+model.updateModel(path,1686268800,1) # 2023-06-09 00:00 UTC, first bundled frame
+timeframe = model.timeWindow()
+
+# query times late in the 3 hour window: float timestamps, like glider dates after surfacing
+for label, t in [('integral float',timeframe[0]+9000.0), ('fractional float',timeframe[0]+9000.5)]:
+    old = timeit.timeit(lambda: t not in range(timeframe[0],timeframe[-1]),number=number)/number
+    new = timeit.timeit(lambda: not model.covers(t),number=number)/number
+    print('%-16s  range(): %9.2f us   covers(): %6.3f us   speedup: %8.0fx'%(label,old*1e6,new*1e6,old/new))
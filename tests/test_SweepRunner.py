@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+
+# ------------------------------------------------------------------
+# SweepRunner: command-line grid values & a sweep over the bundled
+# benchmark mission (JuneSoCalHYCOM frames, GEBCO subset & the
+# benchmark flow rate table)
+#
+# usage: python -m pytest tests
+# ------------------------------------------------------------------
+
+import os
+import sys
+import pytest
+
+# repo directory (bundled data & modules)
+repoDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(1, repoDir)
+
+from ConfigReader_v2 import configReader_v2
+from SweepRunner import parseNumber, parseGrid, runSweep
+
+# ---------------------------------------------------------
+# Benchmark mission config with absolute data paths, written
+# to a temporary file
+# ---------------------------------------------------------
+@pytest.fixture
+def missionConfig(tmp_path):
+    configRead = configReader_v2()
+    assert configRead.loadFile(os.path.join(repoDir, 'benchmarks', 'benchmarkConfig.dat'))
+    configRead.setValue('General', 'HYCOMFileDirectory', os.path.join(repoDir, 'JuneSoCalHYCOM'))
+    configRead.setValue('General', 'gebcoFile', os.path.join(repoDir, 'gebco_2023_n33.4_s32.7_w-118.7_e-117.2.nc'))
+    configRead.setValue('General', 'flowRateFile', os.path.join(repoDir, 'benchmarks', 'flowRateData.csv'))
+
+    configFile = str(tmp_path / 'gliderConfig.dat')
+    with open(configFile, 'w') as file:
+        configRead.config.write(file)
+    return configFile
+
+def test_parseNumber():
+    assert parseNumber('200') == 200 and isinstance(parseNumber('200'), int)
+    assert parseNumber('1e2') == 100 and isinstance(parseNumber('1e2'), int)
+    assert parseNumber('2.0') == 2 and isinstance(parseNumber('2.0'), int)
+    assert parseNumber('-5e-1') == -0.5
+    assert parseNumber('0.25') == 0.25
+    with pytest.raises(ValueError):
+        parseNumber('deep')
+
+def test_parseGrid():
+    assert parseGrid(['maxDepth=1e2,200', 'pumpRate=5']) == {'maxDepth': [100, 200], 'pumpRate': [5]}
+
+# ---------------------------------------------------------
+# maxDepth=1e2 must run the same mission as maxDepth=100
+# (written as 100.0 it was not an int to the config reader)
+# ---------------------------------------------------------
+def test_runSweepExponentMaxDepth(missionConfig):
+    [(scenario, summary)] = runSweep(missionConfig, parseGrid(['maxDepth=1e2']), workers=1, shared=False)
+    [(_, expected)] = runSweep(missionConfig, {'maxDepth': [100]}, workers=1, shared=False)
+
+    assert scenario == {'maxDepth': 100}
+    assert summary == expected
+    assert summary['timesSurfaced'] > 1